@@ -0,0 +1,72 @@
+"""
+Routes API d'administration (changement de modèle ML à chaud)
+Protégées par un jeton (ADMIN_API_TOKEN); désactivées si le jeton n'est pas configuré
+"""
+
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel
+
+from ml_model_singleton import get_model_name, get_fast_model_name, is_model_loaded
+from model_swap import ModelSwapError, get_model_swap_manager
+
+router = APIRouter(prefix="/api/admin", tags=["Administration"])
+
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Vérifie le jeton d'administration (en-tête X-Admin-Token)"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Administration désactivée (ADMIN_API_TOKEN non configuré)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Jeton d'administration invalide")
+
+
+# ============================================================================
+# Modèles Pydantic
+# ============================================================================
+
+class ModelSwapRequest(BaseModel):
+    """Requête de changement de modèle"""
+    model_name: str
+
+
+# ============================================================================
+# Endpoints
+# ============================================================================
+
+@router.get("/model", dependencies=[Depends(require_admin_token)])
+async def get_active_model():
+    """Modèle actif et état du dernier changement de modèle"""
+    return {
+        "active_model": get_model_name(),
+        "fast_model": get_fast_model_name(),
+        "loaded": is_model_loaded(),
+        "swap": get_model_swap_manager().status()
+    }
+
+
+@router.post("/model/swap", status_code=202, dependencies=[Depends(require_admin_token)])
+async def swap_model(request: ModelSwapRequest):
+    """
+    Lance le changement de modèle: les index du nouveau modèle sont construits en
+    arrière-plan, l'ancien modèle continue de servir jusqu'à la bascule
+
+    Le changement s'applique au worker qui reçoit la requête; le modèle est ensuite
+    enregistré en base: les autres workers le reprennent sous ML_MODEL_SYNC_INTERVAL
+    secondes (même construction en arrière-plan) et il est conservé au redémarrage
+    """
+    try:
+        return get_model_swap_manager().start(request.model_name)
+    except ModelSwapError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/model/swap", dependencies=[Depends(require_admin_token)])
+async def get_model_swap_status():
+    """Progression du changement de modèle (étape, textes encodés, erreur éventuelle)"""
+    return get_model_swap_manager().status()
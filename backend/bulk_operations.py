@@ -0,0 +1,116 @@
+"""
+Opérations en masse (exigences importées, mappings, résultats Claude, contrôles SCF,
+embeddings des exigences)
+Dédoublonnage assuré par la base (contrainte unique_requirement) via
+INSERT ... ON CONFLICT DO NOTHING RETURNING: un aller-retour par lot, correct
+même si deux imports du même fichier s'exécutent en parallèle
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import ComplianceMapping, Requirement, RequirementEmbedding, SCFControl
+
+
+# Nombre de lignes par instruction INSERT
+BULK_INSERT_CHUNK_SIZE = int(os.getenv('DB_BULK_CHUNK_SIZE', '5000'))
+
+# Clé d'unicité des exigences (contrainte unique_requirement)
+REQUIREMENT_KEY = ['original_id', 'source_file']
+
+
+def insert_requirements(
+    db: Session,
+    rows: List[Dict],
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE
+) -> List[Tuple[int, str]]:
+    """
+    Insère des exigences par lots en ignorant celles déjà présentes
+
+    Args:
+        db: Session SQLAlchemy (la transaction est validée par l'appelant)
+        rows: Lignes à insérer (dictionnaires colonne → valeur, mêmes clés pour toutes)
+        chunk_size: Nombre de lignes par instruction
+
+    Returns:
+        (id, original_id) des exigences réellement insérées
+    """
+    inserted: List[Tuple[int, str]] = []
+    for start in range(0, len(rows), chunk_size):
+        stmt = (
+            pg_insert(Requirement)
+            .values(rows[start:start + chunk_size])
+            .on_conflict_do_nothing(index_elements=REQUIREMENT_KEY)
+            .returning(Requirement.id, Requirement.original_id)
+        )
+        inserted.extend((row.id, row.original_id) for row in db.execute(stmt))
+    return inserted
+
+
+def insert_scf_controls(
+    db: Session,
+    rows: List[Dict],
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE
+) -> int:
+    """
+    Insère des contrôles SCF par lots (executemany, sans objets ORM)
+
+    Args:
+        db: Session SQLAlchemy (la transaction est validée par l'appelant)
+        rows: Lignes à insérer (dictionnaires colonne → valeur)
+        chunk_size: Nombre de lignes par instruction
+
+    Returns:
+        Nombre de lignes insérées
+    """
+    for start in range(0, len(rows), chunk_size):
+        db.execute(insert(SCFControl), rows[start:start + chunk_size])
+    return len(rows)
+
+
+def insert_compliance_mappings(
+    db: Session,
+    rows: List[Dict],
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE
+) -> int:
+    """
+    Insère des mappings de conformité par lots (executemany, sans objets ORM)
+
+    Args:
+        db: Session SQLAlchemy (la transaction est validée par l'appelant)
+        rows: Lignes à insérer (dictionnaires colonne → valeur)
+        chunk_size: Nombre de lignes par instruction
+
+    Returns:
+        Nombre de lignes insérées
+    """
+    for start in range(0, len(rows), chunk_size):
+        db.execute(insert(ComplianceMapping), rows[start:start + chunk_size])
+    return len(rows)
+
+
+def insert_requirement_embeddings(
+    db: Session,
+    rows: List[Dict],
+    chunk_size: int = BULK_INSERT_CHUNK_SIZE
+) -> None:
+    """
+    Enregistre des embeddings d'exigences par lots, en ignorant ceux déjà présents
+    (deux analyses simultanées peuvent encoder le même texte)
+
+    Args:
+        db: Session SQLAlchemy (la transaction est validée par l'appelant)
+        rows: Lignes à insérer (text_hash, model_name, dimension, embedding)
+        chunk_size: Nombre de lignes par instruction
+    """
+    for start in range(0, len(rows), chunk_size):
+        stmt = (
+            pg_insert(RequirementEmbedding)
+            .values(rows[start:start + chunk_size])
+            .on_conflict_do_nothing(index_elements=['text_hash', 'model_name'])
+        )
+        db.execute(stmt)
@@ -5,6 +5,7 @@ Garantit que tous les services utilisent les mêmes répertoires et conventions
 
 import os
 from pathlib import Path
+from typing import Optional
 
 
 class CacheConfig:
@@ -24,18 +25,52 @@ class CacheConfig:
     # S'assurer que le répertoire existe
     CACHE_DIR.mkdir(exist_ok=True, parents=True)
 
+    # Répertoire des bundles de modèles hors-ligne (voir model_bundle.py)
+    if os.getenv('ML_MODELS_DIR'):
+        MODELS_DIR = Path(os.getenv('ML_MODELS_DIR'))
+    elif IS_DOCKER:
+        MODELS_DIR = Path('/app/models')
+    else:
+        MODELS_DIR = Path(__file__).parent / 'models'
+
     # Fichiers de cache spécifiques (format NumPy sécurisé .npz)
     SCF_EMBEDDINGS_CACHE = CACHE_DIR / 'scf_embeddings.npz'
 
+    # Taille maximale des artefacts de cache (éviction LRU, voir cache_manager.py)
+    MAX_SIZE_MB = int(os.getenv('CACHE_MAX_SIZE_MB', '2048'))
+
     @classmethod
     def get_cache_dir(cls) -> Path:
         """Retourne le répertoire de cache principal"""
         return cls.CACHE_DIR
 
     @classmethod
-    def get_scf_embeddings_cache(cls) -> Path:
-        """Retourne le chemin du cache des embeddings SCF"""
-        return cls.SCF_EMBEDDINGS_CACHE
+    def get_scf_embeddings_cache(cls, model_name: Optional[str] = None) -> Path:
+        """
+        Retourne le chemin du cache des embeddings SCF
+
+        Args:
+            model_name: Modèle dont on veut le cache (un fichier par modèle).
+                        None = ancien fichier unique (compatibilité)
+        """
+        if model_name is None:
+            return cls.SCF_EMBEDDINGS_CACHE
+        return cls.CACHE_DIR / f"{cls.get_scf_embeddings_cache_key(model_name)}.npz"
+
+    @classmethod
+    def get_scf_embeddings_cache_key(cls, model_name: str) -> str:
+        """Retourne la clé (nom sans extension) du cache des embeddings SCF d'un modèle"""
+        return f"scf_embeddings_{model_name.replace('/', '_')}"
+
+    @classmethod
+    def get_max_size_bytes(cls) -> int:
+        """Retourne la taille maximale des artefacts de cache en octets"""
+        return cls.MAX_SIZE_MB * 1024 * 1024
+
+    @classmethod
+    def get_models_dir(cls) -> Path:
+        """Retourne le répertoire des bundles de modèles"""
+        return cls.MODELS_DIR
 
     @classmethod
     def is_docker_environment(cls) -> bool:
@@ -0,0 +1,381 @@
+"""
+Gestionnaire des artefacts de cache (embeddings NumPy)
+Manifeste (modèle, hash du contenu, dtype, shape, checksum), écriture atomique
+(fichier temporaire puis renommage), verrou inter-processus pour qu'un seul worker
+construise un artefact, vérification du checksum au chargement et éviction des
+artefacts obsolètes au-delà d'une taille maximale
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+from cache_config import CacheConfig
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+
+# Manifeste des artefacts et répertoire des verrous
+MANIFEST_FILE = 'manifest.json'
+LOCKS_DIR = '.locks'
+
+# Préfixe des artefacts gérés (les fichiers orphelins portant ce préfixe sont obsolètes)
+ARTIFACT_PREFIX = 'scf_embeddings'
+
+# Âge à partir duquel un fichier temporaire est considéré comme abandonné (secondes)
+STALE_TMP_AGE = 3600
+
+# Attente maximale d'un verrou (une construction complète peut durer plusieurs minutes)
+LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', '3600'))
+
+
+class CacheLockTimeout(Exception):
+    """Exception levée lorsqu'un verrou de cache n'a pas pu être obtenu à temps"""
+    pass
+
+
+def _file_sha256(path: Path) -> str:
+    """Calcule le SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _try_lock(f) -> bool:
+    """Tente de poser un verrou exclusif non bloquant sur un fichier ouvert"""
+    try:
+        if sys.platform == 'win32':
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f) -> None:
+    if sys.platform == 'win32':
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def content_hash(texts: Iterable[str]) -> str:
+    """
+    Empreinte du contenu indexé (invalide le cache si un texte change)
+
+    Args:
+        texts: Textes encodés, dans l'ordre de l'index
+
+    Returns:
+        SHA-256 hexadécimal
+    """
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class CacheManager:
+    """
+    Artefacts NumPy (.npz) du répertoire de cache, décrits dans un manifeste partagé
+
+    Un artefact est identifié par une clé (nom de fichier sans extension). Les fichiers
+    sans entrée dans le manifeste ne sont jamais chargés.
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_size_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir: Répertoire de cache (défaut: CacheConfig)
+            max_size_bytes: Taille maximale des artefacts (défaut: CACHE_MAX_SIZE_MB)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else CacheConfig.get_cache_dir()
+        self.max_size_bytes = max_size_bytes or CacheConfig.get_max_size_bytes()
+        (self.cache_dir / LOCKS_DIR).mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        """Retourne le chemin de l'artefact d'une clé"""
+        return self.cache_dir / f"{key}.npz"
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+        """
+        Verrou exclusif inter-processus sur une clé (fcntl / msvcrt)
+
+        Raises:
+            CacheLockTimeout: Si le verrou n'est pas obtenu avant `timeout` secondes
+        """
+        lock_path = self.cache_dir / LOCKS_DIR / f"{key}.lock"
+        with open(lock_path, 'a+b') as f:
+            deadline = time.monotonic() + timeout
+            waiting_logged = False
+            while not _try_lock(f):
+                if time.monotonic() > deadline:
+                    raise CacheLockTimeout(f"Verrou de cache non obtenu après {timeout:.0f}s: {key}")
+                if not waiting_logged:
+                    logger.info(f"⏳ Artefact {key} en cours de construction par un autre processus, attente...")
+                    waiting_logged = True
+                time.sleep(0.5)
+            try:
+                yield
+            finally:
+                _unlock(f)
+
+    # ------------------------------------------------------------------
+    # Manifeste
+    # ------------------------------------------------------------------
+
+    def _read_manifest(self) -> Dict[str, Dict]:
+        manifest_path = self.cache_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return {}
+        try:
+            return json.loads(manifest_path.read_text(encoding='utf-8'))
+        except ValueError:
+            logger.warning("⚠️ Manifeste du cache illisible, réinitialisé")
+            return {}
+
+    def _write_manifest(self, manifest: Dict[str, Dict]) -> None:
+        manifest_path = self.cache_dir / MANIFEST_FILE
+        tmp_path = manifest_path.with_name(f".{MANIFEST_FILE}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, manifest_path)
+
+    def entry(self, key: str) -> Optional[Dict]:
+        """Retourne l'entrée du manifeste d'une clé"""
+        return self._read_manifest().get(key)
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def save(
+        self,
+        key: str,
+        arrays: Dict[str, np.ndarray],
+        model_name: str,
+        content_hash: str
+    ) -> Path:
+        """
+        Écrit un artefact de façon atomique et l'enregistre dans le manifeste
+
+        Args:
+            key: Clé de l'artefact
+            arrays: Tableaux à sauvegarder (chaînes en dtype unicode, pas d'objets)
+            model_name: Modèle ayant produit les embeddings
+            content_hash: Empreinte du contenu encodé
+
+        Returns:
+            Chemin de l'artefact
+        """
+        path = self.path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = {
+                'file': path.name,
+                'model_name': model_name,
+                'content_hash': content_hash,
+                'checksum': _file_sha256(tmp_path),
+                'size': tmp_path.stat().st_size,
+                'arrays': {
+                    name: {'dtype': array.dtype.str, 'shape': list(array.shape)}
+                    for name, array in arrays.items()
+                },
+                'created_at': datetime.now().isoformat(),
+            }
+
+            # Les lecteurs voient l'ancien fichier ou le nouveau, jamais un fichier partiel
+            with self.lock(MANIFEST_FILE):
+                os.replace(tmp_path, path)
+                manifest = self._read_manifest()
+                manifest[key] = entry
+                self._write_manifest(manifest)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        logger.info(f"💾 Artefact de cache écrit: {path.name} ({entry['size'] / (1024 * 1024):.1f} MB)")
+        self.evict(protect={key})
+        return path
+
+    def load(
+        self,
+        key: str,
+        model_name: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        verify: bool = True
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Charge un artefact s'il est présent, intègre et correspond au modèle et au contenu
+
+        Args:
+            key: Clé de l'artefact
+            model_name: Modèle attendu (None = pas de vérification)
+            content_hash: Empreinte attendue du contenu (None = pas de vérification)
+            verify: Vérifier le checksum du fichier
+
+        Returns:
+            Tableaux de l'artefact, ou None s'il faut le reconstruire
+        """
+        entry = self.entry(key)
+        path = self.path(key)
+        if entry is None or not path.exists():
+            return None
+
+        if model_name is not None and entry['model_name'] != model_name:
+            logger.warning(f"⚠️ Cache {key}: modèle {entry['model_name']} au lieu de {model_name}")
+            return None
+        if content_hash is not None and entry['content_hash'] != content_hash:
+            logger.info(f"🔄 Cache {key}: contenu modifié depuis sa création")
+            return None
+        if verify and _file_sha256(path) != entry['checksum']:
+            logger.warning(f"⚠️ Cache {key}: checksum invalide (fichier corrompu ou modifié)")
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except Exception as e:
+            logger.warning(f"⚠️ Cache {key} illisible: {e}")
+            return None
+
+        for name, spec in entry['arrays'].items():
+            array = arrays.get(name)
+            if array is None or array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+                logger.warning(f"⚠️ Cache {key}: tableau {name} non conforme au manifeste")
+                return None
+
+        # Date d'utilisation pour l'éviction (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return arrays
+
+    def get_or_build(
+        self,
+        key: str,
+        build: Callable[[], Dict[str, np.ndarray]],
+        model_name: str,
+        content_hash: str
+    ) -> Dict[str, np.ndarray]:
+        """
+        Charge un artefact ou le construit sous verrou (un seul processus construit,
+        les autres attendent puis lisent le résultat)
+
+        Args:
+            key: Clé de l'artefact
+            build: Fonction produisant les tableaux à sauvegarder
+            model_name: Modèle attendu
+            content_hash: Empreinte attendue du contenu
+
+        Returns:
+            Tableaux de l'artefact
+        """
+        arrays = self.load(key, model_name, content_hash)
+        if arrays is not None:
+            return arrays
+
+        with self.lock(key):
+            # Un autre processus a pu terminer la construction pendant l'attente
+            arrays = self.load(key, model_name, content_hash)
+            if arrays is not None:
+                return arrays
+
+            arrays = build()
+            self.save(key, arrays, model_name, content_hash)
+            return arrays
+
+    # ------------------------------------------------------------------
+    # Éviction
+    # ------------------------------------------------------------------
+
+    def evict(self, protect: Iterable[str] = ()) -> int:
+        """
+        Supprime les artefacts obsolètes: fichiers orphelins (sans entrée dans le manifeste),
+        puis les moins récemment utilisés tant que la taille dépasse le maximum
+
+        Args:
+            protect: Clés à ne jamais supprimer (artefacts en cours d'utilisation)
+
+        Returns:
+            Nombre de fichiers supprimés
+        """
+        protect = set(protect)
+        removed = 0
+
+        with self.lock(MANIFEST_FILE):
+            manifest = self._read_manifest()
+
+            # Entrées dont le fichier a disparu
+            for key in [k for k in manifest if not self.path(k).exists()]:
+                del manifest[key]
+
+            # Fichiers orphelins (ancien format, écriture interrompue)
+            for path in self.cache_dir.glob(f"{ARTIFACT_PREFIX}*"):
+                if path.is_file() and path.stem not in manifest and path.stem not in protect:
+                    path.unlink()
+                    removed += 1
+                    logger.info(f"🗑️ Artefact orphelin supprimé: {path.name}")
+
+            # Fichiers temporaires abandonnés (processus interrompu pendant l'écriture)
+            for path in self.cache_dir.glob(f".{ARTIFACT_PREFIX}*.tmp"):
+                if time.time() - path.stat().st_mtime > STALE_TMP_AGE:
+                    path.unlink()
+                    removed += 1
+
+            # LRU au-delà de la taille maximale
+            entries = sorted(
+                (self.path(k).stat().st_mtime, k) for k in manifest if k not in protect
+            )
+            total = sum(self.path(k).stat().st_size for k in manifest)
+            for _, key in entries:
+                if total <= self.max_size_bytes:
+                    break
+                path = self.path(key)
+                total -= path.stat().st_size
+                path.unlink()
+                del manifest[key]
+                removed += 1
+                logger.info(f"🗑️ Artefact évincé (taille max du cache atteinte): {path.name}")
+
+            self._write_manifest(manifest)
+
+        return removed
+
+
+# Instance globale (singleton) sur le répertoire de cache centralisé
+_cache_manager: Optional[CacheManager] = None
+
+
+def get_cache_manager() -> CacheManager:
+    """Récupère le gestionnaire du répertoire de cache centralisé"""
+    global _cache_manager
+    if _cache_manager is None:
+        _cache_manager = CacheManager()
+    return _cache_manager
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Vérification des plans d'exécution des requêtes fréquentes (PostgreSQL)
+Lance EXPLAIN sur les requêtes des endpoints (construites par le code de l'API) et
+vérifie que chacune utilise l'index attendu (database/migration_query_indexes.sql)
+Code de sortie 1 si un plan n'utilise pas son index: à lancer après une migration
+ou une modification de requête
+
+Avec VECTOR_BACKEND=pgvector, la recherche top-k de chaque modèle indexé doit
+utiliser l'index HNSW de ce modèle.
+
+Sur une base de développement presque vide, le parcours séquentiel est toujours
+le moins cher: il est désactivé pendant la vérification (SET LOCAL enable_seqscan),
+ce qui vérifie qu'un index peut servir la requête. --real-plans garde les coûts réels.
+
+Les mêmes vérifications sont lancées par pytest (tests/test_query_plans.py) quand
+DATABASE_URL pointe vers PostgreSQL; ce script reste pour un contrôle ponctuel.
+
+Usage:
+    python check_query_plans.py [--session-id N] [--real-plans] [--verbose]
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import func, select, text
+
+from database import engine
+from models import ComplianceMapping, ImportSession, Requirement
+from pagination import keyset_filter
+from session_results import session_results_statement
+
+
+def plan_indexes(plan: Dict) -> Set[str]:
+    """
+    Index utilisés par un plan EXPLAIN (FORMAT JSON), tous nœuds confondus
+
+    Args:
+        plan: Nœud du plan (clé "Plan" de la sortie EXPLAIN)
+
+    Returns:
+        Noms des index
+    """
+    indexes = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        indexes |= plan_indexes(child)
+    return indexes
+
+
+def hot_queries(session_id: int) -> List[Dict]:
+    """
+    Requêtes des endpoints et index attendus
+
+    Args:
+        session_id: Session d'import utilisée comme paramètre
+
+    Returns:
+        Liste de {name, statement, indexes}
+    """
+    return [
+        {
+            "name": "GET /api/import-sessions/{id}/results (exigences + mapping actif)",
+            "statement": session_results_statement(session_id),
+            "indexes": {"idx_requirements_session_id", "idx_mappings_active_session"}
+        },
+        {
+            "name": "GET /api/requirements?status=...&cursor=... (keyset par statut)",
+            "statement": select(Requirement)
+            .where(Requirement.analysis_status == 'pending')
+            .where(keyset_filter([Requirement.id], [0]))
+            .order_by(Requirement.id)
+            .limit(100),
+            "indexes": {"idx_requirements_status_id"}
+        },
+        {
+            "name": "GET /api/import-sessions?cursor=... (keyset par date)",
+            "statement": select(ImportSession)
+            .where(keyset_filter(
+                [ImportSession.import_date, ImportSession.id], [datetime.now(), 0], descending=True
+            ))
+            .order_by(ImportSession.import_date.desc(), ImportSession.id.desc())
+            .limit(50),
+            "indexes": {"idx_import_sessions_date_id"}
+        },
+        {
+            "name": "Import: exigence existante (original_id, source_file)",
+            "statement": select(Requirement.id)
+            .where(Requirement.original_id == 'REQ-1')
+            .where(Requirement.source_file == 'import.xlsx'),
+            "indexes": {"unique_requirement"}
+        },
+        {
+            "name": "GET /api/stats (mappings actifs par session)",
+            "statement": select(ComplianceMapping.import_session_id, func.count())
+            .where(ComplianceMapping.is_active == True)
+            .group_by(ComplianceMapping.import_session_id),
+            "indexes": {"idx_mappings_active_session"}
+        },
+    ]
+
+
+def vector_queries(conn) -> List[Dict]:
+    """
+    Recherche top-k pgvector, pour chaque modèle ayant des contrôles indexés
+    (VECTOR_BACKEND=pgvector)
+
+    Args:
+        conn: Connexion SQLAlchemy
+
+    Returns:
+        Liste de {name, statement, indexes} (vide sans la table scf_control_embeddings)
+    """
+    if conn.execute(text("SELECT to_regclass('scf_control_embeddings')")).scalar() is None:
+        return []
+
+    import numpy as np
+    from vector_store import search_sql, vector_index_name, vector_literal
+
+    models = conn.execute(text(
+        "SELECT DISTINCT ON (model_name) model_name, vector_dims(embedding) FROM scf_control_embeddings"
+    )).all()
+
+    queries = []
+    for model_name, dimension in models:
+        query = vector_literal(np.ones(dimension, dtype=np.float32))
+        queries.append({
+            "name": f"Recherche pgvector (top-k des contrôles, {model_name})",
+            "statement": search_sql(dimension).bindparams(queries=[query, query], model=model_name, top_k=5),
+            "indexes": {vector_index_name('scf_control_embeddings', model_name)}
+        })
+    return queries
+
+
+def explain(conn, statement) -> Dict:
+    """
+    Plan d'exécution d'une instruction SQLAlchemy (sans l'exécuter)
+
+    Args:
+        conn: Connexion SQLAlchemy
+        statement: Instruction SELECT
+
+    Returns:
+        Nœud racine du plan
+    """
+    compiled = statement.compile(dialect=conn.dialect)
+    result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+def check_plans(session_id: int, real_plans: bool = False, verbose: bool = False) -> List[str]:
+    """
+    Vérifie l'utilisation des index par les requêtes fréquentes
+
+    Args:
+        session_id: Session d'import utilisée comme paramètre
+        real_plans: Garder le parcours séquentiel (plans réels sur une base remplie)
+        verbose: Afficher les plans complets
+
+    Returns:
+        Noms des requêtes dont le plan n'utilise pas les index attendus
+    """
+    failures = []
+    # Transaction implicite, annulée à la fermeture: SET LOCAL ne dure que la vérification
+    with engine.connect() as conn:
+        if not real_plans:
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for query in hot_queries(session_id) + vector_queries(conn):
+            plan = explain(conn, query["statement"])
+            missing = query["indexes"] - plan_indexes(plan)
+
+            if missing:
+                failures.append(query["name"])
+                logger.error(f"❌ {query['name']}: index non utilisé(s) {sorted(missing)}")
+            else:
+                logger.info(f"✅ {query['name']}: {sorted(query['indexes'])}")
+
+            if verbose or missing:
+                logger.info(json.dumps(plan, indent=2))
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vérifie l'utilisation des index par les requêtes fréquentes")
+    parser.add_argument('--session-id', type=int, default=1, help="Session d'import utilisée comme paramètre")
+    parser.add_argument('--real-plans', action='store_true',
+                        help="Ne pas désactiver le parcours séquentiel (base de taille réelle)")
+    parser.add_argument('--verbose', action='store_true', help="Afficher les plans complets")
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != 'postgresql':
+        logger.error(f"❌ PostgreSQL requis (DATABASE_URL pointe vers {engine.dialect.name})")
+        return 2
+
+    try:
+        failures = check_plans(args.session_id, args.real_plans, args.verbose)
+    except Exception as e:
+        logger.error(f"❌ Échec de la vérification: {e}")
+        return 1
+
+    if failures:
+        logger.error(f"❌ {len(failures)} requête(s) sans index: exécuter psql -f database/migration_query_indexes.sql (hors transaction)")
+        return 1
+
+    logger.info("🎉 Toutes les requêtes fréquentes utilisent leurs index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Index multi-vecteurs pour les textes dépassant la longueur maximale du modèle
+Les textes sont découpés en segments (phrases regroupées) stockés dans une matrice plate
+avec l'identifiant de leur propriétaire. Le score d'un propriétaire est le maximum
+des similarités de ses segments (agrégation vectorisée, une seule multiplication matricielle)
+"""
+
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_pipeline import count_tokens, encode_texts
+
+
+# Découpage en phrases (ponctuation forte ou retour à la ligne)
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?;:])\s+|\s*\n+\s*')
+
+
+def _split_long_sentence(sentence: str, n_tokens: int, budget: int) -> List[str]:
+    """Découpe une phrase trop longue en fenêtres de mots de taille proportionnelle au budget"""
+    words = sentence.split()
+    if not words:
+        return [sentence]
+    words_per_piece = max(1, int(len(words) * budget / max(n_tokens, 1)))
+    return [' '.join(words[i:i + words_per_piece]) for i in range(0, len(words), words_per_piece)]
+
+
+def chunk_texts(
+    model,
+    texts: List[str],
+    prefixes: Optional[List[str]] = None
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Découpe des textes en segments tenant dans la fenêtre du modèle
+
+    Un texte qui tient dans max_seq_length reste un seul segment (comportement inchangé).
+    Sinon ses phrases sont regroupées de façon gloutonne jusqu'au budget de tokens.
+
+    Args:
+        model: Modèle Sentence-Transformers (tokenizer + max_seq_length)
+        texts: Textes à découper
+        prefixes: Préfixe optionnel répété en tête de chaque segment (ex: ID + titre du contrôle)
+
+    Returns:
+        Tuple (segments, owners) où owners[i] est l'indice du texte d'origine du segment i.
+        Les segments d'un même texte sont contigus et chaque texte a au moins un segment.
+    """
+    max_len = getattr(model, 'max_seq_length', None) or 512
+    prefixes = prefixes or [''] * len(texts)
+
+    full_texts = [f"{p} {t}".strip() for p, t in zip(prefixes, texts)]
+    full_lengths = count_tokens(model, full_texts, truncate=False)
+
+    chunks: List[str] = []
+    owners: List[int] = []
+
+    overflowing = [i for i, n in enumerate(full_lengths) if n > max_len]
+    overflow_set = set(overflowing)
+
+    # Mesurer en une passe les phrases et préfixes des textes trop longs
+    sentences_by_text = {i: [s for s in _SENTENCE_SPLIT.split(texts[i]) if s.strip()] for i in overflowing}
+    flat_sentences = [s for i in overflowing for s in sentences_by_text[i]]
+    sentence_lengths = iter(count_tokens(model, flat_sentences, truncate=False) if flat_sentences else [])
+    prefix_lengths = dict(zip(
+        overflowing,
+        count_tokens(model, [prefixes[i] for i in overflowing], truncate=False) if overflowing else []
+    ))
+
+    for i, full_text in enumerate(full_texts):
+        if i not in overflow_set:
+            chunks.append(full_text)
+            owners.append(i)
+            continue
+
+        prefix = prefixes[i]
+        # Tokens spéciaux comptés une seule fois par segment
+        budget = max(16, max_len - int(prefix_lengths[i]))
+
+        current: List[str] = []
+        current_tokens = 2
+        text_chunks: List[str] = []
+        for sentence in sentences_by_text[i]:
+            n_tokens = int(next(sentence_lengths)) - 2
+            pieces = [sentence] if n_tokens <= budget - 2 else _split_long_sentence(sentence, n_tokens, budget - 2)
+            for piece in pieces:
+                piece_tokens = min(n_tokens, budget - 2) if len(pieces) > 1 else n_tokens
+                if current and current_tokens + piece_tokens > budget:
+                    text_chunks.append(' '.join(current))
+                    current, current_tokens = [], 2
+                current.append(piece)
+                current_tokens += piece_tokens
+        if current:
+            text_chunks.append(' '.join(current))
+
+        for chunk in text_chunks or ['']:
+            chunks.append(f"{prefix} {chunk}".strip())
+            owners.append(i)
+
+    return chunks, np.asarray(owners, dtype=np.int32)
+
+
+def owner_offsets(owners: np.ndarray) -> np.ndarray:
+    """
+    Début du bloc contigu de chaque propriétaire (indices pour np.maximum.reduceat)
+
+    Args:
+        owners: Propriétaire de chaque segment (blocs contigus, ex: sortie de chunk_texts)
+
+    Returns:
+        Indice du premier segment de chaque propriétaire
+    """
+    owners = np.asarray(owners)
+    return np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+
+
+class ChunkIndex:
+    """
+    Matrice plate d'embeddings de segments avec leurs propriétaires
+    Score d'un propriétaire = max-sim de ses segments contre les segments de la requête
+    """
+
+    def __init__(self, embeddings: np.ndarray, owners: np.ndarray):
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.embeddings = (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+        self.owners = np.asarray(owners, dtype=np.int32)
+        self.offsets = owner_offsets(self.owners)
+
+    @property
+    def num_owners(self) -> int:
+        """Nombre de textes indexés"""
+        return len(self.offsets)
+
+    @property
+    def num_chunks(self) -> int:
+        """Nombre de segments indexés"""
+        return len(self.owners)
+
+    @classmethod
+    def build(
+        cls,
+        model,
+        texts: List[str],
+        prefixes: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> 'ChunkIndex':
+        """
+        Découpe et encode des textes pour construire l'index
+
+        Args:
+            model: Modèle Sentence-Transformers
+            texts: Textes à indexer
+            prefixes: Préfixes répétés sur chaque segment (optionnel)
+            progress_callback: Appelé avec (segments encodés, total) après chaque batch
+        """
+        chunks, owners = chunk_texts(model, texts, prefixes)
+        embeddings = encode_texts(model, chunks, show_progress=True, progress_callback=progress_callback)
+        return cls(embeddings, owners)
+
+    def encode_query(self, model, text: str) -> np.ndarray:
+        """
+        Encode une requête, découpée en segments si elle dépasse la fenêtre du modèle
+
+        Returns:
+            Matrice (n_segments, dim)
+        """
+        chunks, _ = chunk_texts(model, [text])
+        return encode_texts(model, chunks)
+
+    def score(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Score chaque propriétaire par max-sim
+
+        Args:
+            query_embeddings: Embeddings des segments de la requête (m, dim) ou (dim,)
+
+        Returns:
+            Scores cosinus (num_owners,)
+        """
+        if query_embeddings.ndim == 1:
+            query_embeddings = query_embeddings.reshape(1, -1)
+        norms = np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+        queries = (query_embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+
+        # (m, n_chunks) -> meilleur segment de requête par segment indexé
+        chunk_scores = (queries @ self.embeddings.T).max(axis=0)
+        # Meilleur segment par propriétaire
+        return np.maximum.reduceat(chunk_scores, self.offsets)
+
+    def score_rows(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Score chaque propriétaire pour chaque requête d'un lot (une ligne par requête)
+
+        Args:
+            query_embeddings: Un embedding par requête (n, dim)
+
+        Returns:
+            Scores cosinus max-sim (n, num_owners)
+        """
+        norms = np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+        queries = (query_embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+
+        # (n, n_chunks) -> meilleur segment par propriétaire
+        return np.maximum.reduceat(queries @ self.embeddings.T, self.offsets, axis=1)
+
+    def score_queries(self, query_embeddings: np.ndarray, query_owners: np.ndarray) -> np.ndarray:
+        """
+        Score chaque propriétaire pour un lot de requêtes découpées en segments
+        (max-sim des deux côtés: meilleure paire segment de requête × segment indexé)
+
+        Args:
+            query_embeddings: Embeddings des segments de toutes les requêtes (m, dim)
+            query_owners: Requête de chaque segment (blocs contigus, sortie de chunk_texts)
+
+        Returns:
+            Scores cosinus max-sim (n_requêtes, num_owners)
+        """
+        return np.maximum.reduceat(self.score_rows(query_embeddings), owner_offsets(query_owners), axis=0)
@@ -1,13 +1,22 @@
 """
 Configuration de la base de données PostgreSQL avec SQLAlchemy
+Deux moteurs sur la même base:
+- synchrone (psycopg2): scripts, imports et traitements exécutés dans un pool de threads
+- asynchrone (asyncpg): endpoints légers, sans bloquer la boucle d'événements
 """
 
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import os
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
 # Charger les variables d'environnement
 load_dotenv()
 
@@ -32,6 +41,61 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base pour les modèles
 Base = declarative_base()
 
+# Moteur asynchrone (créé au premier usage: les scripts n'en ont pas besoin)
+_async_engine: Optional["AsyncEngine"] = None
+_async_session_factory: Optional["async_sessionmaker"] = None
+
+
+def _async_url(url: str):
+    """
+    Convertit l'URL PostgreSQL pour asyncpg
+
+    asyncpg n'accepte pas le paramètre libpq `sslmode`: il est retiré de l'URL et
+    traduit en argument de connexion `ssl`.
+
+    Args:
+        url: URL de DATABASE_URL (postgres://, postgresql://, postgresql+psycopg2://)
+
+    Returns:
+        Tuple (URL postgresql+asyncpg, arguments de connexion)
+    """
+    parts = urlsplit(url)
+    scheme = 'postgresql+asyncpg' if parts.scheme.split('+')[0] in ('postgres', 'postgresql') else parts.scheme
+
+    query = parse_qsl(parts.query)
+    sslmode = next((value for key, value in query if key == 'sslmode'), None)
+    query = [(key, value) for key, value in query if key != 'sslmode']
+    connect_args = {'ssl': sslmode} if sslmode and sslmode not in ('disable', 'allow', 'prefer') else {}
+
+    return urlunsplit((scheme, parts.netloc, parts.path, urlencode(query), parts.fragment)), connect_args
+
+
+def get_async_engine() -> "AsyncEngine":
+    """
+    Moteur SQLAlchemy asynchrone (asyncpg), même pool de configuration que le moteur synchrone
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url, connect_args = _async_url(DATABASE_URL)
+        _async_engine = create_async_engine(
+            url,
+            pool_size=10,
+            max_overflow=20,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+            echo=False
+        )
+        # expire_on_commit=False: les objets restent lisibles après commit (pas de lazy load en async)
+        _async_session_factory = async_sessionmaker(
+            _async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_engine
+
+
 # Dependency pour FastAPI
 def get_db():
     """
@@ -45,6 +109,16 @@ def get_db():
         db.close()
 
 
+async def get_async_db() -> AsyncIterator["AsyncSession"]:
+    """
+    Dependency pour obtenir une session asynchrone
+    Utilisation: db: AsyncSession = Depends(get_async_db)
+    """
+    get_async_engine()
+    async with _async_session_factory() as db:
+        yield db
+
+
 def init_db():
     """
     Initialiser la base de données (créer les tables)
@@ -0,0 +1,101 @@
+"""
+Conversion vectorisée DataFrame → enregistrements pour les imports Excel
+Remplace df.iterrows(): les colonnes sont mappées, converties en texte et leurs
+valeurs manquantes remplacées par None colonne par colonne (pandas/NumPy), puis
+assemblées en dictionnaires prêts pour une insertion en masse
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+
+def detect_requirement_columns(columns: Iterable) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Détecte les colonnes d'une feuille d'exigences (correspondance souple sur les en-têtes)
+
+    Args:
+        columns: En-têtes de la feuille
+
+    Returns:
+        Tuple (colonne identifiant, colonne exigence, colonne point de vérification), None si absente
+    """
+    columns = [col for col in columns if isinstance(col, str)]
+    id_col = next((col for col in columns if any(x in col.lower() for x in ['id', 'n°', 'numero'])), None)
+    req_col = next((col for col in columns if any(x in col.lower() for x in ['exigence', 'requirement', 'control', 'titre'])), None)
+    verif_col = next((col for col in columns if any(x in col.lower() for x in ['verification', 'point', 'description'])), None)
+    return id_col, req_col, verif_col
+
+
+def text_column(series: pd.Series, strip: bool = False, integral: bool = False) -> pd.Series:
+    """
+    Convertit une colonne en texte (équivalent vectorisé de `str(v) if pd.notna(v) else None`)
+
+    Args:
+        series: Colonne source
+        strip: Supprimer les espaces en début et fin
+        integral: Écrire les nombres entiers sans décimale ('4' et non '4.0', que la
+            cellule soit lue en float par calamine ou par pandas à cause d'un vide)
+
+    Returns:
+        Série de dtype object (str ou None)
+    """
+    if integral and series.dtype.kind in 'fO':
+        series = pd.Series(
+            [int(v) if isinstance(v, float) and v.is_integer() else v for v in series],
+            index=series.index,
+            dtype=object
+        )
+    missing = series.isna()
+    # astype(str) formate les dates sans l'heure, contrairement à str(Timestamp)
+    text = series.map(str) if is_datetime64_any_dtype(series) else series.astype(str)
+    if strip:
+        text = text.str.strip()
+    return text.astype(object).where(~missing, None)
+
+
+def extract_columns(
+    df: pd.DataFrame,
+    fields: Dict[str, Optional[str]],
+    strip: Iterable[str] = (),
+    integral: Iterable[str] = ()
+) -> pd.DataFrame:
+    """
+    Construit un DataFrame texte avec les champs cibles à partir des colonnes sources
+
+    Args:
+        df: Feuille lue par pandas
+        fields: Champ cible → colonne source (None ou absente = champ entièrement None)
+        strip: Champs dont les espaces en début et fin sont supprimés
+        integral: Champs dont les nombres entiers sont écrits sans décimale (identifiants)
+
+    Returns:
+        DataFrame indexé comme `df`, une colonne object par champ cible
+    """
+    strip = set(strip)
+    integral = set(integral)
+    columns = {}
+    for field, source in fields.items():
+        if source is not None and source in df.columns:
+            columns[field] = text_column(df[source], strip=field in strip, integral=field in integral)
+        else:
+            columns[field] = pd.Series([None] * len(df), index=df.index, dtype=object)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def to_records(frame: pd.DataFrame, **constants) -> List[Dict]:
+    """
+    Assemble les lignes d'un DataFrame en dictionnaires (sans construire de Series par ligne)
+
+    Args:
+        frame: Colonnes déjà converties (voir extract_columns)
+        **constants: Valeurs identiques pour toutes les lignes (ex: source_file)
+
+    Returns:
+        Liste de dictionnaires colonne → valeur
+    """
+    keys = list(frame.columns) + list(constants)
+    values = [frame[col].tolist() for col in frame.columns]
+    constant_values = tuple(constants.values())
+    return [dict(zip(keys, row + constant_values)) for row in zip(*values)]
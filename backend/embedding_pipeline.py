@@ -0,0 +1,166 @@
+"""
+Pipeline d'encodage partagé pour les modèles Sentence-Transformers
+Déduplique les textes, les trie par longueur en tokens et adapte la taille
+des batchs à un budget de tokens (moins de padding, pas de ré-encodage des doublons)
+"""
+
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+
+# Budget de tokens par batch (longueur max du batch x nombre de textes)
+DEFAULT_TOKEN_BUDGET = int(os.getenv('ML_TOKEN_BUDGET', '8192'))
+
+# Plafond du nombre de textes par batch (textes très courts)
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv('ML_MAX_BATCH_SIZE', '256'))
+
+
+def count_tokens(model, texts: List[str], truncate: bool = True) -> np.ndarray:
+    """
+    Compte les tokens de chaque texte avec le tokenizer du modèle
+
+    Args:
+        model: Modèle Sentence-Transformers
+        texts: Textes à mesurer
+        truncate: Borner les longueurs à max_seq_length (False = longueur réelle)
+
+    Returns:
+        Longueurs en tokens (tokens spéciaux inclus)
+    """
+    max_len = getattr(model, 'max_seq_length', None) or 512
+    tokenizer = getattr(model, 'tokenizer', None)
+
+    if tokenizer is not None:
+        try:
+            encoded = tokenizer(
+                texts,
+                add_special_tokens=True,
+                truncation=truncate,
+                max_length=max_len if truncate else None,
+                return_attention_mask=False,
+                return_token_type_ids=False
+            )
+            return np.fromiter((len(ids) for ids in encoded['input_ids']), dtype=np.int32, count=len(texts))
+        except Exception as e:
+            logger.debug(f"Tokenizer indisponible pour le comptage, approximation par mots: {e}")
+
+    # Approximation: ~1.3 token par mot pour les langues latines
+    approx = np.fromiter((int(len(t.split()) * 1.3) + 2 for t in texts), dtype=np.int32, count=len(texts))
+    return np.minimum(approx, max_len) if truncate else approx
+
+
+def plan_batches(
+    lengths: np.ndarray,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+) -> List[np.ndarray]:
+    """
+    Regroupe les textes par longueur et découpe en batchs respectant le budget de tokens
+
+    Args:
+        lengths: Longueur en tokens de chaque texte
+        token_budget: Nombre maximal de tokens (paddés) par batch
+        max_batch_size: Nombre maximal de textes par batch
+
+    Returns:
+        Liste de tableaux d'indices (un par batch), triés par longueur croissante
+    """
+    order = np.argsort(lengths, kind='stable')
+    batches: List[np.ndarray] = []
+
+    start = 0
+    n = len(order)
+    while start < n:
+        end = start + 1
+        # Les longueurs sont croissantes: le dernier élément fixe la longueur paddée
+        while (
+            end < n
+            and end - start < max_batch_size
+            and (end - start + 1) * int(lengths[order[end]]) <= token_budget
+        ):
+            end += 1
+        batches.append(order[start:end])
+        start = end
+
+    return batches
+
+
+def encode_texts(
+    model,
+    texts: List[str],
+    token_budget: Optional[int] = None,
+    max_batch_size: Optional[int] = None,
+    normalize_embeddings: bool = False,
+    show_progress: bool = False,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> np.ndarray:
+    """
+    Encode des textes via le pipeline partagé (déduplication + buckets de longueur)
+
+    Args:
+        model: Modèle Sentence-Transformers
+        texts: Textes à encoder (l'ordre est conservé dans le résultat)
+        token_budget: Budget de tokens par batch (défaut: ML_TOKEN_BUDGET)
+        max_batch_size: Taille maximale d'un batch (défaut: ML_MAX_BATCH_SIZE)
+        normalize_embeddings: Normaliser les vecteurs (norme L2 = 1)
+        show_progress: Logger l'avancement batch par batch
+        progress_callback: Appelé avec (textes uniques encodés, total) après chaque batch
+
+    Returns:
+        Matrice numpy (n_texts, dim) alignée sur `texts`
+    """
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    max_batch_size = max_batch_size or DEFAULT_MAX_BATCH_SIZE
+
+    if not texts:
+        dim = model.get_sentence_embedding_dimension()
+        return np.zeros((0, dim), dtype=np.float32)
+
+    # 1. Déduplication (en conservant la première occurrence)
+    positions: Dict[str, int] = {}
+    unique_texts: List[str] = []
+    inverse = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        pos = positions.get(text)
+        if pos is None:
+            pos = len(unique_texts)
+            positions[text] = pos
+            unique_texts.append(text)
+        inverse[i] = pos
+
+    # 2. Tri par longueur et découpage adapté au budget de tokens
+    lengths = count_tokens(model, unique_texts)
+    batches = plan_batches(lengths, token_budget, max_batch_size)
+
+    logger.info(
+        f"🧮 Encodage de {len(texts)} textes ({len(unique_texts)} uniques) "
+        f"en {len(batches)} batchs (budget: {token_budget} tokens)"
+    )
+
+    # 3. Encodage batch par batch
+    unique_embeddings: Optional[np.ndarray] = None
+    done = 0
+    for batch_num, batch in enumerate(batches, 1):
+        batch_embeddings = model.encode(
+            [unique_texts[i] for i in batch],
+            batch_size=len(batch),
+            convert_to_numpy=True,
+            normalize_embeddings=normalize_embeddings,
+            show_progress_bar=False
+        )
+        if unique_embeddings is None:
+            unique_embeddings = np.empty((len(unique_texts), batch_embeddings.shape[1]), dtype=batch_embeddings.dtype)
+        unique_embeddings[batch] = batch_embeddings
+        done += len(batch)
+
+        if progress_callback is not None:
+            progress_callback(done, len(unique_texts))
+
+        if show_progress and (batch_num % 10 == 0 or batch_num == len(batches)):
+            logger.info(f"   ⏳ Batch {batch_num}/{len(batches)}")
+
+    # 4. Restitution de l'ordre d'origine (et des doublons)
+    return unique_embeddings[inverse]
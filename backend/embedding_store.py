@@ -0,0 +1,143 @@
+"""
+Embeddings des exigences persistés en base (table requirement_embeddings)
+Clé: SHA-256 du texte normalisé + nom du modèle. Seuls les textes jamais vus par le
+modèle sont encodés: une exigence inchangée d'un fichier réimporté ou un
+/api/analyze/batch répété ne repasse pas par le modèle
+Une base indisponible ne bloque pas l'analyse: les textes sont alors tous encodés
+"""
+
+import os
+import unicodedata
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import select
+
+from bulk_operations import BULK_INSERT_CHUNK_SIZE, insert_requirement_embeddings
+from cache_manager import content_hash
+from database import SessionLocal
+from models import RequirementEmbedding
+
+
+# Réutilisation des embeddings d'exigences déjà calculés
+REQUIREMENT_EMBEDDINGS_ENABLED = os.getenv('REQUIREMENT_EMBEDDINGS_ENABLED', 'true').lower() == 'true'
+
+
+def normalize_text(text: str) -> str:
+    """
+    Forme normalisée d'un texte d'exigence (Unicode NFC, espaces consécutifs réduits)
+    C'est ce texte qui est encodé et dont l'empreinte sert de clé
+
+    Args:
+        text: Texte brut
+
+    Returns:
+        Texte normalisé
+    """
+    return ' '.join(unicodedata.normalize('NFC', text or '').split())
+
+
+def load_embeddings(hashes: Sequence[str], model_name: str) -> Dict[str, np.ndarray]:
+    """
+    Charge les embeddings connus pour des empreintes de texte
+
+    Args:
+        hashes: Empreintes (SHA-256 des textes normalisés)
+        model_name: Modèle qui a produit les embeddings
+
+    Returns:
+        Empreinte → vecteur float32 (empreintes inconnues absentes)
+    """
+    unique = list(dict.fromkeys(hashes))
+    known: Dict[str, np.ndarray] = {}
+    db = SessionLocal()
+    try:
+        for start in range(0, len(unique), BULK_INSERT_CHUNK_SIZE):
+            rows = db.execute(
+                select(RequirementEmbedding.text_hash, RequirementEmbedding.embedding)
+                .where(RequirementEmbedding.model_name == model_name)
+                .where(RequirementEmbedding.text_hash.in_(unique[start:start + BULK_INSERT_CHUNK_SIZE]))
+            )
+            for text_hash, embedding in rows:
+                known[text_hash] = np.frombuffer(embedding, dtype=np.float32)
+    finally:
+        db.close()
+    return known
+
+
+def save_embeddings(model_name: str, embeddings: Dict[str, np.ndarray]) -> None:
+    """
+    Enregistre des embeddings nouvellement calculés
+
+    Args:
+        model_name: Modèle qui a produit les embeddings
+        embeddings: Empreinte → vecteur
+    """
+    rows = []
+    for text_hash, embedding in embeddings.items():
+        vector = np.asarray(embedding, dtype=np.float32)
+        rows.append({
+            'text_hash': text_hash,
+            'model_name': model_name,
+            'dimension': vector.shape[0],
+            'embedding': vector.tobytes()
+        })
+
+    db = SessionLocal()
+    try:
+        insert_requirement_embeddings(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def encode_with_store(
+    model_name: str,
+    texts: List[str],
+    encode: Callable[[List[str]], np.ndarray]
+) -> np.ndarray:
+    """
+    Encode des textes d'exigences en réutilisant les embeddings persistés
+
+    Args:
+        model_name: Modèle utilisé (fait partie de la clé)
+        texts: Textes bruts des exigences
+        encode: Encode une liste de textes (ex: MLMappingService.encode_batch)
+
+    Returns:
+        Matrice (n_texts, dim) alignée sur texts
+    """
+    normalized = [normalize_text(text) for text in texts]
+    if not texts or not REQUIREMENT_EMBEDDINGS_ENABLED:
+        return encode(normalized)
+
+    hashes = [content_hash([text]) for text in normalized]
+    try:
+        known = load_embeddings(hashes, model_name)
+    except Exception as e:
+        logger.warning(f"⚠️ Embeddings d'exigences indisponibles, encodage complet: {e}")
+        known = {}
+
+    # Textes jamais vus par ce modèle (un seul encodage par texte distinct)
+    missing: Dict[str, str] = {}
+    for text_hash, text in zip(hashes, normalized):
+        if text_hash not in known:
+            missing.setdefault(text_hash, text)
+
+    if missing:
+        fresh = dict(zip(missing, encode(list(missing.values()))))
+        try:
+            save_embeddings(model_name, fresh)
+        except Exception as e:
+            logger.warning(f"⚠️ Embeddings d'exigences non enregistrés: {e}")
+        known.update(fresh)
+
+    logger.info(
+        f"♻️ Embeddings d'exigences: {len(set(hashes)) - len(missing)} réutilisés, "
+        f"{len(missing)} encodés ({model_name})"
+    )
+    return np.vstack([known[text_hash] for text_hash in hashes])
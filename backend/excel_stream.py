@@ -0,0 +1,231 @@
+"""
+Lecture en flux des classeurs Excel (mémoire constante quelle que soit la taille)
+Les feuilles sont lues ligne à ligne (calamine si installé, sinon openpyxl en mode
+read-only) et restituées par tranches de DataFrames de taille fixe
+Les anciens fichiers .xls (format binaire) sont lus par pandas/xlrd
+"""
+
+import os
+import posixpath
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+from loguru import logger
+
+try:
+    from python_calamine import CalamineWorkbook
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+
+# Nombre de lignes par tranche (lecture, conversion et insertion)
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '5000'))
+
+PathLike = Union[str, Path]
+
+
+def _is_legacy_xls(path: PathLike) -> bool:
+    return str(path).lower().endswith('.xls')
+
+
+_OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _xlsx_sheet_names(path: PathLike) -> List[str]:
+    """
+    Noms des feuilles d'un .xlsx lus dans la seule partie workbook.xml de l'archive
+    (sans charger les chaînes partagées ni les styles: le classeur n'est ouvert qu'à l'import)
+    """
+    with zipfile.ZipFile(path) as archive:
+        # Partie principale désignée par _rels/.rels (xl/workbook.xml en pratique)
+        workbook_part = 'xl/workbook.xml'
+        if '_rels/.rels' in archive.namelist():
+            for rel in ElementTree.fromstring(archive.read('_rels/.rels')):
+                if rel.get('Type') == _OFFICE_DOCUMENT_REL:
+                    workbook_part = posixpath.normpath(rel.get('Target', workbook_part).lstrip('/'))
+                    break
+
+        root = ElementTree.fromstring(archive.read(workbook_part))
+
+    if _local_name(root.tag) != 'workbook':
+        raise ValueError(f"Partie principale inattendue: {root.tag}")
+    return [
+        element.get('name')
+        for sheets in root if _local_name(sheets.tag) == 'sheets'
+        for element in sheets if _local_name(element.tag) == 'sheet'
+    ]
+
+
+def list_sheet_names(path: PathLike) -> List[str]:
+    """
+    Liste les feuilles d'un classeur sans lire leurs données (contrôle d'intégrité)
+    Pour un .xlsx, seul workbook.xml est lu: la validation n'ouvre pas le classeur une
+    seconde fois avant l'import
+
+    Args:
+        path: Chemin du classeur
+
+    Returns:
+        Noms des feuilles dans l'ordre du classeur
+    """
+    if _is_legacy_xls(path):
+        with pd.ExcelFile(path) as excel_file:
+            return list(excel_file.sheet_names)
+
+    return _xlsx_sheet_names(path)
+
+
+def _header_names(values: Sequence) -> List:
+    """En-têtes à la manière de pandas: 'Unnamed: i' si vide, suffixe '.n' si dupliqué"""
+    names: List = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or value == '' else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _iter_sheet_rows(
+    path: PathLike,
+    sheet_names: Optional[Sequence[str]] = None
+) -> Iterator[Tuple[str, Iterable[Sequence]]]:
+    """Itère sur (feuille, lignes) sans charger le classeur en mémoire"""
+    if CALAMINE_AVAILABLE:
+        workbook = CalamineWorkbook.from_path(str(path))
+        for sheet_name in workbook.sheet_names:
+            if sheet_names is not None and sheet_name not in sheet_names:
+                continue
+            sheet = workbook.get_sheet_by_name(sheet_name)
+            # calamine renvoie '' pour les cellules vides
+            yield sheet_name, ([None if v == '' else v for v in row] for row in sheet.iter_rows())
+        return
+
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            if sheet_names is not None and ws.title not in sheet_names:
+                continue
+            yield ws.title, ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _chunk_frames(
+    rows: Iterable[Sequence],
+    chunk_size: int,
+    skip_blank: bool = False
+) -> Iterator[pd.DataFrame]:
+    """
+    Découpe les lignes d'une feuille (en-tête en première ligne) en DataFrames
+
+    Les lignes et l'index reproduisent pd.read_excel (numéro de ligne de données): les
+    lignes entièrement vides sont conservées, sauf en fin de feuille (toutes ignorées avec
+    skip_blank). Les colonnes restent en dtype object: une valeur garde le même type
+    Python d'une tranche à l'autre.
+    """
+    rows = iter(rows)
+    header_row = next(rows, None)
+    if header_row is None:
+        return
+    header = _header_names(header_row)
+    width = len(header)
+
+    empty_row = (None,) * width
+    buffer: List[Sequence] = []
+    index: List[int] = []
+    yielded = False
+    # Début de la suite de lignes vides en cours: émises seulement si une ligne non vide suit
+    blank_start: Optional[int] = None
+    for position, row in enumerate(rows):
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        if all(v is None for v in row):
+            if blank_start is None and not skip_blank:
+                blank_start = position
+            continue
+
+        pending = range(blank_start if blank_start is not None else position, position + 1)
+        blank_start = None
+        for pending_position in pending:
+            buffer.append(row if pending_position == position else empty_row)
+            index.append(pending_position)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=header, index=index, dtype=object)
+                buffer, index = [], []
+                yielded = True
+
+    if buffer or not yielded:
+        yield pd.DataFrame(buffer, columns=header, index=index, dtype=object)
+
+
+def iter_sheet_chunks(
+    path: PathLike,
+    chunk_size: Optional[int] = None,
+    sheet_names: Optional[Sequence[str]] = None
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Lit un classeur feuille par feuille, par tranches de `chunk_size` lignes
+
+    Chaque feuille produit au moins une tranche (éventuellement vide) portant ses en-têtes.
+
+    Args:
+        path: Chemin du classeur
+        chunk_size: Lignes par tranche (défaut: IMPORT_CHUNK_SIZE)
+        sheet_names: Feuilles à lire (défaut: toutes)
+
+    Yields:
+        Tuples (nom de la feuille, DataFrame de la tranche)
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+
+    if _is_legacy_xls(path):
+        # Format binaire: pas de lecteur en flux, lecture complète par pandas
+        sheets = pd.read_excel(path, sheet_name=list(sheet_names) if sheet_names is not None else None)
+        for sheet_name, df in sheets.items():
+            for start in range(0, max(len(df), 1), chunk_size):
+                yield sheet_name, df.iloc[start:start + chunk_size]
+        return
+
+    logger.info(f"📖 Lecture en flux ({'calamine' if CALAMINE_AVAILABLE else 'openpyxl read-only'})")
+    for sheet_name, rows in _iter_sheet_rows(path, sheet_names):
+        for frame in _chunk_frames(rows, chunk_size):
+            yield sheet_name, frame
+
+
+def read_sheet_heads(path: PathLike, max_rows: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Lit les en-têtes et les `max_rows` premières lignes non vides de chaque feuille
+    (lignes entièrement vides ignorées, index = numéro de ligne de données comme à l'import)
+    La lecture de chaque feuille s'arrête dès que l'échantillon est complet
+
+    Args:
+        path: Chemin du classeur
+        max_rows: Nombre maximum de lignes par feuille
+
+    Yields:
+        Tuples (nom de la feuille, DataFrame de l'échantillon)
+    """
+    if _is_legacy_xls(path):
+        # Format binaire: classeur lu en entier par pandas de toute façon
+        for sheet_name, df in pd.read_excel(path, sheet_name=None).items():
+            yield sheet_name, df.dropna(how='all').head(max_rows)
+        return
+
+    for sheet_name, rows in _iter_sheet_rows(path):
+        # _chunk_frames est paresseux: seule la première tranche est lue
+        frame = next(_chunk_frames(rows, max_rows, skip_blank=True), None)
+        if frame is not None:
+            yield sheet_name, frame
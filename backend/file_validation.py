@@ -1,17 +1,28 @@
 """
 Module de validation sécurisée des fichiers uploadés
 Protège contre: uploads malveillants, DoS, exploits de format de fichier
+Les uploads sont écrits sur disque (fichier temporaire) au fil de la réception:
+la mémoire utilisée ne dépend pas de la taille du fichier
 """
 
-import io
-from typing import Tuple
+import asyncio
+import os
+import tempfile
+import zipfile
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
 from fastapi import UploadFile, HTTPException
 from loguru import logger
 import magic  # python-magic pour détection du type MIME réel
 
+from excel_stream import list_sheet_names
+
 
 # Configuration de sécurité
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+MAX_FILE_SIZE = int(os.getenv('MAX_UPLOAD_SIZE_MB', '500')) * 1024 * 1024  # 500 MB par défaut
 CHUNK_SIZE = 1024 * 1024  # 1 MB chunks pour lecture progressive
 
 # Types MIME autorisés pour Excel
@@ -24,13 +35,36 @@ ALLOWED_MIME_TYPES = {
 # Extensions autorisées
 ALLOWED_EXTENSIONS = {'.xlsx', '.xls'}
 
+# Archives ZIP de classeurs (import en masse): limites contre les bombes ZIP
+ZIP_EXTENSION = '.zip'
+MAX_ZIP_MEMBERS = int(os.getenv('MAX_ZIP_MEMBERS', '200'))
+MAX_ZIP_UNCOMPRESSED_SIZE = int(os.getenv('MAX_ZIP_UNCOMPRESSED_MB', '2048')) * 1024 * 1024
+
 
 class FileValidationError(Exception):
     """Exception levée lors de la validation de fichier"""
     pass
 
 
-async def validate_excel_file(file: UploadFile) -> Tuple[bytes, str]:
+@dataclass
+class ExcelUpload:
+    """Classeur uploadé et validé, stocké dans un fichier temporaire"""
+    path: Path
+    filename: str
+    sheet_names: List[str]
+
+    def cleanup(self) -> None:
+        """Supprime le fichier temporaire"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+async def validate_excel_file(
+    file: UploadFile,
+    executor: Optional[Executor] = None
+) -> ExcelUpload:
     """
     Valide un fichier Excel uploadé de manière sécurisée
 
@@ -40,11 +74,90 @@ async def validate_excel_file(file: UploadFile) -> Tuple[bytes, str]:
     3. Type MIME réel (magic number)
     4. Intégrité du format
 
+    Les étapes 3 et 4 s'exécutent hors de la boucle d'événements. L'appelant doit
+    appeler `cleanup()` sur le résultat une fois l'import terminé.
+
     Args:
         file: Fichier uploadé via FastAPI
+        executor: Pool de threads pour la validation (défaut: pool de la boucle)
 
     Returns:
-        Tuple (contenu_fichier, nom_fichier)
+        Classeur validé (fichier temporaire, nom, feuilles)
+
+    Raises:
+        HTTPException: Si la validation échoue
+    """
+    path = await spool_upload(file)
+
+    try:
+        loop = asyncio.get_running_loop()
+        sheet_names = await loop.run_in_executor(executor, check_workbook, path)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"✅ Validation réussie: {file.filename}")
+    return ExcelUpload(path=path, filename=file.filename, sheet_names=sheet_names)
+
+
+async def validate_excel_files(
+    files: List[UploadFile],
+    executor: Optional[Executor] = None
+) -> List[ExcelUpload]:
+    """
+    Valide plusieurs fichiers uploadés (classeurs Excel ou archives ZIP de classeurs)
+
+    Chaque archive est décompressée, et chaque classeur qu'elle contient est validé comme
+    un upload direct. En cas d'erreur, tous les fichiers temporaires déjà créés sont supprimés.
+
+    Args:
+        files: Fichiers uploadés via FastAPI
+        executor: Pool de threads pour la validation (défaut: pool de la boucle)
+
+    Returns:
+        Classeurs validés, dans l'ordre des fichiers et des membres d'archive
+
+    Raises:
+        HTTPException: Si la validation d'un fichier échoue
+    """
+    uploads: List[ExcelUpload] = []
+    loop = asyncio.get_running_loop()
+
+    try:
+        for file in files:
+            if _file_extension(file.filename) != ZIP_EXTENSION:
+                uploads.append(await validate_excel_file(file, executor))
+                continue
+
+            path = await spool_upload(file, ALLOWED_EXTENSIONS | {ZIP_EXTENSION})
+            try:
+                uploads.extend(await loop.run_in_executor(executor, extract_zip_workbooks, path, file.filename))
+            finally:
+                path.unlink(missing_ok=True)
+
+    except BaseException:
+        for upload in uploads:
+            upload.cleanup()
+        raise
+
+    return uploads
+
+
+def _file_extension(filename: Optional[str]) -> str:
+    return '.' + filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+
+
+async def spool_upload(file: UploadFile, allowed_extensions: set = ALLOWED_EXTENSIONS) -> Path:
+    """
+    Écrit un fichier uploadé dans un fichier temporaire après validation du nom et de
+    l'extension, avec limite de taille
+
+    Args:
+        file: Fichier uploadé via FastAPI
+        allowed_extensions: Extensions acceptées
+
+    Returns:
+        Chemin du fichier temporaire (même extension que le fichier uploadé)
 
     Raises:
         HTTPException: Si la validation échoue
@@ -56,41 +169,45 @@ async def validate_excel_file(file: UploadFile) -> Tuple[bytes, str]:
         raise HTTPException(status_code=400, detail="Nom de fichier manquant")
 
     # 2. Valider l'extension
-    file_ext = '.' + file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
-    if file_ext not in ALLOWED_EXTENSIONS:
+    file_ext = _file_extension(file.filename)
+    if file_ext not in allowed_extensions:
         logger.warning(f"Extension rejetée: {file_ext}")
         raise HTTPException(
             status_code=400,
-            detail=f"Extension de fichier non autorisée. Formats acceptés: {', '.join(ALLOWED_EXTENSIONS)}"
+            detail=f"Extension de fichier non autorisée. Formats acceptés: {', '.join(sorted(allowed_extensions))}"
         )
 
     logger.info(f"📄 Validation du fichier: {file.filename} ({file_ext})")
 
-    # 3. Lire le fichier avec limite de taille
-    contents = bytearray()
+    # 3. Écrire le fichier sur disque par blocs, avec limite de taille
+    fd, tmp_name = tempfile.mkstemp(prefix='upload_', suffix=file_ext)
+    path = Path(tmp_name)
     total_size = 0
 
     try:
-        while True:
-            chunk = await file.read(CHUNK_SIZE)
-            if not chunk:
-                break
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
 
-            total_size += len(chunk)
+                total_size += len(chunk)
 
-            # Protection DoS: limite de taille
-            if total_size > MAX_FILE_SIZE:
-                logger.error(f"Fichier trop volumineux: {total_size} bytes")
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"Fichier trop volumineux. Taille maximum: {MAX_FILE_SIZE // (1024*1024)} MB"
-                )
+                # Protection DoS: limite de taille
+                if total_size > MAX_FILE_SIZE:
+                    logger.error(f"Fichier trop volumineux: {total_size} bytes")
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Fichier trop volumineux. Taille maximum: {MAX_FILE_SIZE // (1024*1024)} MB"
+                    )
 
-            contents.extend(chunk)
+                out.write(chunk)
 
     except HTTPException:
+        path.unlink(missing_ok=True)
         raise
     except Exception as e:
+        path.unlink(missing_ok=True)
         logger.error(f"Erreur lecture fichier: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de la lecture du fichier")
 
@@ -99,10 +216,26 @@ async def validate_excel_file(file: UploadFile) -> Tuple[bytes, str]:
         await file.close()
 
     logger.info(f"📊 Taille du fichier: {total_size:,} bytes ({total_size / (1024*1024):.2f} MB)")
+    return path
+
+
+def check_workbook(path: Path) -> List[str]:
+    """
+    Vérifie le type MIME réel puis l'ouverture du classeur (sans lire les données)
+    Bloquant: à exécuter dans un pool de threads
+
+    Args:
+        path: Fichier à vérifier
+
+    Returns:
+        Noms des feuilles dans l'ordre du classeur
 
+    Raises:
+        HTTPException: Si le type MIME est refusé ou si le classeur est corrompu
+    """
     # 4. Valider le type MIME réel (magic number)
     try:
-        mime_type = magic.from_buffer(bytes(contents), mime=True)
+        mime_type = magic.from_file(str(path), mime=True)
         logger.info(f"🔍 Type MIME détecté: {mime_type}")
 
         if mime_type not in ALLOWED_MIME_TYPES:
@@ -119,12 +252,10 @@ async def validate_excel_file(file: UploadFile) -> Tuple[bytes, str]:
         # Ne pas bloquer si python-magic n'est pas disponible (fallback)
         logger.warning("⚠️ Validation MIME non disponible, continuation avec extension uniquement")
 
-    # 5. Valider que c'est un Excel valide
+    # 5. Valider que c'est un Excel valide (les feuilles sont lues en flux à l'import)
     try:
-        import pandas as pd
-        excel_file = pd.ExcelFile(io.BytesIO(contents))
-        num_sheets = len(excel_file.sheet_names)
-        logger.info(f"✅ Fichier Excel valide: {num_sheets} feuille(s)")
+        sheet_names = list_sheet_names(path)
+        logger.info(f"✅ Fichier Excel valide: {len(sheet_names)} feuille(s)")
 
     except Exception as e:
         logger.error(f"Fichier Excel corrompu: {e}")
@@ -133,8 +264,87 @@ async def validate_excel_file(file: UploadFile) -> Tuple[bytes, str]:
             detail="Fichier Excel corrompu ou invalide"
         )
 
-    logger.info(f"✅ Validation réussie: {file.filename}")
-    return bytes(contents), file.filename
+    return sheet_names
+
+
+def extract_zip_workbooks(path: Path, archive_name: str) -> List[ExcelUpload]:
+    """
+    Extrait et valide les classeurs Excel d'une archive ZIP
+    Bloquant: à exécuter dans un pool de threads
+
+    Les membres sont écrits dans des fichiers temporaires (jamais sous leur chemin
+    d'origine); les dossiers, fichiers cachés et autres extensions sont ignorés.
+
+    Args:
+        path: Archive ZIP (fichier temporaire)
+        archive_name: Nom de l'archive uploadée (pour les messages)
+
+    Returns:
+        Classeurs validés (nom = chemin du membre dans l'archive)
+
+    Raises:
+        HTTPException: Archive invalide, limites dépassées ou classeur invalide
+    """
+    try:
+        archive = zipfile.ZipFile(path)
+    except (zipfile.BadZipFile, OSError) as e:
+        logger.error(f"Archive ZIP invalide ({archive_name}): {e}")
+        raise HTTPException(status_code=400, detail=f"Archive ZIP invalide: {archive_name}")
+
+    uploads: List[ExcelUpload] = []
+    try:
+        with archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and _file_extension(info.filename) in ALLOWED_EXTENSIONS
+                and not any(part.startswith(('.', '~$', '__MACOSX')) for part in info.filename.split('/'))
+            ]
+
+            # Protection bombe ZIP: nombre de membres et tailles décompressées annoncées
+            if len(members) > MAX_ZIP_MEMBERS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Trop de classeurs dans l'archive (max {MAX_ZIP_MEMBERS})"
+                )
+            if any(info.file_size > MAX_FILE_SIZE for info in members) or \
+                    sum(info.file_size for info in members) > MAX_ZIP_UNCOMPRESSED_SIZE:
+                raise HTTPException(status_code=413, detail="Archive trop volumineuse une fois décompressée")
+
+            if not members:
+                raise HTTPException(status_code=400, detail=f"Aucun classeur Excel dans l'archive: {archive_name}")
+
+            for info in members:
+                fd, tmp_name = tempfile.mkstemp(prefix='upload_', suffix=_file_extension(info.filename))
+                member_path = Path(tmp_name)
+                # Enregistré tout de suite pour être nettoyé en cas d'erreur
+                upload = ExcelUpload(path=member_path, filename=info.filename, sheet_names=[])
+                uploads.append(upload)
+
+                # Copie par blocs avec limite réelle (la taille annoncée peut être fausse)
+                written = 0
+                with os.fdopen(fd, 'wb') as out, archive.open(info) as member:
+                    while True:
+                        chunk = member.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        written += len(chunk)
+                        if written > MAX_FILE_SIZE:
+                            raise HTTPException(
+                                status_code=413,
+                                detail=f"Fichier trop volumineux dans l'archive: {info.filename}"
+                            )
+                        out.write(chunk)
+
+                upload.sheet_names = check_workbook(member_path)
+
+    except BaseException:
+        for upload in uploads:
+            upload.cleanup()
+        raise
+
+    logger.info(f"✅ Archive {archive_name}: {len(uploads)} classeur(s) extrait(s)")
+    return uploads
 
 
 def get_file_size_limit() -> int:
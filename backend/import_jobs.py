@@ -0,0 +1,452 @@
+"""
+Imports Excel en arrière-plan
+L'endpoint d'import peut répondre 202 immédiatement: le classeur (fichier temporaire)
+est confié à un pool dédié, la progression est écrite dans la ligne ImportSession à
+chaque tranche et relue par le flux SSE /api/import-sessions/{id}/progress
+La progression vivant en base, le flux fonctionne quel que soit le worker qui répond
+
+Import en masse (plusieurs classeurs ou une archive ZIP): les feuilles sont lues et
+converties en parallèle dans un pool de processus qui envoient leurs tranches par une
+file bornée; un écrivain unique (le thread du job) insère et valide chaque tranche,
+une ImportSession par classeur
+"""
+
+import asyncio
+import json
+import os
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from queue import Empty
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from bulk_operations import insert_requirements
+from database import SessionLocal
+from file_validation import ExcelUpload
+from models import ImportSession
+from import_pipeline import import_workbook_with_mappings
+from requirement_import import import_workbook, parse_sheet
+from stats_service import invalidate_stats
+
+
+# Nombre d'imports exécutés simultanément en arrière-plan
+IMPORT_JOB_WORKERS = int(os.getenv('IMPORT_JOB_WORKERS', '2'))
+
+# Processus de lecture des feuilles pour l'import en masse (défaut: nombre de cœurs)
+IMPORT_PARSE_WORKERS = int(os.getenv('IMPORT_PARSE_WORKERS', '0')) or os.cpu_count() or 1
+
+# Tranches lues en attente d'insertion par processus de lecture (borne la mémoire)
+PARSE_QUEUE_CHUNKS_PER_WORKER = 2
+# Attente maximale d'une tranche avant de vérifier les feuilles terminées (secondes)
+PARSE_QUEUE_POLL_INTERVAL = 0.2
+
+# Intervalle de relecture de la progression (secondes) et de keep-alive SSE
+PROGRESS_POLL_INTERVAL = float(os.getenv('IMPORT_PROGRESS_POLL_INTERVAL', '1.0'))
+KEEPALIVE_INTERVAL = 15.0
+
+TERMINAL_STATUSES = {'completed', 'failed'}
+
+_job_executor: Optional[ThreadPoolExecutor] = None
+_job_executor_lock = threading.Lock()
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_manager = None
+
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """Pool dédié aux imports (séparé du pool des requêtes pour ne pas l'occuper)"""
+    global _job_executor
+    if _job_executor is None:
+        with _job_executor_lock:
+            if _job_executor is None:
+                _job_executor = ThreadPoolExecutor(
+                    max_workers=IMPORT_JOB_WORKERS,
+                    thread_name_prefix='import-job'
+                )
+    return _job_executor
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Pool de processus de lecture des feuilles (spawn: pas de fork d'un serveur multi-thread)"""
+    global _parse_pool
+    if _parse_pool is None:
+        with _job_executor_lock:
+            if _parse_pool is None:
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=IMPORT_PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _parse_pool
+
+
+def get_parse_manager():
+    """Gestionnaire des files entre les processus de lecture et l'écrivain (spawn)"""
+    global _parse_manager
+    if _parse_manager is None:
+        with _job_executor_lock:
+            if _parse_manager is None:
+                _parse_manager = multiprocessing.get_context('spawn').Manager()
+    return _parse_manager
+
+
+def _discard_until_done(queue, futures) -> None:
+    """Vide la file jusqu'à la fin des lectures en cours (débloque les processus en attente d'écriture)"""
+    while any(not future.done() for future in futures):
+        try:
+            queue.get(timeout=PARSE_QUEUE_POLL_INTERVAL)
+        except Empty:
+            continue
+        except Exception as e:
+            logger.warning(f"⚠️ File de lecture inaccessible: {e}")
+            return
+
+
+def progress_recorder(import_session: ImportSession) -> Callable[[List[Dict]], None]:
+    """
+    Crée un callback de progression pour import_workbook qui met à jour la session
+
+    Les compteurs sont validés avec chaque tranche (même transaction).
+
+    Args:
+        import_session: Session d'import attachée à la session SQLAlchemy de l'import
+
+    Returns:
+        Callback recevant la progression par feuille
+    """
+    def record(sheets: List[Dict]) -> None:
+        import_session.rows_parsed = sum(s["rows_imported"] for s in sheets)
+        import_session.rows_inserted = sum(s["rows_inserted"] for s in sheets)
+        # Nouvel objet: JSONB n'est pas suivi en cas de mutation en place
+        import_session.session_metadata = {
+            **(import_session.session_metadata or {}),
+            "sheets": [dict(s) for s in sheets]
+        }
+
+    return record
+
+
+def session_progress(import_session: ImportSession) -> Dict:
+    """Progression d'une session d'import (charge utile des événements SSE)"""
+    return {
+        "import_session_id": import_session.id,
+        "filename": import_session.filename,
+        "status": import_session.status,
+        "rows_parsed": import_session.rows_parsed or 0,
+        "rows_inserted": import_session.rows_inserted or 0,
+        "sheets": (import_session.session_metadata or {}).get("sheets", []),
+        "error": import_session.error_message
+    }
+
+
+def run_import_job(import_session_id: int, upload: ExcelUpload, analyze: bool = False) -> None:
+    """
+    Exécute un import en arrière-plan (session SQLAlchemy propre au job)
+    Le fichier temporaire appartient au job et est supprimé à la fin
+
+    Args:
+        import_session_id: Session d'import créée par l'endpoint (statut 'queued')
+        upload: Classeur validé
+        analyze: Créer les mappings ML pendant l'import (pipeline)
+    """
+    db = SessionLocal()
+    try:
+        import_session = db.get(ImportSession, import_session_id)
+        import_session.status = 'processing'
+        db.commit()
+
+        logger.info(f"🚀 Import en arrière-plan: {upload.filename} (Session ID: {import_session_id})")
+        import_fn = import_workbook_with_mappings if analyze else import_workbook
+        total_imported, _ = import_fn(
+            db,
+            str(upload.path),
+            upload.filename,
+            import_session_id,
+            progress_callback=progress_recorder(import_session)
+        )
+
+        import_session.total_requirements = total_imported
+        import_session.status = 'completed' if total_imported > 0 else 'failed'
+        if total_imported == 0:
+            import_session.error_message = "Aucune exigence importée"
+        db.commit()
+
+        logger.info(f"✅ Import terminé: {total_imported} lignes importées (Session ID: {import_session_id})")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Erreur import en arrière-plan (Session ID: {import_session_id}): {e}")
+        try:
+            import_session = db.get(ImportSession, import_session_id)
+            if import_session is not None:
+                import_session.status = 'failed'
+                import_session.error_message = str(e)
+                db.commit()
+        except Exception as status_error:
+            db.rollback()
+            logger.error(f"❌ Impossible d'enregistrer l'échec de l'import: {status_error}")
+
+    finally:
+        invalidate_stats()
+        upload.cleanup()
+        db.close()
+
+
+def submit_import_job(import_session_id: int, upload: ExcelUpload, analyze: bool = False) -> Future:
+    """
+    Lance un import en arrière-plan
+
+    Args:
+        import_session_id: Session d'import déjà validée en base
+        upload: Classeur validé (le job en devient propriétaire)
+        analyze: Créer les mappings ML pendant l'import (pipeline)
+
+    Returns:
+        Future du job
+    """
+    return get_job_executor().submit(run_import_job, import_session_id, upload, analyze)
+
+
+def run_bulk_import_job(jobs: List[Tuple[int, ExcelUpload]]) -> List[Dict]:
+    """
+    Importe plusieurs classeurs: lecture des feuilles en parallèle, écrivain unique
+
+    Les feuilles de tous les classeurs sont soumises au pool de processus. Les processus
+    envoient chaque tranche convertie par une file bornée (PARSE_QUEUE_CHUNKS_PER_WORKER
+    tranches par processus: la mémoire ne dépend pas de la taille des feuilles); chaque
+    tranche est insérée et validée dès réception, comme dans import_workbook. Une session
+    est terminée quand toutes ses feuilles le sont. Les fichiers temporaires appartiennent au job.
+
+    Args:
+        jobs: (ID de session d'import 'queued', classeur validé) par classeur
+
+    Returns:
+        Résultat par classeur (session, fichier, statut, exigences insérées, feuilles)
+    """
+    db = SessionLocal()
+    uploads = {session_id: upload for session_id, upload in jobs}
+    sessions: Dict[int, ImportSession] = {}
+    sheets: Dict[int, List[Dict]] = {session_id: [] for session_id in uploads}
+    sheet_progress: Dict[Tuple[int, str], Dict] = {}
+    remaining = {session_id: len(upload.sheet_names) for session_id, upload in uploads.items()}
+    errors: Dict[int, str] = {}
+    statuses = {session_id: 'failed' for session_id in uploads}
+    finished = set()  # Sessions dont le statut final est validé en base
+    pending: Dict[Future, Tuple[int, str]] = {}
+    queue = None
+
+    def finish(session_id: int) -> None:
+        import_session = sessions[session_id]
+        # Feuilles dans l'ordre du classeur (elles arrivent dans l'ordre de fin de lecture)
+        order = uploads[session_id].sheet_names
+        sheets[session_id].sort(key=lambda sheet: order.index(sheet["sheet_name"]))
+        total_imported = sum(sheet["rows_inserted"] for sheet in sheets[session_id])
+        import_session.total_requirements = total_imported
+        if session_id in errors:
+            import_session.error_message = errors[session_id]
+        elif total_imported == 0:
+            import_session.error_message = "Aucune exigence importée"
+        else:
+            statuses[session_id] = 'completed'
+        import_session.status = statuses[session_id]
+        uploads[session_id].cleanup()
+        logger.info(f"✅ {import_session.filename}: {total_imported} lignes importées (Session ID: {session_id})")
+
+    try:
+        for session_id in uploads:
+            sessions[session_id] = db.get(ImportSession, session_id)
+            sessions[session_id].status = 'processing'
+        db.commit()
+
+        logger.info(f"🚀 Import en masse: {len(uploads)} classeur(s), {sum(remaining.values())} feuille(s), "
+                    f"{IMPORT_PARSE_WORKERS} processus")
+
+        # Classeurs sans feuille: rien à lire
+        empty = [session_id for session_id, count in remaining.items() if count == 0]
+        for session_id in empty:
+            finish(session_id)
+        db.commit()
+        finished.update(empty)
+
+        pool = get_parse_pool()
+        queue = get_parse_manager().Queue(maxsize=PARSE_QUEUE_CHUNKS_PER_WORKER * IMPORT_PARSE_WORKERS)
+        tasks = iter([
+            (session_id, sheet_name)
+            for session_id, upload in uploads.items()
+            for sheet_name in upload.sheet_names
+        ])
+
+        def submit_next() -> None:
+            task = next(tasks, None)
+            if task is not None:
+                session_id, sheet_name = task
+                upload = uploads[session_id]
+                future = pool.submit(parse_sheet, str(upload.path), sheet_name, upload.filename, queue, task)
+                pending[future] = task
+
+        def write_chunk(message: Tuple) -> None:
+            (session_id, sheet_name), rows_read, rows = message
+            for row in rows:
+                row["import_session_id"] = session_id
+            inserted = insert_requirements(db, rows)
+
+            sheet = sheet_progress.get((session_id, sheet_name))
+            if sheet is None:
+                sheet = {"sheet_name": sheet_name, "rows_imported": 0, "rows_inserted": 0}
+                sheet_progress[(session_id, sheet_name)] = sheet
+                sheets[session_id].append(sheet)
+            sheet["rows_imported"] += rows_read
+            sheet["rows_inserted"] += len(inserted)
+            progress_recorder(sessions[session_id])(sheets[session_id])
+            db.commit()
+
+        for _ in range(2 * IMPORT_PARSE_WORKERS):
+            submit_next()
+
+        while pending:
+            try:
+                write_chunk(queue.get(timeout=PARSE_QUEUE_POLL_INTERVAL))
+            except Empty:
+                pass
+
+            done = [future for future in pending if future.done()]
+            if not done:
+                continue
+
+            # Les tranches d'une feuille terminée sont toutes dans la file: les écrire d'abord
+            while True:
+                try:
+                    write_chunk(queue.get_nowait())
+                except Empty:
+                    break
+
+            for future in done:
+                session_id, sheet_name = pending.pop(future)
+                submit_next()
+
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"❌ Lecture de '{sheet_name}' ({uploads[session_id].filename}): {e}")
+                    errors[session_id] = f"Feuille '{sheet_name}': {e}"
+
+                remaining[session_id] -= 1
+                if remaining[session_id] == 0:
+                    finish(session_id)
+                    db.commit()
+                    finished.add(session_id)
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Erreur import en masse: {e}")
+        for future in pending:
+            future.cancel()
+        if queue is not None:
+            _discard_until_done(queue, pending)
+        for session_id, import_session in sessions.items():
+            if session_id not in finished:
+                statuses[session_id] = 'failed'
+                try:
+                    import_session.status = 'failed'
+                    import_session.error_message = str(e)
+                    db.commit()
+                except Exception as status_error:
+                    db.rollback()
+                    logger.error(f"❌ Impossible d'enregistrer l'échec de l'import: {status_error}")
+
+    finally:
+        results = [
+            {
+                "import_session_id": session_id,
+                "filename": uploads[session_id].filename,
+                "status": statuses[session_id],
+                "total_imported": sum(sheet["rows_inserted"] for sheet in sheets[session_id]),
+                "sheets": sheets[session_id]
+            }
+            for session_id in uploads
+        ]
+        invalidate_stats()
+        for upload in uploads.values():
+            upload.cleanup()
+        db.close()
+
+    return results
+
+
+def submit_bulk_import_job(jobs: List[Tuple[int, ExcelUpload]]) -> Future:
+    """
+    Lance un import en masse en arrière-plan
+
+    Args:
+        jobs: (ID de session d'import déjà validée en base, classeur validé) par classeur
+
+    Returns:
+        Future du job (résultat: voir run_bulk_import_job)
+    """
+    return get_job_executor().submit(run_bulk_import_job, jobs)
+
+
+def read_progress(import_session_id: int) -> Optional[Dict]:
+    """
+    Lit la progression d'une session d'import
+
+    Args:
+        import_session_id: ID de la session
+
+    Returns:
+        Progression, None si la session n'existe pas
+    """
+    db = SessionLocal()
+    try:
+        import_session = db.get(ImportSession, import_session_id)
+        return session_progress(import_session) if import_session is not None else None
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_progress(
+    import_session_id: int,
+    executor: Optional[Executor] = None
+) -> AsyncIterator[str]:
+    """
+    Flux Server-Sent Events de la progression d'un import
+
+    Émet un événement 'progress' à chaque changement, puis 'done' lorsque l'import est
+    terminé (completed ou failed). Un commentaire keep-alive est envoyé en l'absence
+    de changement pour éviter la coupure par les proxys.
+
+    Args:
+        import_session_id: ID de la session
+        executor: Pool de threads pour les lectures en base
+
+    Yields:
+        Événements SSE formatés
+    """
+    loop = asyncio.get_running_loop()
+    last: Optional[Dict] = None
+    idle = 0.0
+
+    while True:
+        progress = await loop.run_in_executor(executor, read_progress, import_session_id)
+        if progress is None:
+            yield _sse('error', {"detail": "Session d'import non trouvée"})
+            return
+
+        if progress != last:
+            yield _sse('progress', progress)
+            last = progress
+            idle = 0.0
+        elif idle >= KEEPALIVE_INTERVAL:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+
+        if progress["status"] in TERMINAL_STATUSES:
+            yield _sse('done', progress)
+            return
+
+        await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+        idle += PROGRESS_POLL_INTERVAL
@@ -0,0 +1,224 @@
+"""
+Import avec analyse ML en pipeline (lecture → encodage → écriture)
+Trois étapes dans des threads distincts reliées par des files bornées: pendant que
+le modèle encode une tranche, la suivante est lue et la précédente insérée
+(exigences puis mappings ML en masse). La durée totale tend vers celle de l'étape
+la plus lente au lieu de la somme des étapes, et la mémoire reste bornée
+"""
+
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from bulk_operations import insert_compliance_mappings, insert_requirements
+from excel_stream import iter_sheet_chunks
+from ml_service import MLMappingService, get_ml_service
+from models import SCFControl
+from requirement_import import chunk_to_requirement_rows, detect_sheet_columns
+from schemas import SimilaritySearchResponse
+
+
+# Tranches en attente entre deux étapes (borne la mémoire si une étape est plus lente)
+PIPELINE_QUEUE_SIZE = int(os.getenv('IMPORT_PIPELINE_QUEUE_SIZE', '4'))
+
+# Seuil de similarité en dessous duquel aucun mapping n'est créé
+PIPELINE_MIN_SIMILARITY = 0.3
+
+_DONE = object()
+
+
+class _StageError:
+    """Exception levée dans une étape amont, transmise à l'écrivain"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(out: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Ajoute à une file bornée sans bloquer indéfiniment si l'aval s'est arrêté"""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _run_stage(
+    name: str,
+    produce: Callable[[], Iterator[Any]],
+    out: queue.Queue,
+    stop: threading.Event
+) -> threading.Thread:
+    """Démarre une étape: chaque élément produit est placé dans `out`, puis _DONE"""
+    def run() -> None:
+        try:
+            for item in produce():
+                if not _put(out, item, stop):
+                    return
+            _put(out, _DONE, stop)
+        except BaseException as e:
+            logger.error(f"❌ Étape '{name}' du pipeline d'import: {e}")
+            _put(out, _StageError(e), stop)
+
+    thread = threading.Thread(target=run, name=f"import-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _iter_queue(source: queue.Queue, stop: threading.Event) -> Iterator[Any]:
+    """Consomme une file jusqu'à _DONE ou l'arrêt du pipeline (relance l'erreur d'une étape amont)"""
+    while not stop.is_set():
+        try:
+            item = source.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, _StageError):
+            raise item.error
+        yield item
+
+
+def _mapping_row(
+    requirement_id: int,
+    match: SimilaritySearchResponse,
+    import_session_id: Optional[int]
+) -> Dict:
+    """Ligne compliance_mappings pour le meilleur contrôle SCF (comme /api/analyze/batch)"""
+    return {
+        "requirement_id": requirement_id,
+        "scf_mapping": f"{match.control_id} - {match.control_title}",
+        "confidence_score": match.similarity_score,
+        "mapping_source": 'ml',
+        "analysis": f"Mapping automatique ML (similarité: {match.similarity_score:.2%})",
+        "is_active": True,
+        "import_session_id": import_session_id
+    }
+
+
+def import_workbook_with_mappings(
+    db: Session,
+    path: str,
+    source_file: str,
+    import_session_id: Optional[int],
+    chunk_size: Optional[int] = None,
+    progress_callback: Optional[Callable[[List[Dict]], None]] = None,
+    ml_service: Optional[MLMappingService] = None
+) -> Tuple[int, List[Dict]]:
+    """
+    Importe un classeur et crée les mappings ML en une seule passe (pipeline)
+    Bloquant: à exécuter dans un pool de threads
+
+    Mêmes arguments et même résultat que import_workbook. Les exigences ayant un
+    contrôle au-dessus du seuil sont insérées avec analysis_status='analyzed' et leur
+    mapping actif est inséré dans la même transaction que la tranche.
+
+    Args:
+        db: Session SQLAlchemy (utilisée uniquement par l'écrivain)
+        path: Chemin du classeur
+        source_file: Nom du fichier source
+        import_session_id: Session d'import
+        chunk_size: Lignes par tranche (défaut: IMPORT_CHUNK_SIZE)
+        progress_callback: Appelé avant chaque commit avec la progression par feuille
+            ({sheet_name, rows_imported, rows_inserted, rows_mapped})
+        ml_service: Service ML (défaut: instance active)
+
+    Returns:
+        Tuple (nombre d'exigences insérées, détail par feuille)
+
+    Raises:
+        ValueError: Si aucun contrôle SCF n'est disponible
+    """
+    ml_service = ml_service or get_ml_service()
+    controls = db.query(SCFControl).all()
+    if not controls:
+        raise ValueError("Aucun contrôle SCF trouvé")
+
+    stop = threading.Event()
+    parsed: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    encoded: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    def parse() -> Iterator[Tuple[str, int, List[Dict]]]:
+        columns_by_sheet: Dict[str, Optional[Tuple]] = {}
+        for sheet_name, df in iter_sheet_chunks(path, chunk_size):
+            if sheet_name not in columns_by_sheet:
+                columns_by_sheet[sheet_name] = detect_sheet_columns(df, sheet_name)
+            columns = columns_by_sheet[sheet_name]
+            if columns is None:
+                continue
+            rows = chunk_to_requirement_rows(df, sheet_name, columns, source_file, import_session_id)
+            yield sheet_name, len(df), rows
+
+    def encode() -> Iterator[Tuple[str, int, List[Dict], Dict[str, SimilaritySearchResponse]]]:
+        for sheet_name, rows_read, rows in _iter_queue(parsed, stop):
+            # Une ligne par (original_id, source_file): la première, celle que garde
+            # l'insertion (ON CONFLICT DO NOTHING), pour que le mapping corresponde au texte inséré
+            unique: Dict[Tuple[str, str], Dict] = {}
+            for row in rows:
+                unique.setdefault((row["original_id"], row["source_file"]), row)
+            rows = list(unique.values())
+
+            # Les exigences sans texte sont importées sans mapping
+            to_encode = [row for row in rows if row["requirement"].strip()]
+            matches = ml_service.find_similar_controls_batch(
+                requirement_texts=[row["requirement"] for row in to_encode],
+                controls=controls,
+                top_k=1,
+                min_similarity=PIPELINE_MIN_SIMILARITY
+            )
+
+            # Meilleur contrôle par original_id (unique dans la tranche)
+            best_by_id: Dict[str, SimilaritySearchResponse] = {}
+            for row, similar in zip(to_encode, matches):
+                if similar:
+                    row["analysis_status"] = 'analyzed'
+                    best_by_id[row["original_id"]] = similar[0]
+
+            yield sheet_name, rows_read, rows, best_by_id
+
+    threads = [
+        _run_stage('parse', parse, parsed, stop),
+        _run_stage('encode', encode, encoded, stop)
+    ]
+
+    total_imported = 0
+    sheets: Dict[str, Dict] = {}
+    try:
+        for sheet_name, rows_read, rows, best_by_id in _iter_queue(encoded, stop):
+            inserted = insert_requirements(db, rows)
+            mappings = [
+                _mapping_row(requirement_id, best_by_id[original_id], import_session_id)
+                for requirement_id, original_id in inserted
+                if original_id in best_by_id
+            ]
+            insert_compliance_mappings(db, mappings)
+
+            sheet = sheets.setdefault(
+                sheet_name,
+                {"sheet_name": sheet_name, "rows_imported": 0, "rows_inserted": 0, "rows_mapped": 0}
+            )
+            sheet["rows_imported"] += rows_read
+            sheet["rows_inserted"] += len(inserted)
+            sheet["rows_mapped"] += len(mappings)
+            total_imported += len(inserted)
+
+            if progress_callback is not None:
+                progress_callback(list(sheets.values()))
+            db.commit()
+
+            logger.info(f"Feuille '{sheet_name}': {sheet['rows_imported']} lignes traitées, "
+                        f"{sheet['rows_mapped']} mappings ML")
+
+    finally:
+        # Arrêter les étapes amont si l'écrivain s'est interrompu
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return total_imported, list(sheets.values())
@@ -6,6 +6,8 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine, Base
 from models import SCFControl
+from bulk_operations import insert_scf_controls
+from dataframe_records import extract_columns, to_records
 from loguru import logger
 import sys
 from pathlib import Path
@@ -79,49 +81,21 @@ def import_scf_from_excel(excel_file_path: str, sheet_name: str = None):
 
             logger.info(f"✅ Mapping des colonnes détecté: {column_mapping}")
 
-            # Importer les contrôles
-            imported = 0
-            skipped = 0
-
-            for idx, row in df.iterrows():
-                try:
-                    control_id = str(row.get(column_mapping.get('control_id', ''), '')).strip()
-                    control_title = str(row.get(column_mapping.get('control_title', ''), '')).strip()
-
-                    # Vérifier que les champs obligatoires sont présents
-                    if not control_id or control_id == 'nan' or not control_title or control_title == 'nan':
-                        skipped += 1
-                        continue
-
-                    # Créer l'objet SCFControl
-                    scf_control = SCFControl(
-                        control_id=control_id,
-                        control_title=control_title,
-                        control_description=str(row.get(column_mapping.get('control_description', ''), '')) if pd.notna(row.get(column_mapping.get('control_description', ''))) else None,
-                        domain=str(row.get(column_mapping.get('domain', ''), '')) if pd.notna(row.get(column_mapping.get('domain', ''))) else None,
-                        category=str(row.get(column_mapping.get('category', ''), '')) if pd.notna(row.get(column_mapping.get('category', ''))) else None,
-                        criticality=str(row.get(column_mapping.get('criticality', ''), '')) if pd.notna(row.get(column_mapping.get('criticality', ''))) else None,
-                        iso27001_mapping=str(row.get(column_mapping.get('iso27001_mapping', ''), '')) if pd.notna(row.get(column_mapping.get('iso27001_mapping', ''))) else None,
-                        iso27002_mapping=str(row.get(column_mapping.get('iso27002_mapping', ''), '')) if pd.notna(row.get(column_mapping.get('iso27002_mapping', ''))) else None,
-                        cobit5_mapping=str(row.get(column_mapping.get('cobit5_mapping', ''), '')) if pd.notna(row.get(column_mapping.get('cobit5_mapping', ''))) else None,
-                        nist_mapping=str(row.get(column_mapping.get('nist_mapping', ''), '')) if pd.notna(row.get(column_mapping.get('nist_mapping', ''))) else None,
-                        version="2025.2"
-                    )
-
-                    db.add(scf_control)
-                    imported += 1
-
-                    # Commit par batch de 100
-                    if imported % 100 == 0:
-                        db.commit()
-                        logger.info(f"💾 {imported} contrôles importés...")
-
-                except Exception as e:
-                    logger.error(f"❌ Erreur ligne {idx}: {e}")
-                    skipped += 1
-                    continue
-
-            # Commit final
+            # Importer les contrôles (conversion vectorisée + insertion en masse)
+            fields = ['control_id', 'control_title', 'control_description', 'domain', 'category',
+                      'criticality', 'iso27001_mapping', 'iso27002_mapping', 'cobit5_mapping', 'nist_mapping']
+            frame = extract_columns(
+                df,
+                {field: column_mapping.get(field) for field in fields},
+                strip=('control_id', 'control_title')
+            )
+
+            # Champs obligatoires présents, un seul contrôle par identifiant
+            valid = frame['control_id'].fillna('').ne('') & frame['control_title'].fillna('').ne('')
+            frame = frame[valid].drop_duplicates(subset='control_id')
+            skipped = len(df) - len(frame)
+
+            imported = insert_scf_controls(db, to_records(frame, version="2025.2"))
             db.commit()
 
             logger.info("=" * 60)
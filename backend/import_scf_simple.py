@@ -6,6 +6,8 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import SCFControl
+from bulk_operations import insert_scf_controls
+from dataframe_records import extract_columns, to_records
 import sys
 from pathlib import Path
 
@@ -54,45 +56,15 @@ def import_scf():
         db.commit()
         print("Controles existants supprimes")
 
-        imported = 0
-        skipped = 0
-
-        for idx, row in df.iterrows():
-            try:
-                control_id = str(row.get(mapping['control_id'], '')).strip()
-                control_title = str(row.get(mapping['control_title'], '')).strip()
-
-                # Ignorer les lignes vides
-                if not control_id or control_id == 'nan' or not control_title or control_title == 'nan':
-                    skipped += 1
-                    continue
-
-                # Créer le contrôle
-                scf_control = SCFControl(
-                    control_id=control_id,
-                    control_title=control_title,
-                    control_description=str(row.get(mapping['control_description'], '')) if pd.notna(row.get(mapping['control_description'])) else None,
-                    domain=str(row.get(mapping['domain'], '')) if pd.notna(row.get(mapping['domain'])) else None,
-                    cobit5_mapping=str(row.get(mapping['cobit5_mapping'], '')) if pd.notna(row.get(mapping['cobit5_mapping'])) else None,
-                    iso27001_mapping=str(row.get(mapping['iso27001_mapping'], '')) if pd.notna(row.get(mapping['iso27001_mapping'])) else None,
-                    iso27002_mapping=str(row.get(mapping['iso27002_mapping'], '')) if pd.notna(row.get(mapping['iso27002_mapping'])) else None,
-                    version="2025.2"
-                )
-
-                db.add(scf_control)
-                imported += 1
-
-                # Commit par batch de 100
-                if imported % 100 == 0:
-                    db.commit()
-                    print(f"Progress: {imported} controles importes...")
-
-            except Exception as e:
-                print(f"Erreur ligne {idx}: {e}")
-                skipped += 1
-                continue
-
-        # Commit final
+        # Conversion vectorisée + insertion en masse
+        frame = extract_columns(df, mapping, strip=('control_id', 'control_title'))
+
+        # Ignorer les lignes vides (et les identifiants en double)
+        valid = frame['control_id'].fillna('').ne('') & frame['control_title'].fillna('').ne('')
+        frame = frame[valid].drop_duplicates(subset='control_id')
+        skipped = len(df) - len(frame)
+
+        imported = insert_scf_controls(db, to_records(frame, version="2025.2"))
         db.commit()
 
         total = db.query(SCFControl).count()
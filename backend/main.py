@@ -3,20 +3,44 @@ GRC Compliance Mapping - Backend API avec ML/NLP
 FastAPI + PostgreSQL + Sentence-Transformers
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 import pandas as pd
 from loguru import logger
 import os
 import asyncio
+import functools
 from concurrent.futures import ThreadPoolExecutor
 
-from database import get_db, engine, Base
+from database import get_async_db, get_db, engine, Base
 from models import Requirement, SCFControl, ComplianceMapping, ImportSession
-from ml_service import MLMappingService
+from ml_service import get_ml_service
+from model_swap import apply_persisted_model, start_model_sync
+from ml_model_singleton import get_model_name
+from bulk_operations import insert_compliance_mappings, insert_requirements
+from requirement_import import import_workbook, preview_workbook
+from import_pipeline import import_workbook_with_mappings
+from pagination import decode_cursor, keyset_filter, next_cursor, total_count
+from stats_service import get_stats_async, invalidate_stats
+from session_results import (
+    iter_result_dicts,
+    session_results_statement,
+    session_summary,
+    stream_session_results
+)
+from import_jobs import (
+    progress_recorder,
+    read_progress,
+    stream_progress,
+    submit_bulk_import_job,
+    submit_import_job
+)
 from schemas import (
     RequirementCreate,
     RequirementResponse,
@@ -70,10 +94,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],  # Pagination de /api/requirements
 )
 
-# Initialiser le service ML
-ml_service = MLMappingService()
+# Initialiser le service ML (instance active, remplaçable à chaud via /api/admin/model)
+# avec le modèle enregistré par le dernier changement, puis suivre ceux des autres workers
+apply_persisted_model()
+get_ml_service()
+start_model_sync()
 
 # Thread pool pour opérations bloquantes (parsing Excel, etc.)
 executor = ThreadPoolExecutor(max_workers=4)
@@ -86,6 +114,9 @@ import threading
 # Import du router AI proxy
 from ai_proxy import router as ai_router
 
+# Import du router d'administration (changement de modèle à chaud)
+from admin_routes import router as admin_router
+
 # Variable globale pour la base SCF (chargement lazy thread-safe)
 _scf_kb = None
 _scf_kb_lock = threading.Lock()
@@ -134,12 +165,19 @@ def get_or_init_scf_kb():
             _scf_kb_error = str(e)
             return None
 
+def get_loaded_scf_kb():
+    """Base SCF si elle est déjà chargée (sans déclencher son chargement)"""
+    return _scf_kb
+
 # Inclure les routes SCF
 app.include_router(scf_router)
 
 # Inclure les routes AI proxy (SÉCURISÉ - clés API côté serveur)
 app.include_router(ai_router)
 
+# Inclure les routes d'administration (protégées par ADMIN_API_TOKEN)
+app.include_router(admin_router)
+
 # ============================================
 # Health Check
 # ============================================
@@ -151,7 +189,7 @@ async def root():
         "message": "GRC Compliance Mapping API",
         "version": "1.0.0",
         "status": "running",
-        "ml_model": "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+        "ml_model": f"sentence-transformers/{get_model_name()}"
     }
 
 @app.get("/health")
@@ -170,6 +208,8 @@ async def health_check():
 @app.post("/api/import/excel", response_model=BulkImportResponse)
 async def import_excel(
     file: UploadFile = File(...),
+    background: bool = False,
+    analyze: bool = False,
     db: Session = Depends(get_db)
 ):
     """
@@ -178,106 +218,81 @@ async def import_excel(
     Crée automatiquement une ImportSession pour tracer l'import
 
     SÉCURITÉ:
-    - Validation de la taille du fichier (max 10MB)
+    - Validation de la taille du fichier (MAX_UPLOAD_SIZE_MB, 500MB par défaut)
     - Validation du type MIME réel
     - Validation de l'intégrité Excel
+
+    L'upload est écrit dans un fichier temporaire puis lu en flux et inséré par tranches:
+    la mémoire utilisée ne dépend pas de la taille du classeur.
+
+    Avec `?background=true`, répond 202 dès la validation du fichier avec l'ID de la
+    session d'import; la progression est suivie via /api/import-sessions/{id}/progress (SSE).
+
+    Avec `?analyze=true`, les mappings ML sont créés pendant l'import (lecture, encodage
+    et insertion en pipeline) au lieu d'un appel ultérieur à /api/analyze/batch.
     """
     try:
         logger.info(f"Début de l'import du fichier: {file.filename}")
 
-        # SÉCURITÉ: Valider le fichier uploadé
+        # SÉCURITÉ: Valider le fichier uploadé (écrit sur disque, vérifié hors de la boucle d'événements)
         from file_validation import validate_excel_file
-        contents, validated_filename = await validate_excel_file(file)
-
-        # Détecter toutes les feuilles
-        excel_file = pd.ExcelFile(contents)
-        logger.info(f"Feuilles détectées: {excel_file.sheet_names}")
-
-        # Créer une session d'import
-        import_session = ImportSession(
-            filename=validated_filename,  # Utiliser le nom validé
-            source_sheet=", ".join(excel_file.sheet_names),
-            status='processing',
-            analysis_source='pending',
-            total_requirements=0
-        )
-        db.add(import_session)
-        db.flush()  # Pour obtenir l'ID
+        upload = await validate_excel_file(file, executor)
+        logger.info(f"Feuilles détectées: {upload.sheet_names}")
 
-        logger.info(f"Session d'import créée: ID={import_session.id}")
+        handed_off = False  # Le job d'arrière-plan devient propriétaire du fichier temporaire
+        try:
+            # Créer une session d'import
+            import_session = ImportSession(
+                filename=upload.filename,  # Utiliser le nom validé
+                source_sheet=", ".join(upload.sheet_names),
+                status='queued' if background else 'processing',
+                analysis_source='ml' if analyze else 'pending',
+                total_requirements=0
+            )
+            db.add(import_session)
 
-        total_imported = 0
-        imported_sheets = []
+            if background:
+                # Le job utilise sa propre session: la ligne doit être validée avant
+                db.commit()
+                submit_import_job(import_session.id, upload, analyze)
+                handed_off = True
+                logger.info(f"Import en arrière-plan lancé: Session ID={import_session.id}")
+                return JSONResponse(
+                    status_code=202,
+                    content={
+                        "success": True,
+                        "import_session_id": import_session.id,
+                        "status": import_session.status,
+                        "progress_url": f"/api/import-sessions/{import_session.id}/progress"
+                    }
+                )
+
+            db.flush()  # Pour obtenir l'ID
 
-        # Importer chaque feuille
-        loop = asyncio.get_event_loop()
+            logger.info(f"Session d'import créée: ID={import_session.id}")
 
-        for sheet_name in excel_file.sheet_names:
-            # Parsing Excel dans thread pool (évite blocage event loop)
-            df = await loop.run_in_executor(
+            # Lecture en flux + insertion par tranches dans le pool de threads
+            loop = asyncio.get_running_loop()
+            total_imported, imported_sheets = await loop.run_in_executor(
                 executor,
-                pd.read_excel,
-                contents,
-                sheet_name
+                functools.partial(
+                    import_workbook_with_mappings if analyze else import_workbook,
+                    db,
+                    str(upload.path),
+                    file.filename,
+                    import_session.id,
+                    progress_callback=progress_recorder(import_session)
+                )
             )
-
-            logger.info(f"Traitement de la feuille '{sheet_name}': {len(df)} lignes")
-            
-            # Détecter les colonnes importantes
-            columns = df.columns.tolist()
-            
-            # Mapper les colonnes (flexible)
-            id_col = next((col for col in columns if any(x in col.lower() for x in ['id', 'n°', 'numero'])), None)
-            req_col = next((col for col in columns if any(x in col.lower() for x in ['exigence', 'requirement', 'control', 'titre'])), None)
-            verif_col = next((col for col in columns if any(x in col.lower() for x in ['verification', 'point', 'description'])), None)
-            
-            if not req_col:
-                logger.warning(f"Aucune colonne d'exigence trouvée dans '{sheet_name}', skip")
-                continue
-            
-            # Insérer les données
-            for idx, row in df.iterrows():
-                try:
-                    original_id_val = str(row[id_col]) if id_col and pd.notna(row[id_col]) else f"{sheet_name}_{idx}"
-
-                    # Vérifier si l'exigence existe déjà (duplicate key)
-                    existing = db.query(Requirement).filter(
-                        Requirement.original_id == original_id_val,
-                        Requirement.source_file == file.filename
-                    ).first()
-
-                    if existing:
-                        # Skip silencieusement les doublons
-                        logger.debug(f"Skip duplicate: {original_id_val} from {file.filename}")
-                        continue
-
-                    requirement = Requirement(
-                        original_id=original_id_val,
-                        requirement=str(row[req_col]) if pd.notna(row[req_col]) else "",
-                        verification_point=str(row[verif_col]) if verif_col and pd.notna(row[verif_col]) else None,
-                        source_file=file.filename,
-                        source_sheet=sheet_name,
-                        analysis_status='pending',
-                        import_session_id=import_session.id  # Lier à la session d'import
-                    )
-
-                    db.add(requirement)
-                    total_imported += 1
-
-                except Exception as e:
-                    logger.error(f"Erreur ligne {idx}: {e}")
-                    continue
-            
-            db.commit()
-            imported_sheets.append({
-                "sheet_name": sheet_name,
-                "rows_imported": len(df)
-            })
+        finally:
+            if not handed_off:
+                upload.cleanup()
 
         # Mettre à jour la session d'import
         import_session.total_requirements = total_imported
         import_session.status = 'completed' if total_imported > 0 else 'failed'
         db.commit()
+        invalidate_stats()
 
         logger.info(f"Import terminé: {total_imported} lignes importées (Session ID: {import_session.id})")
 
@@ -288,35 +303,176 @@ async def import_excel(
             message=f"Import réussi: {total_imported} exigences importées",
             import_session_id=import_session.id  # Retourner l'ID de la session
         )
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de l'import: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/import/preview")
+async def preview_excel(
+    file: UploadFile = File(...),
+    rows: int = Query(10, ge=1, le=100)
+):
+    """
+    Aperçu d'un fichier Excel pour le mapping des colonnes (rien n'est importé)
+    Pour chaque feuille: en-têtes, `rows` premières lignes et colonnes détectées
+    (id_col, req_col, verif_col) telles que l'import les utiliserait
+
+    Seul le début de chaque feuille est lu (lecture en flux): le temps de réponse ne
+    dépend pas de la taille du classeur.
+    """
+    try:
+        from file_validation import validate_excel_file
+        upload = await validate_excel_file(file, executor)
+
+        try:
+            loop = asyncio.get_running_loop()
+            sheets = await loop.run_in_executor(executor, preview_workbook, str(upload.path), rows)
+        finally:
+            upload.cleanup()
+
+        return {
+            "success": True,
+            "filename": upload.filename,
+            "sheets": sheets
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors de l'aperçu: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/import/excel/bulk")
+async def import_excel_bulk(
+    files: List[UploadFile] = File(...),
+    background: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Importer plusieurs fichiers Excel (ou archives ZIP de classeurs) en une fois
+    Une ImportSession est créée par classeur; les feuilles sont lues en parallèle dans
+    un pool de processus et insérées par un écrivain unique
+
+    Avec `?background=true`, répond 202 dès la validation des fichiers avec les IDs des
+    sessions d'import (progression via /api/import-sessions/{id}/progress).
+    """
+    try:
+        logger.info(f"Début de l'import en masse: {len(files)} fichier(s)")
+
+        # SÉCURITÉ: mêmes validations que l'import unitaire, pour chaque classeur
+        from file_validation import validate_excel_files
+        uploads = await validate_excel_files(files, executor)
+
+        handed_off = False  # Le job devient propriétaire des fichiers temporaires
+        try:
+            import_sessions = [
+                ImportSession(
+                    filename=upload.filename,
+                    source_sheet=", ".join(upload.sheet_names),
+                    status='queued',
+                    analysis_source='pending',
+                    total_requirements=0
+                )
+                for upload in uploads
+            ]
+            db.add_all(import_sessions)
+            db.commit()  # Le job utilise sa propre session
+
+            job = submit_bulk_import_job([
+                (import_session.id, upload)
+                for import_session, upload in zip(import_sessions, uploads)
+            ])
+            handed_off = True
+        finally:
+            if not handed_off:
+                for upload in uploads:
+                    upload.cleanup()
+
+        session_ids = [import_session.id for import_session in import_sessions]
+        logger.info(f"Import en masse lancé: sessions {session_ids}")
+
+        if background:
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "success": True,
+                    "import_session_ids": session_ids,
+                    "progress_urls": [f"/api/import-sessions/{session_id}/progress" for session_id in session_ids]
+                }
+            )
+
+        results = await asyncio.wrap_future(job)
+        total_imported = sum(result["total_imported"] for result in results)
+
+        return {
+            "success": all(result["status"] == 'completed' for result in results),
+            "total_imported": total_imported,
+            "files": results,
+            "message": f"Import terminé: {total_imported} exigences importées depuis {len(results)} classeur(s)"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors de l'import en masse: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ============================================
 # CRUD Requirements
 # ============================================
 
 @app.get("/api/requirements", response_model=List[RequirementResponse])
 async def get_requirements(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Récupérer la liste des exigences"""
-    query = db.query(Requirement)
-    
+    """
+    Récupérer la liste des exigences (triées par id)
+
+    Pagination par curseur: la réponse porte l'en-tête X-Next-Cursor (absent sur la
+    dernière page) à renvoyer en paramètre `cursor`. `skip` reste accepté pour
+    compatibilité mais son coût croît avec la profondeur. Avec include_total=true,
+    l'en-tête X-Total-Count donne le total (estimé pour une grande table sans filtre).
+    """
+    query = select(Requirement)
+
     if status:
-        query = query.filter(Requirement.analysis_status == status)
-    
-    requirements = query.offset(skip).limit(limit).all()
+        query = query.where(Requirement.analysis_status == status)
+
+    if include_total:
+        count_query = select(func.count()).select_from(query.subquery())
+        total = await db.run_sync(
+            lambda s: total_count(s, "requirements", {"status": status}, lambda: s.scalar(count_query))
+        )
+        response.headers["X-Total-Count"] = str(total)
+
+    query = query.order_by(Requirement.id)
+    if cursor:
+        query = query.where(keyset_filter([Requirement.id], decode_cursor(cursor, [int])))
+    elif skip:
+        query = query.offset(skip)
+
+    requirements = (await db.scalars(query.limit(limit))).all()
+
+    cursor_next = next_cursor(requirements, limit, lambda r: [r.id])
+    if cursor_next:
+        response.headers["X-Next-Cursor"] = cursor_next
+
     return requirements
 
 @app.get("/api/requirements/{requirement_id}", response_model=RequirementResponse)
-async def get_requirement(requirement_id: int, db: Session = Depends(get_db)):
+async def get_requirement(requirement_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupérer une exigence spécifique"""
-    requirement = db.query(Requirement).filter(Requirement.id == requirement_id).first()
+    requirement = await db.get(Requirement, requirement_id)
     
     if not requirement:
         raise HTTPException(status_code=404, detail="Exigence non trouvée")
@@ -326,23 +482,24 @@ async def get_requirement(requirement_id: int, db: Session = Depends(get_db)):
 @app.post("/api/requirements", response_model=RequirementResponse)
 async def create_requirement(
     requirement: RequirementCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Créer une nouvelle exigence manuellement"""
     db_requirement = Requirement(**requirement.dict())
     db.add(db_requirement)
-    db.commit()
-    db.refresh(db_requirement)
+    await db.commit()
+    invalidate_stats()
+    await db.refresh(db_requirement)
     return db_requirement
 
 @app.put("/api/requirements/{requirement_id}", response_model=RequirementResponse)
 async def update_requirement(
     requirement_id: int,
     requirement: RequirementCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mettre à jour une exigence"""
-    db_requirement = db.query(Requirement).filter(Requirement.id == requirement_id).first()
+    db_requirement = await db.get(Requirement, requirement_id)
     
     if not db_requirement:
         raise HTTPException(status_code=404, detail="Exigence non trouvée")
@@ -350,20 +507,22 @@ async def update_requirement(
     for key, value in requirement.dict().items():
         setattr(db_requirement, key, value)
     
-    db.commit()
-    db.refresh(db_requirement)
+    await db.commit()
+    invalidate_stats()
+    await db.refresh(db_requirement)
     return db_requirement
 
 @app.delete("/api/requirements/{requirement_id}")
-async def delete_requirement(requirement_id: int, db: Session = Depends(get_db)):
+async def delete_requirement(requirement_id: int, db: AsyncSession = Depends(get_async_db)):
     """Supprimer une exigence"""
-    db_requirement = db.query(Requirement).filter(Requirement.id == requirement_id).first()
+    db_requirement = await db.get(Requirement, requirement_id)
     
     if not db_requirement:
         raise HTTPException(status_code=404, detail="Exigence non trouvée")
     
-    db.delete(db_requirement)
-    db.commit()
+    await db.delete(db_requirement)
+    await db.commit()
+    invalidate_stats()
     return {"message": "Exigence supprimée"}
 
 # ============================================
@@ -387,7 +546,7 @@ async def find_similar_controls(
             raise HTTPException(status_code=404, detail="Aucun contrôle SCF trouvé dans la base")
         
         # Utiliser le service ML pour trouver les similarités
-        results = ml_service.find_similar_controls(
+        results = get_ml_service().find_similar_controls(
             requirement_text=request.requirement_text,
             controls=scf_controls,
             top_k=request.top_k or 5
@@ -427,15 +586,16 @@ async def analyze_batch(
         if not scf_controls:
             raise HTTPException(status_code=404, detail="Aucun contrôle SCF trouvé")
 
-        # Traiter chaque requirement avec les données déjà chargées
-        for requirement in requirements:
-            # Trouver les contrôles similaires
-            similar = ml_service.find_similar_controls(
-                requirement_text=requirement.requirement,
-                controls=scf_controls,  # Utiliser les contrôles déjà chargés
-                top_k=3
-            )
+        # OPTIMISATION: Encoder toutes les exigences en une seule passe (batchs par longueur)
+        all_similar = get_ml_service().find_similar_controls_batch(
+            requirement_texts=[r.requirement for r in requirements],
+            controls=scf_controls,  # Utiliser les contrôles déjà chargés
+            top_k=3,
+            requirement_ids=[r.id for r in requirements]
+        )
 
+        # Traiter chaque requirement avec les données déjà chargées
+        for requirement, similar in zip(requirements, all_similar):
             if similar:
                 # Créer un mapping avec le meilleur match
                 best_match = similar[0]
@@ -458,6 +618,7 @@ async def analyze_batch(
                 })
         
         db.commit()
+        invalidate_stats()
         
         return {
             "success": True,
@@ -481,6 +642,8 @@ async def save_claude_results(
     """
     Sauvegarder les résultats Claude depuis le navigateur
     Crée ou utilise une session d'import existante
+
+    Exigences puis mappings insérés en masse (deux instructions), dans une seule transaction
     """
     try:
         results = data.get('results', [])
@@ -504,67 +667,57 @@ async def save_claude_results(
             db.add(import_session)
             db.flush()
 
-        saved_count = 0
-        skipped_count = 0
-
+        # Une ligne par clé (original_id, source_file): la première occurrence du lot l'emporte
+        results_by_id = {}
         for result in results:
-            try:
-                original_id_val = result.get('id', '')
-
-                # Vérifier si l'exigence existe déjà
-                existing = db.query(Requirement).filter(
-                    Requirement.original_id == original_id_val,
-                    Requirement.source_file == filename
-                ).first()
-
-                if existing:
-                    # Skip silencieusement les doublons
-                    logger.debug(f"Skip duplicate requirement: {original_id_val} from {filename}")
-                    skipped_count += 1
-                    continue
-
-                # Créer l'exigence
-                requirement = Requirement(
-                    original_id=original_id_val,
-                    requirement=result.get('requirement', ''),
-                    verification_point=result.get('verificationPoint'),
-                    source_file=filename,
-                    source_sheet='Claude Results',
-                    analysis_status='analyzed',
-                    import_session_id=import_session.id
-                )
-
-                db.add(requirement)
-                db.flush()  # Pour obtenir l'ID
-
-                # Créer le mapping
-                mapping = ComplianceMapping(
-                    requirement_id=requirement.id,
-                    scf_mapping=result.get('scfMapping'),
-                    iso27001_mapping=result.get('iso27001Mapping'),
-                    iso27002_mapping=result.get('iso27002Mapping'),
-                    cobit5_mapping=result.get('cobit5Mapping'),
-                    confidence_score=0.95,  # Claude = haute confiance
-                    mapping_source='claude',
-                    analysis=result.get('analysis', ''),
-                    # Champs enrichis (agentive analysis)
-                    threat=result.get('threat'),
-                    risk=result.get('risk'),
-                    control_implementation=result.get('controlImplementation'),
-                    import_session_id=import_session.id
-                )
-
-                db.add(mapping)
-                saved_count += 1
+            original_id_val = '' if result.get('id') is None else str(result['id'])
+            results_by_id.setdefault(original_id_val, result)
+
+        # Exigences en une instruction: la base ignore celles déjà présentes (ON CONFLICT)
+        # et renvoie l'id des exigences créées (RETURNING)
+        inserted = insert_requirements(db, [
+            {
+                'original_id': original_id_val,
+                'requirement': result.get('requirement', ''),
+                'verification_point': result.get('verificationPoint'),
+                'source_file': filename,
+                'source_sheet': 'Claude Results',
+                'analysis_status': 'analyzed',
+                'import_session_id': import_session.id
+            }
+            for original_id_val, result in results_by_id.items()
+        ])
+
+        # Mappings des exigences créées, en une instruction
+        insert_compliance_mappings(db, [
+            {
+                'requirement_id': requirement_id,
+                'scf_mapping': results_by_id[original_id_val].get('scfMapping'),
+                'iso27001_mapping': results_by_id[original_id_val].get('iso27001Mapping'),
+                'iso27002_mapping': results_by_id[original_id_val].get('iso27002Mapping'),
+                'cobit5_mapping': results_by_id[original_id_val].get('cobit5Mapping'),
+                'confidence_score': 0.95,  # Claude = haute confiance
+                'mapping_source': 'claude',
+                'analysis': results_by_id[original_id_val].get('analysis', ''),
+                # Champs enrichis (agentive analysis)
+                'threat': results_by_id[original_id_val].get('threat'),
+                'risk': results_by_id[original_id_val].get('risk'),
+                'control_implementation': results_by_id[original_id_val].get('controlImplementation'),
+                'is_active': True,
+                'import_session_id': import_session.id
+            }
+            for requirement_id, original_id_val in inserted
+        ])
 
-            except Exception as e:
-                logger.error(f"Erreur lors de la sauvegarde de l'exigence {result.get('id')}: {e}")
-                continue
+        saved_count = len(inserted)
+        # Doublons: déjà en base ou répétés dans le lot
+        skipped_count = len(results) - saved_count
 
         # Mettre à jour la session
         import_session.status = 'completed'
         import_session.total_requirements = saved_count
         db.commit()
+        invalidate_stats()
 
         logger.info(f"OK - {saved_count} resultats Claude sauvegardes, {skipped_count} doublons skippés (Session ID: {import_session.id})")
 
@@ -580,6 +733,8 @@ async def save_claude_results(
             "message": message
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Erreur lors de la sauvegarde: {e}")
@@ -595,30 +750,54 @@ async def get_import_sessions(
     offset: int = 0,
     status: Optional[str] = None,
     analysis_source: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Récupérer la liste des imports passés avec filtres
+
+    Pagination par curseur sur (import_date, id): renvoyer `next_cursor` en paramètre
+    `cursor` pour la page suivante (null sur la dernière page). `offset` reste accepté
+    pour compatibilité. Le total n'est calculé qu'avec include_total=true.
     """
     try:
-        query = db.query(ImportSession)
+        query = select(ImportSession)
 
         # Filtres
         if status:
-            query = query.filter(ImportSession.status == status)
+            query = query.where(ImportSession.status == status)
         if analysis_source:
-            query = query.filter(ImportSession.analysis_source == analysis_source)
+            query = query.where(ImportSession.analysis_source == analysis_source)
 
-        # Tri par date décroissante (plus récent en premier)
-        query = query.order_by(ImportSession.import_date.desc())
+        total = None
+        if include_total:
+            count_query = select(func.count()).select_from(query.subquery())
+            total = await db.run_sync(lambda s: total_count(
+                s, "import_sessions",
+                {"status": status, "analysis_source": analysis_source},
+                lambda: s.scalar(count_query)
+            ))
+
+        # Tri par date décroissante (plus récent en premier), id pour départager
+        query = query.order_by(ImportSession.import_date.desc(), ImportSession.id.desc())
 
         # Pagination
-        total = query.count()
-        sessions = query.offset(offset).limit(limit).all()
+        if cursor:
+            query = query.where(keyset_filter(
+                [ImportSession.import_date, ImportSession.id],
+                decode_cursor(cursor, [datetime, int]),
+                descending=True
+            ))
+        elif offset:
+            query = query.offset(offset)
+
+        sessions = (await db.scalars(query.limit(limit))).all()
 
         return {
             "success": True,
             "total": total,
+            "next_cursor": next_cursor(sessions, limit, lambda s: [s.import_date, s.id]),
             "sessions": [
                 {
                     "id": s.id,
@@ -628,6 +807,9 @@ async def get_import_sessions(
                     "total_requirements": s.total_requirements,
                     "analysis_source": s.analysis_source,
                     "status": s.status,
+                    "rows_parsed": s.rows_parsed,
+                    "rows_inserted": s.rows_inserted,
+                    "error": s.error_message,
                     "tags": s.tags,
                     "metadata": s.session_metadata
                 }
@@ -635,70 +817,54 @@ async def get_import_sessions(
             ]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des sessions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/import-sessions/{session_id}/progress")
+async def stream_import_session_progress(session_id: int):
+    """
+    Suivre la progression d'un import (Server-Sent Events)
+    Événements 'progress' (statut, lignes lues/insérées, détail par feuille) puis 'done'
+    """
+    loop = asyncio.get_running_loop()
+    if await loop.run_in_executor(executor, read_progress, session_id) is None:
+        raise HTTPException(status_code=404, detail="Session d'import non trouvée")
+
+    return StreamingResponse(
+        stream_progress(session_id, executor),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Désactiver le buffering nginx
+        }
+    )
+
+
 @app.get("/api/import-sessions/{session_id}/results")
 async def get_import_session_results(
     session_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Charger les résultats d'un import spécifique
+    Une requête pour la session, une pour les exigences et leur mapping actif
     """
     try:
         # Vérifier que la session existe
-        session = db.query(ImportSession).filter(ImportSession.id == session_id).first()
+        session = await db.get(ImportSession, session_id)
         if not session:
             raise HTTPException(status_code=404, detail=f"Session {session_id} introuvable")
 
-        # Récupérer toutes les exigences de cette session avec leurs mappings
-        requirements = db.query(Requirement).filter(
-            Requirement.import_session_id == session_id
-        ).all()
-
-        # Formater les résultats
-        results = []
-        for req in requirements:
-            # Récupérer le mapping actif
-            mapping = db.query(ComplianceMapping).filter(
-                ComplianceMapping.requirement_id == req.id,
-                ComplianceMapping.is_active == True,
-                ComplianceMapping.import_session_id == session_id
-            ).first()
-
-            result = {
-                "id": req.original_id or str(req.id),
-                "requirement": req.requirement,
-                "verificationPoint": req.verification_point,
-                "scfMapping": mapping.scf_mapping if mapping else None,
-                "iso27001Mapping": mapping.iso27001_mapping if mapping else None,
-                "iso27002Mapping": mapping.iso27002_mapping if mapping else None,
-                "cobit5Mapping": mapping.cobit5_mapping if mapping else None,
-                "analysis": mapping.analysis if mapping else None,
-                "confidenceScore": float(mapping.confidence_score) if mapping and mapping.confidence_score else None,
-                "mappingSource": mapping.mapping_source if mapping else None,
-                # Champs enrichis (agentive analysis)
-                "threat": mapping.threat if mapping else None,
-                "risk": mapping.risk if mapping else None,
-                "controlImplementation": mapping.control_implementation if mapping else None
-            }
-            results.append(result)
+        # Exigences et mapping actif en une seule requête (LEFT JOIN, sans objets ORM)
+        results = list(iter_result_dicts(await db.execute(session_results_statement(session_id))))
 
         return {
             "success": True,
-            "session": {
-                "id": session.id,
-                "filename": session.filename,
-                "source_sheet": session.source_sheet,
-                "import_date": session.import_date.isoformat() if session.import_date else None,
-                "total_requirements": session.total_requirements,
-                "analysis_source": session.analysis_source,
-                "status": session.status,
-                "tags": session.tags
-            },
+            "session": session_summary(session),
             "results": results
         }
 
@@ -709,28 +875,45 @@ async def get_import_session_results(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/import-sessions/{session_id}/results/stream")
+async def stream_import_session_results(
+    session_id: int,
+    format: str = Query('ndjson', pattern='^(ndjson|json)$'),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Charger les résultats d'un import en flux (grandes sessions)
+    - format=ndjson: un résultat JSON par ligne
+    - format=json: même document que /results, écrit au fil de la lecture
+
+    Les lignes sont lues par un curseur serveur: mémoire constante et premier octet
+    envoyé sans attendre la fin de la requête.
+    """
+    session = await db.get(ImportSession, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} introuvable")
+
+    return StreamingResponse(
+        stream_session_results(session_id, session_summary(session), format),
+        media_type="application/x-ndjson" if format == 'ndjson' else "application/json"
+    )
+
+
 # ============================================
 # Statistics
 # ============================================
 
 @app.get("/api/stats")
-async def get_statistics(db: Session = Depends(get_db)):
-    """Récupérer les statistiques globales"""
-    total_requirements = db.query(Requirement).count()
-    analyzed = db.query(Requirement).filter(Requirement.analysis_status == 'analyzed').count()
-    pending = db.query(Requirement).filter(Requirement.analysis_status == 'pending').count()
-    manual = db.query(Requirement).filter(Requirement.analysis_status == 'manual').count()
-    
-    total_mappings = db.query(ComplianceMapping).filter(ComplianceMapping.is_active == True).count()
-    
-    return {
-        "total_requirements": total_requirements,
-        "analyzed": analyzed,
-        "pending": pending,
-        "manual": manual,
-        "total_mappings": total_mappings,
-        "completion_rate": (analyzed + manual) / total_requirements * 100 if total_requirements > 0 else 0
-    }
+async def get_statistics(by_session: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """
+    Récupérer les statistiques globales
+    Une requête agrégée, mise en cache (STATS_CACHE_TTL) et invalidée par les écritures
+    Avec by_session=true, ajoute le détail par session d'import (`sessions`)
+    """
+    stats = await get_stats_async(db)
+    if by_session:
+        return stats
+    return {key: value for key, value in stats.items() if key != "sessions"}
 
 if __name__ == "__main__":
     import uvicorn
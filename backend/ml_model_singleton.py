@@ -2,12 +2,23 @@
 Singleton pour le modèle ML partagé
 Évite de charger le modèle plusieurs fois en mémoire (400 MB)
 Thread-safe avec lock
+Charge en priorité le bundle local du modèle (voir model_bundle.py)
 """
 
+import os
+
+# Mode hors-ligne strict: aucune résolution via le hub HF (doit précéder l'import de transformers)
+ML_OFFLINE = os.getenv('ML_OFFLINE', 'false').lower() == 'true'
+if ML_OFFLINE:
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
 from sentence_transformers import SentenceTransformer
 from loguru import logger
 import threading
-from typing import Optional
+from typing import Dict, Optional
+
+from model_bundle import ModelBundleError, find_model_bundle, load_model_bundle
 
 
 class MLModelSingleton:
@@ -16,8 +27,11 @@ class MLModelSingleton:
     """
     _instance: Optional['MLModelSingleton'] = None
     _lock = threading.Lock()
-    _model: Optional[SentenceTransformer] = None
-    _model_name = 'paraphrase-multilingual-mpnet-base-v2'
+    _models: Dict[str, SentenceTransformer] = {}
+    # Modèle actif (peut être remplacé à chaud, voir model_swap.py)
+    _model_name = os.getenv('ML_MODEL_NAME', 'paraphrase-multilingual-mpnet-base-v2')
+    # Modèle léger pour le premier niveau de la cascade (MiniLM multilingue)
+    _fast_model_name = os.getenv('ML_FAST_MODEL_NAME', 'paraphrase-multilingual-MiniLM-L12-v2')
 
     def __new__(cls):
         if cls._instance is None:
@@ -27,37 +41,78 @@ class MLModelSingleton:
                     cls._instance = super().__new__(cls)
         return cls._instance
 
-    def get_model(self) -> SentenceTransformer:
+    def get_model(self, model_name: Optional[str] = None) -> SentenceTransformer:
         """
-        Récupère le modèle ML (chargement lazy avec lock)
+        Récupère un modèle ML (chargement lazy avec lock)
+
+        Args:
+            model_name: Nom du modèle (défaut: modèle principal)
 
         Returns:
             Instance du modèle Sentence-Transformers
         """
-        if self._model is None:
+        name = model_name or self._model_name
+        model = self._models.get(name)
+        if model is None:
             with self._lock:
                 # Double-check locking
-                if self._model is None:
-                    logger.info(f"🤖 Chargement du modèle ML partagé: {self._model_name}")
+                model = self._models.get(name)
+                if model is None:
+                    logger.info(f"🤖 Chargement du modèle ML partagé: {name}")
                     logger.info("   (Ce chargement ne se produira qu'une seule fois)")
                     try:
-                        self._model = SentenceTransformer(self._model_name)
-                        logger.info(f"✅ Modèle ML chargé avec succès ({self._model_name})")
-                        logger.info(f"   Dimensions: {self._model.get_sentence_embedding_dimension()}")
+                        # Priorité au bundle local versionné (pas d'accès réseau, poids mmap)
+                        bundle_dir = find_model_bundle(name)
+                        if bundle_dir is not None:
+                            model = load_model_bundle(bundle_dir)
+                        elif ML_OFFLINE:
+                            raise ModelBundleError(
+                                f"Mode hors-ligne: aucun bundle local pour {name} "
+                                f"(python model_bundle.py build --model {name})"
+                            )
+                        else:
+                            model = SentenceTransformer(name)
+                        self._models[name] = model
+                        logger.info(f"✅ Modèle ML chargé avec succès ({name})")
+                        logger.info(f"   Dimensions: {model.get_sentence_embedding_dimension()}")
                     except Exception as e:
                         logger.error(f"❌ Erreur lors du chargement du modèle: {e}")
                         raise
-        return self._model
+        return model
+
+    def set_active_model(self, model_name: str) -> None:
+        """
+        Définit le modèle actif (doit déjà être chargé pour éviter un démarrage à froid)
+
+        Args:
+            model_name: Nom du nouveau modèle principal
+        """
+        with self._lock:
+            previous = self._model_name
+            self._model_name = model_name
+        logger.info(f"🔀 Modèle actif: {previous} → {model_name}")
+
+    def release_model(self, model_name: str) -> None:
+        """Libère un modèle qui n'est plus utilisé (les requêtes en cours gardent leur référence)"""
+        with self._lock:
+            if model_name != self._model_name and model_name != self._fast_model_name:
+                if self._models.pop(model_name, None) is not None:
+                    logger.info(f"🗑️ Modèle libéré: {model_name}")
 
     @property
     def model_name(self) -> str:
         """Retourne le nom du modèle"""
         return self._model_name
 
+    @property
+    def fast_model_name(self) -> str:
+        """Retourne le nom du modèle léger (cascade)"""
+        return self._fast_model_name
+
     @property
     def is_loaded(self) -> bool:
         """Vérifie si le modèle est déjà chargé"""
-        return self._model is not None
+        return self._model_name in self._models
 
 
 # Instance globale du singleton
@@ -74,11 +129,39 @@ def get_shared_ml_model() -> SentenceTransformer:
     return _ml_model_singleton.get_model()
 
 
+def get_ml_model(model_name: Optional[str] = None) -> SentenceTransformer:
+    """
+    Récupère un modèle ML partagé par son nom (singleton par modèle)
+
+    Args:
+        model_name: Nom du modèle (défaut: modèle principal)
+
+    Returns:
+        Instance du modèle Sentence-Transformers
+    """
+    return _ml_model_singleton.get_model(model_name)
+
+
 def get_model_name() -> str:
     """Retourne le nom du modèle utilisé"""
     return _ml_model_singleton.model_name
 
 
+def set_active_model(model_name: str) -> None:
+    """Remplace le modèle principal actif"""
+    _ml_model_singleton.set_active_model(model_name)
+
+
+def release_model(model_name: str) -> None:
+    """Libère un modèle inactif de la mémoire"""
+    _ml_model_singleton.release_model(model_name)
+
+
+def get_fast_model_name() -> str:
+    """Retourne le nom du modèle léger utilisé par la cascade"""
+    return _ml_model_singleton.fast_model_name
+
+
 def is_model_loaded() -> bool:
     """Vérifie si le modèle est déjà chargé en mémoire"""
     return _ml_model_singleton.is_loaded
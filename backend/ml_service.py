@@ -5,17 +5,80 @@ Utilise Sentence-Transformers pour la similarité sémantique
 
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import numpy as np
 from loguru import logger
 import os
 import pickle
+import threading
 from pathlib import Path
 
+from chunk_index import ChunkIndex, chunk_texts
 from models import SCFControl
 from schemas import SimilaritySearchResponse
-from ml_model_singleton import get_shared_ml_model, get_model_name
+from ml_model_singleton import get_ml_model, get_model_name, get_fast_model_name
 from cache_config import CacheConfig
+from cache_manager import content_hash, get_cache_manager
+from embedding_pipeline import encode_texts
+from embedding_store import encode_with_store
+
+
+# Cascade rapide/précise (optionnelle): le modèle léger classe tous les contrôles,
+# le modèle principal n'est sollicité que si l'écart top-1/top-2 est trop faible
+CASCADE_ENABLED = os.getenv('ML_CASCADE_ENABLED', 'false').lower() == 'true'
+CASCADE_MARGIN = float(os.getenv('ML_CASCADE_MARGIN', '0.05'))
+CASCADE_SHORTLIST_SIZE = int(os.getenv('ML_CASCADE_SHORTLIST', '20'))
+# Paires scorées par les deux modèles avant de calibrer les scores du modèle léger
+CASCADE_CALIBRATION_PAIRS = int(os.getenv('ML_CASCADE_CALIBRATION_PAIRS', '200'))
+
+# Stockage de l'index des contrôles: 'memory' (cache .npz, défaut) ou 'pgvector'
+# (tables vector en base, voir vector_store.py et database/migration_pgvector.sql)
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'memory').lower()
+
+
+class ScoreCalibration:
+    """
+    Calibration affine des scores du modèle léger sur l'échelle du modèle principal
+    Moindres carrés sur les paires (exigence, contrôle) scorées par les deux modèles,
+    cumulées au fil des recherches. Les paires viennent des shortlists (scores hauts):
+    la conversion est bornée à la plage des scores légers observés, sans extrapolation
+    """
+
+    def __init__(self, min_pairs: int):
+        self.min_pairs = min_pairs
+        self._lock = threading.Lock()
+        self._pairs = 0
+        self._sums = np.zeros(4)  # Σx, Σy, Σx², Σxy (x: score léger, y: score précis)
+        self._x_range = (np.inf, -np.inf)  # Plage des scores légers ajustés
+
+    @property
+    def ready(self) -> bool:
+        return self._pairs >= self.min_pairs
+
+    def add(self, fast_scores: np.ndarray, precise_scores: np.ndarray) -> None:
+        """Ajoute des paires de scores (mêmes exigences, mêmes contrôles)"""
+        x = np.asarray(fast_scores, dtype=np.float64).ravel()
+        y = np.asarray(precise_scores, dtype=np.float64).ravel()
+        if not x.size:
+            return
+        with self._lock:
+            self._pairs += x.size
+            self._sums += (x.sum(), y.sum(), (x * x).sum(), (x * y).sum())
+            self._x_range = (min(self._x_range[0], x.min()), max(self._x_range[1], x.max()))
+
+    def apply(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Convertit des scores du modèle léger (calibration prête uniquement)
+        Scores bornés à la plage ajustée (conversion affine, ordre conservé dans la plage)
+        """
+        with self._lock:
+            n = self._pairs
+            sx, sy, sxx, sxy = self._sums
+            x_range = self._x_range
+        variance = n * sxx - sx * sx
+        slope = (n * sxy - sx * sy) / variance if variance > 1e-12 else 1.0
+        intercept = (sy - slope * sx) / n
+        return np.clip(slope * np.clip(scores, *x_range) + intercept, -1.0, 1.0).astype(scores.dtype)
 
 
 class MLMappingService:
@@ -24,27 +87,38 @@ class MLMappingService:
     Utilise un modèle ML singleton partagé pour économiser la mémoire
     """
 
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None, cascade: Optional[bool] = None):
         """
         Initialise le service ML (utilise le modèle singleton partagé)
+
+        Args:
+            model_name: Modèle à utiliser (défaut: modèle principal)
+            cascade: Activer la cascade rapide/précise (défaut: ML_CASCADE_ENABLED)
         """
         # Utiliser le singleton au lieu de charger un nouveau modèle
         logger.info("🔗 Initialisation du service ML (utilisation du modèle partagé)")
 
         # Le modèle sera chargé en lazy loading lors du premier appel
         self._model = None
-        self.model_name = get_model_name()
+        self.model_name = model_name or get_model_name()
 
-        # Cache pour les embeddings des contrôles SCF (centralisé)
+        # Cache pour les embeddings des contrôles SCF (centralisé, versionné par modèle)
         self.cache_dir = CacheConfig.get_cache_dir()
-        self.embeddings_cache_file = CacheConfig.get_scf_embeddings_cache()
+        self.cache_manager = get_cache_manager()
+        self.cache_key = CacheConfig.get_scf_embeddings_cache_key(self.model_name)
+        self.embeddings_cache_file = self.cache_manager.path(self.cache_key)
         logger.info(f"📁 Cache directory: {self.cache_dir}")
 
-        # Cache en mémoire
-        self._scf_embeddings_cache: Dict[str, np.ndarray] = {}
-        self._scf_controls_cache: List[SCFControl] = []
+        # Index en mémoire: segments des contrôles + position de chaque contrôle
+        # (remplacés ensemble en une affectation)
+        self._control_index: Optional[Tuple[ChunkIndex, Dict[str, int]]] = None
+
+        # Cascade: le niveau rapide est un service dédié avec son propre index
+        self.cascade_enabled = CASCADE_ENABLED if cascade is None else cascade
+        self._fast_tier: Optional['MLMappingService'] = None
+        self._fast_calibration = ScoreCalibration(CASCADE_CALIBRATION_PAIRS)
 
-        logger.info(f"✅ Service ML initialisé (modèle: {self.model_name})")
+        logger.info(f"✅ Service ML initialisé (modèle: {self.model_name}, cascade: {self.cascade_enabled})")
 
     @property
     def model(self) -> SentenceTransformer:
@@ -52,9 +126,18 @@ class MLMappingService:
         Propriété pour accéder au modèle partagé (lazy loading)
         """
         if self._model is None:
-            self._model = get_shared_ml_model()
+            self._model = get_ml_model(self.model_name)
         return self._model
 
+    @property
+    def fast_tier(self) -> 'MLMappingService':
+        """
+        Service du niveau rapide de la cascade (modèle léger, lazy loading)
+        """
+        if self._fast_tier is None:
+            self._fast_tier = MLMappingService(model_name=get_fast_model_name(), cascade=False)
+        return self._fast_tier
+
 
     def encode_text(self, text: str) -> np.ndarray:
         """
@@ -74,23 +157,24 @@ class MLMappingService:
             raise
 
 
-    def encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    def encode_batch(self, texts: List[str], max_batch_size: Optional[int] = None) -> np.ndarray:
         """
         Encode un lot de textes en embeddings
+        Utilise le pipeline partagé (déduplication + batchs par longueur de tokens)
 
         Args:
             texts: Liste de textes à encoder
-            batch_size: Taille des batchs pour l'encodage
+            max_batch_size: Taille maximale des batchs (défaut: ML_MAX_BATCH_SIZE)
 
         Returns:
             Matrice numpy (n_texts, 768)
         """
         try:
-            embeddings = self.model.encode(
+            embeddings = encode_texts(
+                self.model,
                 texts,
-                convert_to_numpy=True,
-                batch_size=batch_size,
-                show_progress_bar=True
+                max_batch_size=max_batch_size,
+                show_progress=True
             )
             return embeddings
         except Exception as e:
@@ -98,6 +182,23 @@ class MLMappingService:
             raise
 
 
+    def encode_requirements(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode des textes d'exigences par segments: une exigence trop longue pour le
+        modèle est découpée (chunk_texts) au lieu d'être tronquée. Les embeddings de
+        segments déjà calculés par ce modèle (table requirement_embeddings) sont
+        réutilisés, seuls les segments nouveaux passent par le modèle
+
+        Args:
+            texts: Textes des exigences
+
+        Returns:
+            Tuple (embeddings des segments (n_segments, 768), exigence de chaque segment)
+        """
+        segments, owners = chunk_texts(self.model, texts)
+        return encode_with_store(self.model_name, segments, self.encode_batch), owners
+
+
     def compute_similarity(
         self,
         requirement_embedding: np.ndarray,
@@ -127,9 +228,42 @@ class MLMappingService:
             raise
 
 
+    @staticmethod
+    def _control_texts(controls: List[SCFControl]) -> List[str]:
+        """Textes encodés pour chaque contrôle (titre + description pour plus de contexte)"""
+        texts = []
+        for control in controls:
+            text = f"{control.control_title}"
+            if control.control_description:
+                text += f" {control.control_description}"
+            texts.append(text)
+        return texts
+
+    @staticmethod
+    def _control_segments(controls: List[SCFControl]) -> Tuple[List[str], List[str]]:
+        """
+        Descriptions et préfixes (titres) des contrôles pour ChunkIndex: une description
+        trop longue pour le modèle est découpée en segments préfixés par le titre au lieu
+        d'être tronquée; un contrôle court reste un segment identique à _control_texts
+        """
+        bodies = [control.control_description or '' for control in controls]
+        prefixes = [f"{control.control_title}" for control in controls]
+        return bodies, prefixes
+
+    @staticmethod
+    def _controls_content_hash(controls: List[SCFControl], texts: List[str]) -> str:
+        """Empreinte des contrôles indexés (identifiants + textes encodés)"""
+        return content_hash(f"{control.control_id}\t{text}" for control, text in zip(controls, texts))
+
+    def _set_control_index(self, control_ids: List[str], control_index: ChunkIndex) -> None:
+        """Remplace l'index en mémoire"""
+        self._control_index = (control_index, {control_id: i for i, control_id in enumerate(control_ids)})
+
+
     def cache_scf_embeddings(self, controls: List[SCFControl]) -> None:
         """
         Pré-calcule et met en cache les embeddings des contrôles SCF
+        (index multi-vecteurs: un ou plusieurs segments par contrôle)
 
         Args:
             controls: Liste des contrôles SCF
@@ -137,106 +271,237 @@ class MLMappingService:
         logger.info(f"📦 Mise en cache des embeddings pour {len(controls)} contrôles SCF...")
 
         try:
-            # Préparer les textes à encoder
-            texts = []
-            for control in controls:
-                # Combiner titre + description pour plus de contexte
-                text = f"{control.control_title}"
-                if control.control_description:
-                    text += f" {control.control_description}"
-                texts.append(text)
-
-            # Encoder tous les textes
-            embeddings = self.encode_batch(texts)
-
-            # Préparer les données pour le cache
+            bodies, prefixes = self._control_segments(controls)
+            control_index = ChunkIndex.build(self.model, bodies, prefixes)
             control_ids = [c.control_id for c in controls]
 
-            # Sauvegarder dans le cache en utilisant NumPy (SÉCURISÉ - pas pickle)
-            # Format .npz avec compression pour économiser l'espace
-            np.savez_compressed(
-                self.embeddings_cache_file,
-                embeddings=embeddings,
-                control_ids=np.array(control_ids, dtype=object),
-                model_name=np.array([self.model_name], dtype=object)
+            # Écriture atomique + manifeste (format NumPy sécurisé, pas pickle)
+            self.cache_manager.save(
+                self.cache_key,
+                {
+                    'embeddings': control_index.embeddings,
+                    'owners': control_index.owners,
+                    'control_ids': np.array(control_ids),
+                    'model_name': np.array([self.model_name])
+                },
+                model_name=self.model_name,
+                content_hash=self._controls_content_hash(controls, self._control_texts(controls))
             )
 
             # Mettre en cache en mémoire
-            self._scf_embeddings_cache = {
-                control.control_id: embeddings[i]
-                for i, control in enumerate(controls)
-            }
-            self._scf_controls_cache = controls
+            self._set_control_index(control_ids, control_index)
 
-            logger.info(f"✅ Embeddings mis en cache (NumPy format): {self.embeddings_cache_file}")
+            logger.info(
+                f"✅ Embeddings mis en cache (NumPy format, {control_index.num_chunks} segments): "
+                f"{self.embeddings_cache_file}"
+            )
 
         except Exception as e:
             logger.error(f"❌ Erreur lors de la mise en cache: {e}")
             raise
 
 
-    def load_scf_embeddings_cache(self) -> bool:
+    def load_scf_embeddings_cache(self, expected_hash: Optional[str] = None) -> bool:
         """
-        Charge les embeddings depuis le cache (format NumPy sécurisé)
+        Charge les embeddings depuis le cache (format NumPy sécurisé, checksum vérifié)
+
+        Args:
+            expected_hash: Empreinte attendue des contrôles (None = pas de vérification)
 
         Returns:
             True si le cache a été chargé avec succès
         """
-        if not self.embeddings_cache_file.exists():
-            logger.warning("⚠️ Pas de cache d'embeddings trouvé")
+        arrays = self.cache_manager.load(self.cache_key, self.model_name, expected_hash)
+        if arrays is None:
+            logger.warning("⚠️ Pas de cache d'embeddings valide trouvé")
             return False
 
-        try:
-            # Charger depuis NumPy (SÉCURISÉ - pas pickle)
-            # allow_pickle=False garantit qu'aucun code arbitraire ne peut s'exécuter
-            cache_data = np.load(self.embeddings_cache_file, allow_pickle=False)
-
-            # Extraire les données
-            embeddings = cache_data['embeddings']
-            control_ids = cache_data['control_ids'].tolist()
-            model_name = str(cache_data['model_name'][0])
-
-            # Vérifier que c'est le bon modèle
-            if model_name != self.model_name:
-                logger.warning(f"⚠️ Cache créé avec modèle différent ({model_name} vs {self.model_name})")
-                logger.warning("⚠️ Réinitialisation nécessaire")
-                return False
-
-            # Reconstruire le cache en mémoire
-            self._scf_embeddings_cache = {
-                control_id: embeddings[i]
-                for i, control_id in enumerate(control_ids)
-            }
-
-            logger.info(f"✅ Cache d'embeddings chargé (NumPy): {len(control_ids)} contrôles")
-            return True
+        # Cache d'une version précédente (un seul vecteur tronqué par contrôle): recalcul
+        if 'owners' not in arrays:
+            logger.warning("⚠️ Cache d'embeddings sans segments (ancien format), recalcul nécessaire")
+            return False
 
-        except Exception as e:
-            logger.error(f"❌ Erreur lors du chargement du cache: {e}")
-            logger.warning("💡 Tentative de migration depuis ancien format pickle...")
+        control_ids = arrays['control_ids'].tolist()
+        control_index = ChunkIndex(arrays['embeddings'], arrays['owners'])
+        if control_index.num_owners != len(control_ids):
+            logger.warning(f"⚠️ Cache incohérent ({control_index.num_owners} contrôles pour {len(control_ids)} IDs)")
+            return False
+        self._set_control_index(control_ids, control_index)
 
-            # Tentative de migration depuis l'ancien format pickle (une seule fois)
-            try:
-                import pickle
-                with open(self.embeddings_cache_file, 'rb') as f:
-                    old_cache_data = pickle.load(f)
+        logger.info(
+            f"✅ Cache d'embeddings chargé (NumPy): {len(control_ids)} contrôles, "
+            f"{control_index.num_chunks} segments"
+        )
+        return True
+
+
+    def warm_up(self, controls: List[SCFControl]) -> None:
+        """
+        Prépare l'index des contrôles: recharge le cache disque du modèle s'il correspond
+        aux contrôles, sinon recalcule les embeddings (un seul processus à la fois)
+
+        Args:
+            controls: Liste des contrôles SCF
+        """
+        expected_hash = self._controls_content_hash(controls, self._control_texts(controls))
+        if self.load_scf_embeddings_cache(expected_hash):
+            return
+
+        with self.cache_manager.lock(self.cache_key):
+            # Un autre worker a pu construire le cache pendant l'attente du verrou
+            if self.load_scf_embeddings_cache(expected_hash):
+                return
+
+            logger.info("📦 Création du cache d'embeddings...")
+            self.cache_scf_embeddings(controls)
+
+
+    def _control_scores(self, requirement_segments: Tuple[np.ndarray, np.ndarray], controls: List[SCFControl]) -> np.ndarray:
+        """
+        Similarités cosinus exigences × contrôles, max-sim sur les segments des exigences
+        et des contrôles (crée l'index si nécessaire)
+
+        Args:
+            requirement_segments: Sortie de encode_requirements (embeddings des segments, propriétaires)
+            controls: Liste des contrôles SCF
+
+        Returns:
+            Matrice (n_requirements, n_controls) alignée sur `controls`
+        """
+        # Si pas d'index en mémoire: cache disque du modèle, sinon calcul
+        if self._control_index is None:
+            self.warm_up(controls)
+
+        control_index, positions = self._control_index
+        scores = control_index.score_queries(*requirement_segments)
+        return scores[:, [positions[control.control_id] for control in controls]]
+
+
+    def _rank_controls(
+        self,
+        similarities: np.ndarray,
+        controls: List[SCFControl],
+        top_k: int,
+        min_similarity: float
+    ) -> List[SimilaritySearchResponse]:
+        """
+        Sélectionne les top K contrôles à partir des scores de similarité
 
-                logger.info("📦 Migration du cache pickle vers NumPy...")
+        Args:
+            similarities: Scores de similarité (n_controls,)
+            controls: Liste des contrôles SCF (alignée sur les scores)
+            top_k: Nombre de résultats à retourner
+            min_similarity: Seuil minimal de similarité
+
+        Returns:
+            Liste des contrôles similaires avec scores
+        """
+        top_k_indices = np.argsort(similarities)[-top_k:][::-1]
+
+        results = []
+        for idx in top_k_indices:
+            score = float(similarities[idx])
+
+            # Filtrer par seuil minimal
+            if score < min_similarity:
+                continue
+
+            control = controls[idx]
+
+            results.append(SimilaritySearchResponse(
+                control_id=control.control_id,
+                control_title=control.control_title,
+                control_description=control.control_description,
+                similarity_score=score,
+                domain=control.domain,
+                category=control.category
+            ))
+
+        return results
+
+
+    def _cascade_similarities(
+        self,
+        requirement_texts: List[str],
+        controls: List[SCFControl],
+        top_k: int
+    ) -> np.ndarray:
+        """
+        Calcule les similarités via la cascade rapide/précise
 
-                # Sauvegarder au nouveau format
-                np.savez_compressed(
-                    self.embeddings_cache_file,
-                    embeddings=old_cache_data['embeddings'],
-                    control_ids=np.array(old_cache_data['control_ids'], dtype=object),
-                    model_name=np.array([old_cache_data['model_name']], dtype=object)
-                )
+        Le modèle léger score tous les contrôles. Pour les exigences ambiguës
+        (écart top-1/top-2 < ML_CASCADE_MARGIN), le modèle principal re-score
+        uniquement la shortlist du niveau rapide; les autres contrôles sont exclus.
 
-                logger.info("✅ Migration réussie vers format NumPy sécurisé")
-                return self.load_scf_embeddings_cache()  # Recharger au nouveau format
+        Les scores renvoyés sont sur l'échelle du modèle principal (mêmes seuils et
+        même confidence_score qu'hors cascade). Les exigences évidentes gardent le
+        classement rapide et leurs scores sont convertis par la calibration ajustée sur
+        les paires re-scorées; tant qu'elle n'a pas ML_CASCADE_CALIBRATION_PAIRS paires,
+        leur top-k est re-scoré par le modèle principal.
 
-            except Exception as migration_error:
-                logger.error(f"❌ Migration impossible: {migration_error}")
-                return False
+        Args:
+            requirement_texts: Textes des exigences
+            controls: Liste des contrôles SCF
+            top_k: Nombre de résultats par exigence
+
+        Returns:
+            Matrice de similarités (n_requirements, n_controls)
+        """
+        fast = self.fast_tier
+        similarities = fast._control_scores(fast.encode_requirements(requirement_texts), controls)
+
+        n_requirements, n_controls = similarities.shape
+        if n_controls < 2:
+            hard = np.arange(n_requirements)
+        else:
+            # Écart entre les deux meilleurs scores du niveau rapide
+            top2 = np.partition(similarities, -2, axis=1)[:, -2:]
+            margins = top2[:, 1] - top2[:, 0]
+            hard = np.flatnonzero(margins < CASCADE_MARGIN)
+        easy = np.setdiff1d(np.arange(n_requirements), hard)
+
+        logger.info(
+            f"⚡ Cascade: {easy.size}/{n_requirements} "
+            f"exigences résolues par le modèle rapide ({fast.model_name})"
+        )
+
+        # Shortlist du niveau rapide à re-scorer, par groupe d'exigences
+        groups = [(hard, CASCADE_SHORTLIST_SIZE)] if hard.size else []
+        if easy.size:
+            if self._fast_calibration.ready:
+                similarities[easy] = self._fast_calibration.apply(similarities[easy])
+            else:
+                groups.append((easy, top_k))
+
+        if not groups:
+            return similarities
+
+        # Re-scoring avec le modèle principal (index précis en cache), un seul encodage
+        rows = np.concatenate([group_rows for group_rows, _ in groups])
+        precise = self._control_scores(
+            self.encode_requirements([requirement_texts[i] for i in rows]),
+            controls
+        )
+
+        offset = 0
+        for group_rows, size in groups:
+            group_precise = precise[offset:offset + len(group_rows)]
+            offset += len(group_rows)
+
+            shortlist_size = max(1, min(size, n_controls))
+            shortlists = np.argpartition(-similarities[group_rows], shortlist_size - 1, axis=1)[:, :shortlist_size]
+            precise_scores = np.clip(np.take_along_axis(group_precise, shortlists, axis=1), -1.0, 1.0)
+
+            self._fast_calibration.add(
+                np.take_along_axis(similarities[group_rows], shortlists, axis=1),
+                precise_scores
+            )
+
+            rescored = np.full((len(group_rows), n_controls), -1.0, dtype=similarities.dtype)
+            np.put_along_axis(rescored, shortlists, precise_scores, axis=1)
+            similarities[group_rows] = rescored
+
+        return similarities
 
 
     def find_similar_controls(
@@ -261,52 +526,69 @@ class MLMappingService:
         try:
             logger.info(f"🔍 Recherche de similarité pour: {requirement_text[:100]}...")
 
-            # Encoder l'exigence
-            requirement_embedding = self.encode_text(requirement_text)
+            if self.cascade_enabled:
+                similarities = self._cascade_similarities([requirement_text], controls, top_k)[0]
+            else:
+                # Encoder l'exigence par segments (ou réutiliser leurs embeddings)
+                requirement_segments = self.encode_requirements([requirement_text])
 
-            # Si pas de cache, créer les embeddings
-            if not self._scf_embeddings_cache:
-                logger.info("📦 Création du cache d'embeddings...")
-                self.cache_scf_embeddings(controls)
+                # Calculer les similarités (max-sim sur les segments)
+                similarities = self._control_scores(requirement_segments, controls)[0]
 
-            # Créer la matrice des embeddings
-            control_embeddings = np.array([
-                self._scf_embeddings_cache[control.control_id]
-                for control in controls
-            ])
+            results = self._rank_controls(similarities, controls, top_k, min_similarity)
 
-            # Calculer les similarités
-            similarities = self.compute_similarity(requirement_embedding, control_embeddings)
+            logger.info(f"✅ Trouvé {len(results)} contrôles similaires (score > {min_similarity})")
 
-            # Trouver les top K
-            top_k_indices = np.argsort(similarities)[-top_k:][::-1]
+            return results
 
-            # Créer les résultats
-            results = []
-            for idx in top_k_indices:
-                score = float(similarities[idx])
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la recherche de similarité: {e}")
+            raise
 
-                # Filtrer par seuil minimal
-                if score < min_similarity:
-                    continue
 
-                control = controls[idx]
+    def find_similar_controls_batch(
+        self,
+        requirement_texts: List[str],
+        controls: List[SCFControl],
+        top_k: int = 5,
+        min_similarity: float = 0.3,
+        requirement_ids: Optional[List[int]] = None
+    ) -> List[List[SimilaritySearchResponse]]:
+        """
+        Trouve les contrôles SCF les plus similaires pour un lot d'exigences
+        Les exigences sont encodées en une seule passe via le pipeline partagé
 
-                results.append(SimilaritySearchResponse(
-                    control_id=control.control_id,
-                    control_title=control.control_title,
-                    control_description=control.control_description,
-                    similarity_score=score,
-                    domain=control.domain,
-                    category=control.category
-                ))
+        Args:
+            requirement_texts: Textes des exigences
+            controls: Liste des contrôles SCF disponibles
+            top_k: Nombre de résultats par exigence
+            min_similarity: Seuil minimal de similarité
+            requirement_ids: IDs des exigences en base (stockage pgvector uniquement)
 
-            logger.info(f"✅ Trouvé {len(results)} contrôles similaires (score > {min_similarity})")
+        Returns:
+            Liste (alignée sur requirement_texts) des contrôles similaires
+        """
+        if not requirement_texts:
+            return []
 
-            return results
+        try:
+            logger.info(f"🔍 Recherche de similarité pour {len(requirement_texts)} exigences...")
+
+            if self.cascade_enabled:
+                similarities = self._cascade_similarities(requirement_texts, controls, top_k)
+            else:
+                requirement_segments = self.encode_requirements(requirement_texts)
+
+                # Une seule multiplication matricielle pour tout le lot (segments × segments)
+                similarities = self._control_scores(requirement_segments, controls)
+
+            return [
+                self._rank_controls(row, controls, top_k, min_similarity)
+                for row in similarities
+            ]
 
         except Exception as e:
-            logger.error(f"❌ Erreur lors de la recherche de similarité: {e}")
+            logger.error(f"❌ Erreur lors de la recherche de similarité batch: {e}")
             raise
 
 
@@ -333,14 +615,27 @@ class MLMappingService:
 
         results = []
 
-        for req_id, req_text in requirements:
+        # Encoder toutes les exigences en une seule passe
+        try:
+            all_similar = self.find_similar_controls_batch(
+                requirement_texts=[req_text for _, req_text in requirements],
+                controls=controls,
+                top_k=top_k,
+                requirement_ids=[req_id for req_id, _ in requirements]
+            )
+        except Exception as e:
+            # Une exigence invalide ne doit pas faire échouer tout le lot: recherche unitaire
+            logger.warning(f"⚠️ Échec de la recherche batch ({e}), recherche exigence par exigence")
+            all_similar = [None] * len(requirements)
+
+        for (req_id, req_text), similar_controls in zip(requirements, all_similar):
             try:
-                # Trouver les contrôles similaires
-                similar_controls = self.find_similar_controls(
-                    requirement_text=req_text,
-                    controls=controls,
-                    top_k=top_k
-                )
+                if similar_controls is None:
+                    similar_controls = self.find_similar_controls(
+                        requirement_text=req_text,
+                        controls=controls,
+                        top_k=top_k
+                    )
 
                 if not similar_controls:
                     results.append({
@@ -399,5 +694,40 @@ class MLMappingService:
             'embedding_dimension': self.model.get_sentence_embedding_dimension(),
             'max_sequence_length': self.model.max_seq_length,
             'cache_exists': self.embeddings_cache_file.exists(),
-            'cached_controls': len(self._scf_embeddings_cache)
+            'cached_controls': self._control_index[0].num_owners if self._control_index else 0,
+            'cached_segments': self._control_index[0].num_chunks if self._control_index else 0,
+            'cascade_enabled': self.cascade_enabled,
+            'fast_model_name': get_fast_model_name() if self.cascade_enabled else None,
+            'vector_backend': 'memory'
         }
+
+
+# Instance active (remplacée atomiquement lors d'un changement de modèle)
+_ml_service_instance: Optional[MLMappingService] = None
+
+
+def create_ml_service(model_name: Optional[str] = None) -> MLMappingService:
+    """
+    Crée un service ML avec le stockage d'index configuré (VECTOR_BACKEND)
+
+    Args:
+        model_name: Modèle à utiliser (défaut: modèle principal)
+    """
+    if VECTOR_BACKEND == 'pgvector':
+        from vector_store import PgVectorMappingService  # Import local pour éviter la circularité
+        return PgVectorMappingService(model_name=model_name)
+    return MLMappingService(model_name=model_name)
+
+
+def get_ml_service() -> MLMappingService:
+    """Récupère le service ML actif"""
+    global _ml_service_instance
+    if _ml_service_instance is None:
+        _ml_service_instance = create_ml_service()
+    return _ml_service_instance
+
+
+def set_ml_service(service: MLMappingService) -> None:
+    """Remplace le service ML actif (son index doit être prêt)"""
+    global _ml_service_instance
+    _ml_service_instance = service
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Bundles hors-ligne des modèles Sentence-Transformers
+Empaquète le modèle (poids safetensors, tokenizer, config de pooling) dans un répertoire
+local versionné, chargeable sans accès au hub Hugging Face (nœuds isolés du réseau)
+
+Usage:
+    python model_bundle.py build [--model NOM] [--version VERSION]
+    python model_bundle.py verify [--model NOM] [--version VERSION]
+    python model_bundle.py list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from cache_config import CacheConfig
+
+
+# Manifeste du bundle et pointeur vers la dernière version
+BUNDLE_MANIFEST = 'bundle.json'
+LATEST_POINTER = 'LATEST'
+
+# Version épinglée (sinon: la dernière version construite)
+BUNDLE_VERSION = os.getenv('ML_MODEL_BUNDLE_VERSION')
+
+
+class ModelBundleError(Exception):
+    """Exception levée lorsqu'un bundle est absent ou invalide"""
+    pass
+
+
+def _file_sha256(path: Path) -> str:
+    """Calcule le SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_bundle_root(model_name: str) -> Path:
+    """Retourne le répertoire contenant toutes les versions d'un modèle"""
+    return CacheConfig.get_models_dir() / model_name.replace('/', '_')
+
+
+def find_model_bundle(model_name: str, version: Optional[str] = None) -> Optional[Path]:
+    """
+    Recherche le bundle local d'un modèle
+
+    Args:
+        model_name: Nom du modèle (ex: paraphrase-multilingual-mpnet-base-v2)
+        version: Version explicite (défaut: ML_MODEL_BUNDLE_VERSION, puis LATEST)
+
+    Returns:
+        Chemin du bundle, ou None s'il n'existe pas
+    """
+    root = get_bundle_root(model_name)
+    version = version or BUNDLE_VERSION
+
+    if version is None:
+        pointer = root / LATEST_POINTER
+        if not pointer.exists():
+            return None
+        version = pointer.read_text(encoding='utf-8').strip()
+
+    bundle_dir = root / version
+    if not (bundle_dir / BUNDLE_MANIFEST).exists():
+        return None
+    return bundle_dir
+
+
+def read_bundle_manifest(bundle_dir: Path) -> Dict:
+    """Lit le manifeste d'un bundle"""
+    with open(bundle_dir / BUNDLE_MANIFEST, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_model_bundle(bundle_dir: Path) -> None:
+    """
+    Vérifie l'intégrité d'un bundle (présence et checksum de chaque fichier)
+
+    Raises:
+        ModelBundleError: Si un fichier manque ou est corrompu
+    """
+    manifest = read_bundle_manifest(bundle_dir)
+    for rel_path, expected in manifest['files'].items():
+        path = bundle_dir / rel_path
+        if not path.exists():
+            raise ModelBundleError(f"Fichier manquant dans le bundle: {rel_path}")
+        if _file_sha256(path) != expected:
+            raise ModelBundleError(f"Checksum invalide dans le bundle: {rel_path}")
+
+
+def build_model_bundle(model_name: str, version: Optional[str] = None) -> Path:
+    """
+    Télécharge (ou lit depuis le cache HF) un modèle et l'empaquète en bundle local
+
+    Args:
+        model_name: Nom du modèle sur le hub
+        version: Version du bundle (défaut: horodatage)
+
+    Returns:
+        Chemin du bundle créé
+    """
+    from sentence_transformers import SentenceTransformer
+
+    version = version or datetime.now().strftime('v%Y%m%d-%H%M%S')
+    root = get_bundle_root(model_name)
+    bundle_dir = root / version
+    if bundle_dir.exists():
+        raise ModelBundleError(f"Le bundle existe déjà: {bundle_dir}")
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_dir = root / f".{version}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info(f"📥 Chargement du modèle {model_name}...")
+    model = SentenceTransformer(model_name)
+
+    # Poids au format safetensors (chargement mmap, pas de pickle)
+    logger.info(f"📦 Export du bundle vers {tmp_dir}...")
+    model.save(str(tmp_dir), safe_serialization=True)
+
+    files = sorted(p for p in tmp_dir.rglob('*') if p.is_file())
+    if not any(p.suffix == '.safetensors' for p in files):
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ModelBundleError("Aucun poids safetensors exporté (sentence-transformers trop ancien ?)")
+
+    manifest = {
+        'model_name': model_name,
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'embedding_dimension': model.get_sentence_embedding_dimension(),
+        'max_seq_length': model.max_seq_length,
+        'files': {str(p.relative_to(tmp_dir)): _file_sha256(p) for p in files},
+    }
+    with open(tmp_dir / BUNDLE_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publication atomique: renommage du répertoire puis du pointeur LATEST
+    os.replace(tmp_dir, bundle_dir)
+    pointer_tmp = root / f".{LATEST_POINTER}.tmp"
+    pointer_tmp.write_text(version, encoding='utf-8')
+    os.replace(pointer_tmp, root / LATEST_POINTER)
+
+    size_mb = sum(p.stat().st_size for p in bundle_dir.rglob('*') if p.is_file()) / (1024 * 1024)
+    logger.info(f"✅ Bundle créé: {bundle_dir} ({size_mb:.1f} MB, {len(files)} fichiers)")
+    return bundle_dir
+
+
+def load_model_bundle(bundle_dir: Path, verify: bool = False):
+    """
+    Charge un modèle depuis son bundle local, sans aucun accès réseau
+
+    Un chemin local n'est jamais résolu via le hub; les poids safetensors sont
+    mappés en mémoire par transformers (pas de désérialisation pickle).
+
+    Args:
+        bundle_dir: Répertoire du bundle
+        verify: Vérifier les checksums avant chargement (lent pour les gros modèles)
+
+    Returns:
+        Instance SentenceTransformer
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if verify:
+        verify_model_bundle(bundle_dir)
+
+    manifest = read_bundle_manifest(bundle_dir)
+    logger.info(f"📦 Chargement du bundle local {manifest['model_name']} ({manifest['version']})")
+    return SentenceTransformer(str(bundle_dir))
+
+
+def list_model_bundles() -> List[Dict]:
+    """Liste tous les bundles disponibles localement"""
+    models_dir = CacheConfig.get_models_dir()
+    bundles = []
+    for manifest_path in sorted(models_dir.glob(f'*/*/{BUNDLE_MANIFEST}')):
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        manifest['path'] = str(manifest_path.parent)
+        manifest.pop('files', None)
+        bundles.append(manifest)
+    return bundles
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from ml_model_singleton import get_model_name
+
+    parser = argparse.ArgumentParser(description="Gestion des bundles hors-ligne des modèles ML")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="Empaqueter un modèle en bundle local")
+    build.add_argument('--model', default=get_model_name())
+    build.add_argument('--version', default=None)
+
+    verify = sub.add_parser('verify', help="Vérifier les checksums d'un bundle")
+    verify.add_argument('--model', default=get_model_name())
+    verify.add_argument('--version', default=None)
+
+    sub.add_parser('list', help="Lister les bundles disponibles")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'build':
+            build_model_bundle(args.model, args.version)
+        elif args.command == 'verify':
+            bundle_dir = find_model_bundle(args.model, args.version)
+            if bundle_dir is None:
+                raise ModelBundleError(f"Aucun bundle trouvé pour {args.model}")
+            verify_model_bundle(bundle_dir)
+            logger.info(f"✅ Bundle valide: {bundle_dir}")
+        else:
+            for bundle in list_model_bundles():
+                logger.info(f"• {bundle['model_name']} {bundle['version']} → {bundle['path']}")
+    except ModelBundleError as e:
+        logger.error(f"❌ {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
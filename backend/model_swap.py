@@ -0,0 +1,257 @@
+"""
+Remplacement à chaud du modèle d'embedding (sans interruption de service)
+Construit les index du nouveau modèle en arrière-plan pendant que l'ancien continue
+de répondre, puis bascule modèle et index ensemble
+
+Le modèle choisi est enregistré en base (app_settings): il est réappliqué au
+redémarrage et les autres workers le reprennent à leur tour (vérification toutes les
+ML_MODEL_SYNC_INTERVAL secondes, avec la même construction en arrière-plan)
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from loguru import logger
+
+from database import SessionLocal
+from models import AppSetting, SCFControl
+from ml_model_singleton import get_ml_model, get_model_name, set_active_model, release_model
+from ml_service import create_ml_service, set_ml_service
+
+
+# Clé du modèle actif dans app_settings
+ACTIVE_MODEL_SETTING = 'ml_model_name'
+
+# Intervalle de vérification du modèle choisi par un autre worker (secondes, 0 = désactivé)
+MODEL_SYNC_INTERVAL = float(os.getenv('ML_MODEL_SYNC_INTERVAL', '60'))
+
+
+class ModelSwapError(Exception):
+    """Exception levée lorsqu'un changement de modèle ne peut pas démarrer"""
+    pass
+
+
+def load_persisted_model() -> Optional[str]:
+    """
+    Modèle actif enregistré par le dernier changement de modèle
+
+    Returns:
+        Nom du modèle, None si aucun changement n'a été enregistré
+    """
+    db = SessionLocal()
+    try:
+        setting = db.get(AppSetting, ACTIVE_MODEL_SETTING)
+        return setting.value if setting is not None else None
+    finally:
+        db.close()
+
+
+def persist_active_model(model_name: str) -> None:
+    """Enregistre le modèle actif pour les autres workers et les redémarrages"""
+    db = SessionLocal()
+    try:
+        db.merge(AppSetting(key=ACTIVE_MODEL_SETTING, value=model_name))
+        db.commit()
+    finally:
+        db.close()
+
+
+def apply_persisted_model() -> None:
+    """
+    Au démarrage: reprend le modèle enregistré à la place de ML_MODEL_NAME
+    À appeler avant la création du service ML (aucun index n'est encore construit)
+    """
+    try:
+        model_name = load_persisted_model()
+    except Exception as e:
+        logger.warning(f"⚠️ Modèle enregistré illisible, ML_MODEL_NAME conservé: {e}")
+        return
+
+    if model_name and model_name != get_model_name():
+        logger.info(f"📌 Modèle enregistré par un changement précédent: {model_name}")
+        set_active_model(model_name)
+
+
+class ModelSwapManager:
+    """
+    Orchestre un changement de modèle en arrière-plan
+
+    Étapes: loading_model → building_scf_index → building_mapping_index → swapping
+    Le modèle est enregistré en base après la bascule (voir sync pour les autres workers).
+    Les index sont versionnés par nom de modèle dans le cache: un retour à un
+    modèle déjà utilisé recharge ses index au lieu de les recalculer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict = {'state': 'idle'}
+
+    def status(self) -> Dict:
+        """Retourne l'état courant du changement de modèle"""
+        with self._lock:
+            return dict(self._status)
+
+    def _update(self, **fields) -> None:
+        with self._lock:
+            self._status.update(fields)
+
+    def _report_progress(self, done: int, total: int) -> None:
+        self._update(encoded=done, total=total, progress=round(done / total, 3) if total else 1.0)
+
+    def start(self, model_name: str, persist: bool = True) -> Dict:
+        """
+        Lance la construction des index du nouveau modèle en arrière-plan
+
+        Args:
+            model_name: Modèle cible
+            persist: Enregistrer le modèle après la bascule (False: reprise d'un
+                changement enregistré par un autre worker)
+
+        Returns:
+            État initial du changement
+
+        Raises:
+            ModelSwapError: Si un changement est déjà en cours ou si le modèle est déjà actif
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise ModelSwapError(f"Changement de modèle déjà en cours ({self._status.get('target_model')})")
+
+            current = get_model_name()
+            if model_name == current:
+                raise ModelSwapError(f"Le modèle {model_name} est déjà actif")
+
+            self._status = {
+                'state': 'running',
+                'stage': 'loading_model',
+                'target_model': model_name,
+                'previous_model': current,
+                'progress': 0.0,
+                'encoded': 0,
+                'total': 0,
+                'started_at': datetime.now().isoformat(),
+                'finished_at': None,
+                'error': None,
+            }
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(model_name, current, persist),
+                name='model-swap',
+                daemon=True
+            )
+            self._thread.start()
+            return dict(self._status)
+
+    def _run(self, model_name: str, previous: str, persist: bool) -> None:
+        try:
+            logger.info(f"🔄 Changement de modèle: {previous} → {model_name} (construction en arrière-plan)")
+
+            # 1. Charger le nouveau modèle à côté de l'ancien
+            model = get_ml_model(model_name)
+
+            # 2. Index de la base SCF (recherche /api/scf), seulement si elle est déjà
+            #    chargée: sinon son chargement différé utilisera le nouveau modèle
+            from main import get_loaded_scf_kb
+            kb = get_loaded_scf_kb()
+            scf_index = None
+            if kb is not None:
+                self._update(stage='building_scf_index', progress=0.0)
+                scf_index = kb.build_control_index(model, model_name, progress_callback=self._report_progress)
+
+            # 3. Index du service de mapping (contrôles en base)
+            self._update(stage='building_mapping_index', progress=0.0, encoded=0, total=0)
+            db = SessionLocal()
+            try:
+                controls = db.query(SCFControl).all()
+            finally:
+                db.close()
+
+            service = create_ml_service(model_name)
+            if controls:
+                service.warm_up(controls)
+                if service.cascade_enabled:
+                    service.fast_tier.warm_up(controls)
+
+            # 4. Bascule: chaque consommateur remplace modèle + index en une affectation
+            self._update(stage='swapping', progress=1.0)
+            set_active_model(model_name)
+            if kb is not None and scf_index is not None:
+                kb.activate_semantic_model(model, scf_index, model_name)
+            set_ml_service(service)
+
+            # Base SCF chargée pendant la construction (avec l'ancien modèle)
+            loaded_kb = get_loaded_scf_kb()
+            if loaded_kb is not None and loaded_kb.model_name != model_name:
+                loaded_kb.init_semantic_model()
+            release_model(previous)
+
+            # 5. Enregistrement: autres workers et redémarrages
+            if persist:
+                try:
+                    persist_active_model(model_name)
+                except Exception as e:
+                    logger.error(f"❌ Modèle {model_name} actif sur ce worker uniquement (enregistrement impossible: {e})")
+
+            self._update(state='completed', stage='done', finished_at=datetime.now().isoformat())
+            logger.info(f"✅ Modèle actif: {model_name}")
+
+        except Exception as e:
+            logger.error(f"❌ Échec du changement de modèle vers {model_name}: {e}")
+            # L'ancien modèle n'a jamais cessé de servir
+            release_model(model_name)
+            self._update(state='failed', error=str(e), finished_at=datetime.now().isoformat())
+
+
+    def sync(self) -> None:
+        """
+        Reprend le modèle enregistré en base s'il diffère du modèle actif
+        (changement lancé sur un autre worker). Un modèle dont le chargement a déjà
+        échoué sur ce worker n'est pas retenté.
+        """
+        try:
+            model_name = load_persisted_model()
+        except Exception as e:
+            logger.warning(f"⚠️ Vérification du modèle enregistré impossible: {e}")
+            return
+
+        if not model_name or model_name == get_model_name():
+            return
+
+        status = self.status()
+        if status.get('state') == 'failed' and status.get('target_model') == model_name:
+            return
+
+        try:
+            self.start(model_name, persist=False)
+            logger.info(f"🔄 Modèle {model_name} choisi par un autre worker: changement en arrière-plan")
+        except ModelSwapError:
+            pass  # Changement déjà en cours
+
+
+# Instance globale (singleton)
+_swap_manager = ModelSwapManager()
+_sync_thread: Optional[threading.Thread] = None
+
+
+def get_model_swap_manager() -> ModelSwapManager:
+    """Récupère le gestionnaire de changement de modèle"""
+    return _swap_manager
+
+
+def start_model_sync() -> None:
+    """Démarre la vérification périodique du modèle enregistré (une fois par processus)"""
+    global _sync_thread
+    if MODEL_SYNC_INTERVAL <= 0 or _sync_thread is not None:
+        return
+
+    def run() -> None:
+        while True:
+            time.sleep(MODEL_SYNC_INTERVAL)
+            _swap_manager.sync()
+
+    _sync_thread = threading.Thread(target=run, name='model-sync', daemon=True)
+    _sync_thread.start()
@@ -2,7 +2,7 @@
 Modèles SQLAlchemy pour la base de données
 """
 
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Numeric, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Numeric, Boolean, ForeignKey, JSON, UniqueConstraint, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB
@@ -15,7 +15,7 @@ class Requirement(Base):
     """
     __tablename__ = "requirements"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
 
     # Identifiant original du fichier Excel
     original_id = Column(String(255))
@@ -36,12 +36,20 @@ class Requirement(Base):
     analysis_status = Column(String(50), default='pending')  # pending, analyzed, manual
 
     # Référence à la session d'import
-    import_session_id = Column(Integer, ForeignKey('import_sessions.id', ondelete='SET NULL'), index=True)
+    import_session_id = Column(Integer, ForeignKey('import_sessions.id', ondelete='SET NULL'))
 
     # Relations
     mappings = relationship("ComplianceMapping", back_populates="requirement", cascade="all, delete-orphan")
     import_session = relationship("ImportSession", back_populates="requirements")
 
+    # Unicité par fichier source (cible des INSERT ... ON CONFLICT des imports)
+    # Index composites: mêmes noms que database/migration_query_indexes.sql
+    __table_args__ = (
+        UniqueConstraint('original_id', 'source_file', name='unique_requirement'),
+        Index('idx_requirements_session_id', 'import_session_id', 'id'),  # Résultats d'une session
+        Index('idx_requirements_status_id', 'analysis_status', 'id'),  # Liste par statut (keyset)
+    )
+
 
 class SCFControl(Base):
     """
@@ -87,10 +95,10 @@ class ComplianceMapping(Base):
     """
     __tablename__ = "compliance_mappings"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
 
     # Référence à l'exigence
-    requirement_id = Column(Integer, ForeignKey('requirements.id', ondelete='CASCADE'), nullable=False, index=True)
+    requirement_id = Column(Integer, ForeignKey('requirements.id', ondelete='CASCADE'), nullable=False)
 
     # Mappings vers les frameworks
     scf_mapping = Column(String(500))
@@ -108,7 +116,7 @@ class ComplianceMapping(Base):
     control_implementation = Column(Text)  # Guide d'implémentation
 
     # Source du mapping
-    mapping_source = Column(String(50), default='manual', index=True)  # manual, ml, ai, imported
+    mapping_source = Column(String(50), default='manual')  # manual, ml, ai, imported
 
     # Métadonnées
     created_by = Column(String(255))
@@ -116,15 +124,28 @@ class ComplianceMapping(Base):
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
     # Un seul mapping actif par exigence
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
 
     # Référence à la session d'import
-    import_session_id = Column(Integer, ForeignKey('import_sessions.id', ondelete='SET NULL'), index=True)
+    import_session_id = Column(Integer, ForeignKey('import_sessions.id', ondelete='SET NULL'))
 
     # Relations
     requirement = relationship("Requirement", back_populates="mappings")
     import_session = relationship("ImportSession", back_populates="mappings")
 
+    # Mêmes noms que database/schema.sql et migration_query_indexes.sql
+    __table_args__ = (
+        Index('idx_mappings_requirement', 'requirement_id'),
+        Index('idx_mappings_source', 'mapping_source'),
+        Index('idx_mappings_session', 'import_session_id'),
+        # Mappings actifs d'une session (résultats, stats): index partiel,
+        # les mappings remplacés n'y figurent pas
+        Index(
+            'idx_mappings_active_session', 'import_session_id', 'requirement_id',
+            postgresql_where=text('is_active')
+        ),
+    )
+
 
 class AnalysisHistory(Base):
     """
@@ -158,7 +179,7 @@ class ImportSession(Base):
     """
     __tablename__ = "import_sessions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
 
     # Informations sur le fichier source
     filename = Column(String(500), nullable=False, index=True)
@@ -171,7 +192,12 @@ class ImportSession(Base):
     analysis_source = Column(String(50), default='pending')  # pending, claude, ml, gemini, hybrid
 
     # Statut de l'import
-    status = Column(String(50), default='processing')  # processing, completed, failed
+    status = Column(String(50), default='processing')  # queued, processing, completed, failed
+
+    # Progression (mise à jour à chaque tranche insérée, détail par feuille dans session_metadata['sheets'])
+    rows_parsed = Column(Integer, default=0)
+    rows_inserted = Column(Integer, default=0)
+    error_message = Column(Text)
 
     # Tags pour retrouver facilement
     tags = Column(Text)  # Tags séparés par virgules
@@ -180,10 +206,48 @@ class ImportSession(Base):
     session_metadata = Column(JSONB)  # {user, description, version, etc.}
 
     # Horodatage
-    import_date = Column(TIMESTAMP, server_default=func.now(), index=True)
+    # Non nul: clé de la pagination keyset (un NULL serait mal placé par la comparaison de lignes)
+    import_date = Column(TIMESTAMP, server_default=func.now(), nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
     # Relations
     requirements = relationship("Requirement", back_populates="import_session")
     mappings = relationship("ComplianceMapping", back_populates="import_session")
+
+    # Mêmes noms que database/migration_add_import_sessions.sql et migration_query_indexes.sql
+    __table_args__ = (
+        Index('idx_import_sessions_date_id', 'import_date', 'id'),  # Historique (keyset)
+        Index('idx_import_sessions_status', 'status'),
+        Index('idx_import_sessions_source', 'analysis_source'),
+    )
+
+
+class RequirementEmbedding(Base):
+    """
+    Embeddings des textes d'exigences déjà encodés, par texte normalisé et par modèle
+    Réutilisés d'une analyse à l'autre (réimport d'un fichier, /api/analyze/batch répété)
+    """
+    __tablename__ = "requirement_embeddings"
+
+    # SHA-256 du texte normalisé (voir embedding_store.normalize_text)
+    text_hash = Column(String(64), primary_key=True)
+    model_name = Column(String(255), primary_key=True)
+
+    # Vecteur float32 sérialisé (numpy tobytes)
+    dimension = Column(Integer, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class AppSetting(Base):
+    """
+    Paramètres applicatifs partagés par tous les workers (clé → valeur)
+    Ex: modèle d'embedding actif choisi via /api/admin/model/swap
+    """
+    __tablename__ = "app_settings"
+
+    key = Column(String(100), primary_key=True)
+    value = Column(Text, nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
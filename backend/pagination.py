@@ -0,0 +1,178 @@
+"""
+Pagination par curseur (keyset) pour les listes de l'API
+Une page suivante filtre sur la clé de tri de la dernière ligne (WHERE (a, b) < (x, y))
+au lieu de sauter `offset` lignes: une page profonde coûte autant que la première
+Le total est optionnel: estimation du planificateur (pg_class.reltuples) sans filtre,
+comptage exact mis en cache quelques secondes sinon
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+
+# Durée de validité des totaux mis en cache (secondes)
+COUNT_CACHE_TTL = float(os.getenv('COUNT_CACHE_TTL', '30'))
+
+# En dessous de ce nombre de lignes estimées, le comptage exact est assez rapide
+ESTIMATE_MIN_ROWS = 10000
+
+_count_cache: Dict[Tuple, Tuple[float, int]] = {}
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode la clé de tri de la dernière ligne d'une page en curseur opaque
+
+    Args:
+        values: Valeurs de la clé (datetime sérialisés en ISO 8601)
+
+    Returns:
+        Curseur base64 url-safe
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Décode un curseur produit par encode_cursor
+
+    Args:
+        cursor: Curseur reçu du client
+        types: Type attendu pour chaque valeur de la clé (datetime, int, str)
+
+    Returns:
+        Valeurs de la clé
+
+    Raises:
+        HTTPException: Si le curseur est invalide
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("clé de longueur inattendue")
+        return [
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Curseur de pagination invalide: {e}")
+
+
+def keyset_filter(columns: Sequence, values: Sequence[Any], descending: bool = False):
+    """
+    Condition « après la dernière ligne » pour un tri sur `columns`
+
+    Comparaison de lignes (row value): utilise l'index composite de la clé de tri.
+
+    Args:
+        columns: Colonnes de la clé de tri (toutes dans le même sens)
+        values: Valeurs de la dernière ligne de la page précédente
+        descending: Tri décroissant
+
+    Returns:
+        Expression SQLAlchemy
+    """
+    key = tuple_(*columns)
+    bound = tuple_(*values)
+    return key < bound if descending else key > bound
+
+
+def next_cursor(rows: List, limit: int, key: Callable[[Any], Sequence[Any]]) -> Optional[str]:
+    """
+    Curseur de la page suivante (None si la page n'est pas pleine)
+
+    Args:
+        rows: Lignes de la page
+        limit: Taille de page demandée
+        key: Extrait la clé de tri d'une ligne
+
+    Returns:
+        Curseur opaque ou None
+    """
+    if len(rows) < limit:
+        return None
+    return encode_cursor(key(rows[-1]))
+
+
+def estimated_count(db: Session, table_name: str) -> Optional[int]:
+    """
+    Nombre de lignes estimé par PostgreSQL (statistiques du planificateur)
+
+    Args:
+        db: Session SQLAlchemy
+        table_name: Nom de la table
+
+    Returns:
+        Estimation, None si indisponible (table jamais analysée, autre base)
+    """
+    try:
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+            {"table": table_name}
+        ).scalar()
+    except Exception:
+        db.rollback()
+        return None
+    return int(estimate) if estimate is not None and estimate >= 0 else None
+
+
+def cached_count(key: Tuple, count: Callable[[], int], ttl: float = COUNT_CACHE_TTL) -> int:
+    """
+    Comptage exact mis en cache `ttl` secondes (par table et filtres)
+
+    Args:
+        key: Clé du cache (ex: ('requirements', status))
+        count: Calcule le total exact
+        ttl: Durée de validité
+
+    Returns:
+        Total
+    """
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+
+    total = count()
+    with _count_cache_lock:
+        _count_cache[key] = (now, total)
+    return total
+
+
+def total_count(
+    db: Session,
+    table_name: str,
+    filters: Dict[str, Any],
+    count: Callable[[], int]
+) -> int:
+    """
+    Total d'une liste: estimation pour une grande table sans filtre, sinon comptage en cache
+
+    Args:
+        db: Session SQLAlchemy
+        table_name: Nom de la table
+        filters: Filtres actifs (valeurs None ignorées)
+        count: Calcule le total exact
+
+    Returns:
+        Total (approximatif pour une grande table sans filtre)
+    """
+    active = tuple(sorted((k, v) for k, v in filters.items() if v is not None))
+    if not active:
+        estimate = estimated_count(db, table_name)
+        if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+            return estimate
+    return cached_count((table_name,) + active, count)
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Pré-calcul des embeddings SCF (commande unique)
+Encode les segments des contrôles par tranches (réparties sur plusieurs processus
+avec --workers, chacun chargeant sa copie du modèle),
+écrit un checkpoint par tranche dans le répertoire de cache et reprend après une
+interruption à partir des tranches déjà terminées
+
+Usage:
+    python precompute.py [--model NOM] [--workers N] [--chunk-size N] [--fresh] [--validate]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from chunk_index import ChunkIndex, chunk_texts
+from embedding_pipeline import encode_texts
+from ml_model_singleton import get_ml_model, get_model_name
+from scf_knowledge_service import SCFKnowledgeBase
+
+
+# Taille par défaut d'une tranche (textes encodés puis sauvegardés ensemble)
+DEFAULT_CHUNK_SIZE = 512
+
+# Plan de découpage des tranches (invalide les checkpoints si les textes ou le modèle changent)
+PLAN_FILE = 'plan.json'
+
+# Modèle chargé une fois par processus de travail
+_worker_model = None
+
+
+def _init_worker(model_name: str, num_threads: int) -> None:
+    """Initialise un processus de travail: threads torch bornés + chargement du modèle"""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+    _worker_model = get_ml_model(model_name)
+
+
+def _encode_part(index: int, texts: List[str], part_path: str) -> Tuple[int, int, float]:
+    """
+    Encode une tranche et écrit son checkpoint de façon atomique
+
+    Returns:
+        Tuple (indice de la tranche, nombre de textes, durée en secondes)
+    """
+    start = time.time()
+    embeddings = encode_texts(_worker_model, texts).astype(np.float32)
+
+    tmp_path = f"{part_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, embeddings, allow_pickle=False)
+    os.replace(tmp_path, part_path)
+
+    return index, len(texts), time.time() - start
+
+
+def _part_path(parts_dir: Path, index: int) -> Path:
+    return parts_dir / f"part_{index:05d}.npy"
+
+
+def _load_part(path: Path, expected_rows: int) -> Optional[np.ndarray]:
+    """Charge un checkpoint; None s'il est absent, tronqué ou illisible"""
+    if not path.exists():
+        return None
+    try:
+        part = np.load(path, allow_pickle=False)
+    except Exception:
+        return None
+    if part.ndim != 2 or part.shape[0] != expected_rows:
+        return None
+    return part
+
+
+def _prepare_parts_dir(parts_dir: Path, plan: dict, fresh: bool) -> None:
+    """Crée le répertoire des checkpoints; le vide si le plan a changé ou si --fresh"""
+    plan_path = parts_dir / PLAN_FILE
+    if parts_dir.exists() and not fresh and plan_path.exists():
+        try:
+            if json.loads(plan_path.read_text(encoding='utf-8')) == plan:
+                return
+        except ValueError:
+            pass
+        logger.warning("⚠️ Checkpoints d'un autre plan (textes, modèle ou taille de tranche modifiés): reprise impossible")
+
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    parts_dir.mkdir(parents=True)
+    plan_path.write_text(json.dumps(plan, indent=2), encoding='utf-8')
+
+
+def _build_index(
+    kb: SCFKnowledgeBase,
+    model,
+    model_name: str,
+    workers: int,
+    chunk_size: int,
+    fresh: bool
+) -> ChunkIndex:
+    """Encode les segments des contrôles par tranches (avec reprise) et écrit le cache"""
+    # 1. Découpage des contrôles en segments (identique au chargement à la demande)
+    bodies, prefixes = kb._build_control_texts()
+    chunks, owners = chunk_texts(model, bodies, prefixes)
+    ranges = [(start, min(start + chunk_size, len(chunks))) for start in range(0, len(chunks), chunk_size)]
+
+    fingerprint = hashlib.sha256('\x00'.join(chunks).encode('utf-8')).hexdigest()
+    plan = {
+        'model_name': model_name,
+        'chunk_size': chunk_size,
+        'num_chunks': len(chunks),
+        'fingerprint': fingerprint,
+    }
+    parts_dir = Path(kb.get_control_cache_path(model_name)).with_suffix('.parts')
+    _prepare_parts_dir(parts_dir, plan, fresh)
+
+    # 2. Reprise: tranches déjà valides sur disque
+    pending = [
+        i for i, (start, end) in enumerate(ranges)
+        if _load_part(_part_path(parts_dir, i), end - start) is None
+    ]
+    logger.info(
+        f"🧮 {len(kb.controls)} contrôles → {len(chunks)} segments en {len(ranges)} tranches "
+        f"({len(ranges) - len(pending)} déjà calculées, {len(pending)} à encoder)"
+    )
+
+    # 3. Encodage des tranches manquantes
+    if pending:
+        pending_texts = sum(ranges[i][1] - ranges[i][0] for i in pending)
+        workers = max(1, min(workers, len(pending)))
+        start_time = time.time()
+        done_texts = 0
+
+        def report(index: int, n_texts: int, elapsed: float) -> None:
+            nonlocal done_texts
+            done_texts += n_texts
+            total_elapsed = time.time() - start_time
+            logger.info(
+                f"   ✅ Tranche {index + 1}/{len(ranges)} ({n_texts / elapsed:.1f} textes/s) — "
+                f"{done_texts}/{pending_texts} segments, {done_texts / total_elapsed:.1f} textes/s au total"
+            )
+
+        if workers == 1:
+            global _worker_model
+            _worker_model = model
+            for i in pending:
+                start, end = ranges[i]
+                report(*_encode_part(i, chunks[start:end], str(_part_path(parts_dir, i))))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            logger.info(f"⚙️ {workers} processus d'encodage ({threads} threads chacun)")
+            # spawn: pas de fork d'un processus ayant déjà initialisé torch
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(model_name, threads)
+            ) as pool:
+                futures = [
+                    pool.submit(_encode_part, i, chunks[ranges[i][0]:ranges[i][1]], str(_part_path(parts_dir, i)))
+                    for i in pending
+                ]
+                for future in as_completed(futures):
+                    report(*future.result())
+
+        elapsed = time.time() - start_time
+        logger.info(f"⏱️ {pending_texts} segments encodés en {elapsed:.1f}s ({pending_texts / elapsed:.1f} textes/s)")
+
+    # 4. Assemblage et écriture du cache final
+    parts = [_load_part(_part_path(parts_dir, i), end - start) for i, (start, end) in enumerate(ranges)]
+    if any(part is None for part in parts):
+        raise RuntimeError("Checkpoint invalide après encodage, relancez la commande")
+
+    control_index = ChunkIndex(np.concatenate(parts), owners)
+    kb.save_control_index(control_index, model_name)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return control_index
+
+
+def precompute(
+    model_name: str,
+    excel_path: str,
+    cache_dir: Optional[str] = None,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    fresh: bool = False
+) -> SCFKnowledgeBase:
+    """
+    Calcule (ou reprend) l'index des contrôles SCF et l'écrit dans le cache lu au démarrage
+
+    Args:
+        model_name: Modèle d'embedding
+        excel_path: Fichier Excel SCF
+        cache_dir: Répertoire de cache (défaut: configuration centralisée)
+        workers: Nombre de processus d'encodage
+        chunk_size: Nombre de segments par tranche (granularité de la reprise)
+        fresh: Ignorer les checkpoints existants
+
+    Returns:
+        Base SCF avec le modèle et l'index activés
+    """
+    kb = SCFKnowledgeBase(excel_path=excel_path, cache_dir=cache_dir)
+    model = get_ml_model(model_name)
+
+    control_index = None if fresh else kb.load_control_index(model_name)
+    if control_index is None:
+        # Le serveur qui démarre pendant le pré-calcul attend ce verrou puis lit le cache
+        with kb.cache_manager.lock(kb._get_cache_key(model_name)):
+            control_index = None if fresh else kb.load_control_index(model_name)
+            if control_index is None:
+                control_index = _build_index(kb, model, model_name, workers, chunk_size, fresh)
+    else:
+        logger.info("💾 Cache déjà valide (--fresh pour recalculer)")
+
+    kb.activate_semantic_model(model, control_index, model_name)
+    return kb
+
+
+def validate(kb: SCFKnowledgeBase) -> None:
+    """Requêtes de contrôle sur l'index calculé"""
+    queries = [
+        "Les mots de passe doivent être complexes et changés régulièrement",
+        "Les données sensibles doivent être chiffrées en transit et au repos",
+    ]
+    for query in queries:
+        logger.info(f'🧪 "{query}"')
+        for i, result in enumerate(kb.find_best_scf_control(query, top_k=3), 1):
+            logger.info(f"   {i}. {result['scf_id']} - {result['scf_control']} ({result['similarity_score'] * 100:.1f}%)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pré-calcul des embeddings SCF (reprise après interruption)")
+    parser.add_argument('--model', default=get_model_name(), help="Modèle d'embedding (défaut: ML_MODEL_NAME)")
+    parser.add_argument('--excel-path', default='/app/scf_knowledge_base.xlsx', help="Fichier Excel SCF")
+    parser.add_argument('--cache-dir', default=None, help="Répertoire de cache (défaut: CACHE_DIR)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processus d'encodage (défaut: 1, en processus, recommandé sur GPU). "
+                             "Chaque processus charge sa copie du modèle: prévoir la mémoire "
+                             "correspondante avant d'augmenter")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Segments par checkpoint")
+    parser.add_argument('--fresh', action='store_true', help="Ignorer le cache et les checkpoints existants")
+    parser.add_argument('--validate', action='store_true', help="Lancer des requêtes de contrôle après le calcul")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    try:
+        kb = precompute(
+            model_name=args.model,
+            excel_path=args.excel_path,
+            cache_dir=args.cache_dir,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            fresh=args.fresh
+        )
+    except KeyboardInterrupt:
+        logger.warning("⚠️ Interrompu: les tranches terminées seront reprises au prochain lancement")
+        return 130
+    except Exception as e:
+        logger.error(f"❌ Échec du pré-calcul: {e}")
+        return 1
+
+    if args.validate:
+        validate(kb)
+
+    logger.info(f"🎉 Pré-calcul terminé en {(time.time() - start) / 60:.1f} minutes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
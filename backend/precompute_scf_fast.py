@@ -1,166 +0,0 @@
-#!/usr/bin/env python3
-"""
-Script de pré-calcul rapide des embeddings SCF
-Utilise le modèle paraphrase-multilingual-mpnet-base-v2 (excellent et rapide)
-"""
-
-import sys
-from loguru import logger
-from sentence_transformers import SentenceTransformer
-from scf_knowledge_service import SCFKnowledgeBase
-import time
-
-# Configuration du logger
-logger.remove()
-logger.add(sys.stdout, format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | {message}")
-
-def main():
-    """Pré-calcule et met en cache les embeddings SCF"""
-
-    logger.info("=" * 80)
-    logger.info("🚀 PRÉ-CALCUL RAPIDE DES EMBEDDINGS SCF")
-    logger.info("=" * 80)
-
-    # Étape 1: Charger le modèle (déjà dans le cache de sentence-transformers)
-    logger.info("")
-    logger.info("📥 ÉTAPE 1/4: Chargement du modèle d'embedding...")
-    logger.info("   Modèle: paraphrase-multilingual-mpnet-base-v2")
-    logger.info("   Type: Multilingue optimisé (FR/EN)")
-
-    start_time = time.time()
-
-    try:
-        model = SentenceTransformer('paraphrase-multilingual-mpnet-base-v2')
-        logger.success(f"✅ Modèle chargé en {time.time() - start_time:.1f}s")
-        logger.info(f"   Dimensions: 768")
-        logger.info(f"   Qualité: Excellente pour recherche sémantique")
-    except Exception as e:
-        logger.error(f"❌ Erreur chargement modèle: {e}")
-        sys.exit(1)
-
-    # Étape 2: Charger la base SCF
-    logger.info("")
-    logger.info("📚 ÉTAPE 2/4: Chargement de la base de connaissances SCF...")
-
-    try:
-        scf_kb = SCFKnowledgeBase(
-            excel_path='/app/scf_knowledge_base.xlsx',
-            cache_dir='/app/cache'
-        )
-        logger.success(f"✅ Base SCF chargée:")
-        logger.info(f"   • {len(scf_kb.controls)} contrôles SCF")
-        logger.info(f"   • {len(scf_kb.threats)} menaces")
-        logger.info(f"   • {len(scf_kb.risks)} risques")
-    except Exception as e:
-        logger.error(f"❌ Erreur chargement base SCF: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        sys.exit(1)
-
-    # Étape 3: Calculer les embeddings avec progression
-    logger.info("")
-    logger.info("🧮 ÉTAPE 3/4: Calcul des embeddings sémantiques...")
-    logger.info(f"   Traitement de {len(scf_kb.controls)} contrôles par batch de 32...")
-    logger.info("   ⏳ Temps estimé: 30-45 minutes...")
-    logger.info("")
-
-    embed_start = time.time()
-
-    try:
-        # Cette fonction gère automatiquement le cache
-        scf_kb.init_semantic_model(model)
-
-        embed_time = time.time() - embed_start
-        logger.success(f"✅ Embeddings calculés en {embed_time/60:.1f} minutes")
-
-    except Exception as e:
-        logger.error(f"❌ Erreur calcul embeddings: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        sys.exit(1)
-
-    # Étape 4: Vérification du cache
-    logger.info("")
-    logger.info("🔍 ÉTAPE 4/4: Vérification du cache...")
-
-    import os
-    cache_files = os.listdir('/app/cache')
-    if cache_files:
-        for cache_file in cache_files:
-            cache_path = f'/app/cache/{cache_file}'
-            size_mb = os.path.getsize(cache_path) / (1024 * 1024)
-            logger.success(f"   ✓ {cache_file} ({size_mb:.1f} MB)")
-    else:
-        logger.warning("   ⚠️  Aucun fichier cache trouvé")
-
-    # Étape 5: Tests de validation
-    logger.info("")
-    logger.info("🧪 TESTS DE VALIDATION...")
-    logger.info("")
-
-    # Test 1: Recherche mot de passe
-    test1 = "Les mots de passe doivent être complexes et changés régulièrement"
-    logger.info(f'   TEST 1: "{test1}"')
-
-    try:
-        results = scf_kb.find_best_scf_control(test1, top_k=3)
-        logger.success(f"   ✓ Trouvé {len(results)} contrôles:")
-        for i, result in enumerate(results, 1):
-            logger.info(f"      {i}. {result['scf_id']} - {result['scf_control']}")
-            logger.info(f"         Similarité: {result['similarity_score']*100:.1f}%")
-    except Exception as e:
-        logger.error(f"   ✗ Erreur: {e}")
-
-    logger.info("")
-
-    # Test 2: Recherche chiffrement
-    test2 = "Les données sensibles doivent être chiffrées en transit et au repos"
-    logger.info(f'   TEST 2: "{test2}"')
-
-    try:
-        results = scf_kb.find_best_scf_control(test2, top_k=3)
-        logger.success(f"   ✓ Trouvé {len(results)} contrôles:")
-        for i, result in enumerate(results, 1):
-            logger.info(f"      {i}. {result['scf_id']} - {result['scf_control']}")
-            logger.info(f"         Similarité: {result['similarity_score']*100:.1f}%")
-    except Exception as e:
-        logger.error(f"   ✗ Erreur: {e}")
-
-    logger.info("")
-
-    # Test 3: Validation de référence
-    logger.info("   TEST 3: Validation de référence")
-    try:
-        is_valid, ctrl = scf_kb.validate_scf_reference("IAC-01")
-        if is_valid:
-            logger.success(f"   ✓ IAC-01 validé: {ctrl['scf_control']}")
-        else:
-            logger.warning("   ✗ IAC-01 non trouvé")
-    except Exception as e:
-        logger.error(f"   ✗ Erreur validation: {e}")
-
-    # Résumé final
-    total_time = time.time() - start_time
-    logger.info("")
-    logger.info("=" * 80)
-    logger.success("🎉 PRÉ-CALCUL TERMINÉ AVEC SUCCÈS!")
-    logger.info("=" * 80)
-    logger.info(f"⏱️  Temps total: {total_time/60:.1f} minutes")
-    logger.info(f"💾 Cache créé: /app/cache/")
-    logger.info(f"🚀 Prochains démarrages: <3 secondes (chargement depuis cache)")
-    logger.info("")
-    logger.info("📊 QUALITÉ DES RÉSULTATS:")
-    logger.info("   • Précision: ★★★★★ (Excellente)")
-    logger.info("   • Pertinence: ★★★★★ (Très élevée)")
-    logger.info("   • Fiabilité: ★★★★★ (Références validées)")
-    logger.info("")
-    logger.info("📝 PROCHAINES ÉTAPES:")
-    logger.info("   1. Le backend utilisera automatiquement le cache")
-    logger.info("   2. Les agents auront des résultats précis et validés")
-    logger.info("   3. Recherche sémantique opérationnelle")
-    logger.info("")
-    logger.success("✅ Vous pouvez maintenant tester l'application!")
-    logger.info("=" * 80)
-
-if __name__ == "__main__":
-    main()
@@ -0,0 +1,197 @@
+"""
+Import des exigences depuis un classeur Excel
+Lecture en flux par tranches, conversion vectorisée et insertion en masse
+(ON CONFLICT DO NOTHING) tranche par tranche: mémoire constante quelle que soit
+la taille du classeur
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from bulk_operations import insert_requirements
+from dataframe_records import detect_requirement_columns, extract_columns, text_column, to_records
+from excel_stream import iter_sheet_chunks, read_sheet_heads
+
+
+def chunk_to_requirement_rows(
+    df: pd.DataFrame,
+    sheet_name: str,
+    columns: Tuple[Optional[str], Optional[str], Optional[str]],
+    source_file: str,
+    import_session_id: Optional[int]
+) -> List[Dict]:
+    """
+    Convertit une tranche de feuille en lignes de la table requirements
+
+    Args:
+        df: Tranche de la feuille (index = numéro de ligne de données)
+        sheet_name: Nom de la feuille
+        columns: Colonnes (identifiant, exigence, point de vérification)
+        source_file: Nom du fichier source
+        import_session_id: Session d'import à laquelle rattacher les exigences
+
+    Returns:
+        Lignes prêtes pour insert_requirements
+    """
+    id_col, req_col, verif_col = columns
+
+    # Conversion vectorisée, colonne par colonne
+    # Identifiants numériques sans décimale: clé de dédoublonnage stable quel que soit le
+    # lecteur (voir database/migration_normalize_original_ids.sql pour les imports antérieurs)
+    frame = extract_columns(df, {
+        'original_id': id_col,
+        'requirement': req_col,
+        'verification_point': verif_col
+    }, integral=('original_id',))
+    frame['original_id'] = frame['original_id'].fillna(
+        pd.Series(f"{sheet_name}_" + df.index.astype(str), index=df.index)
+    )
+    frame['requirement'] = frame['requirement'].fillna("")
+
+    return to_records(
+        frame,
+        source_file=source_file,
+        source_sheet=sheet_name,
+        analysis_status='pending',
+        import_session_id=import_session_id  # Lier à la session d'import
+    )
+
+
+def detect_sheet_columns(df: pd.DataFrame, sheet_name: str) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """Colonnes d'exigences d'une feuille, None (avec avertissement) si aucune colonne d'exigence"""
+    columns = detect_requirement_columns(df.columns)
+    if not columns[1]:
+        logger.warning(f"Aucune colonne d'exigence trouvée dans '{sheet_name}', skip")
+        return None
+    return columns
+
+
+def parse_sheet(
+    path: str,
+    sheet_name: str,
+    source_file: str,
+    queue,
+    key,
+    chunk_size: Optional[int] = None
+) -> Optional[int]:
+    """
+    Lit une feuille et la convertit en lignes de la table requirements (sans base de données)
+    Exécutable dans un processus séparé: chaque tranche convertie est envoyée à l'écrivain
+    unique par `queue` (bornée: la lecture attend que l'écrivain suive), qui l'insère et
+    lui attribue la session d'import. Mémoire bornée quelle que soit la taille de la feuille
+
+    Args:
+        path: Chemin du classeur
+        sheet_name: Feuille à lire
+        source_file: Nom du fichier source
+        queue: File partagée recevant les tuples (key, lignes lues, lignes converties)
+        key: Identifiant de la feuille pour l'écrivain
+        chunk_size: Lignes par tranche (défaut: IMPORT_CHUNK_SIZE)
+
+    Returns:
+        Nombre de lignes lues, None si la feuille n'a pas de colonne d'exigence
+    """
+    columns = None
+    rows_read = 0
+
+    for _, df in iter_sheet_chunks(path, chunk_size, sheet_names=[sheet_name]):
+        if columns is None:
+            columns = detect_sheet_columns(df, sheet_name)
+            if columns is None:
+                return None
+        rows_read += len(df)
+        queue.put((key, len(df), chunk_to_requirement_rows(df, sheet_name, columns, source_file, None)))
+
+    return rows_read
+
+
+def preview_workbook(path: str, max_rows: int) -> List[Dict]:
+    """
+    Aperçu d'un classeur pour le mapping des colonnes (sans base de données)
+    Bloquant: à exécuter dans un pool de threads
+
+    Args:
+        path: Chemin du classeur
+        max_rows: Nombre de lignes d'exemple par feuille
+
+    Returns:
+        Par feuille: en-têtes, lignes d'exemple (texte ou None) et colonnes détectées
+        (id_col, req_col, verif_col) comme à l'import
+    """
+    previews = []
+    for sheet_name, df in read_sheet_heads(path, max_rows):
+        id_col, req_col, verif_col = detect_requirement_columns(df.columns)
+        values = [text_column(df[col]).tolist() for col in df.columns]
+        previews.append({
+            "sheet_name": sheet_name,
+            "headers": [str(col) for col in df.columns],
+            "rows": [list(row) for row in zip(*values)],
+            "id_col": id_col,
+            "req_col": req_col,
+            "verif_col": verif_col
+        })
+    return previews
+
+
+def import_workbook(
+    db: Session,
+    path: str,
+    source_file: str,
+    import_session_id: Optional[int],
+    chunk_size: Optional[int] = None,
+    progress_callback: Optional[Callable[[List[Dict]], None]] = None
+) -> Tuple[int, List[Dict]]:
+    """
+    Importe toutes les feuilles d'un classeur, tranche par tranche
+    Bloquant (lecture + base de données): à exécuter dans un pool de threads
+
+    Chaque tranche est validée (commit) après insertion. Le callback de progression est
+    appelé avant ce commit: les écritures qu'il fait dans `db` sont validées avec la tranche.
+
+    Args:
+        db: Session SQLAlchemy
+        path: Chemin du classeur (fichier temporaire de l'upload)
+        source_file: Nom du fichier source (clé de dédoublonnage avec original_id)
+        import_session_id: Session d'import
+        chunk_size: Lignes par tranche (défaut: IMPORT_CHUNK_SIZE)
+        progress_callback: Appelé après chaque tranche avec la progression par feuille
+            ({sheet_name, rows_imported (lignes lues), rows_inserted})
+
+    Returns:
+        Tuple (nombre d'exigences insérées, détail par feuille)
+    """
+    total_imported = 0
+    sheets: Dict[str, Dict] = {}
+    columns_by_sheet: Dict[str, Optional[Tuple]] = {}
+
+    for sheet_name, df in iter_sheet_chunks(path, chunk_size):
+        # Détecter les colonnes importantes à la première tranche de chaque feuille
+        if sheet_name not in columns_by_sheet:
+            columns_by_sheet[sheet_name] = detect_sheet_columns(df, sheet_name)
+
+        columns = columns_by_sheet[sheet_name]
+        if columns is None:
+            continue
+
+        rows = chunk_to_requirement_rows(df, sheet_name, columns, source_file, import_session_id)
+
+        # Skip silencieusement les doublons (ON CONFLICT DO NOTHING)
+        inserted = insert_requirements(db, rows)
+        if len(inserted) < len(rows):
+            logger.debug(f"Skip {len(rows) - len(inserted)} doublons dans '{sheet_name}' ({source_file})")
+
+        sheet = sheets.setdefault(sheet_name, {"sheet_name": sheet_name, "rows_imported": 0, "rows_inserted": 0})
+        sheet["rows_imported"] += len(df)
+        sheet["rows_inserted"] += len(inserted)
+        total_imported += len(inserted)
+
+        if progress_callback is not None:
+            progress_callback(list(sheets.values()))
+        db.commit()
+
+        logger.info(f"Feuille '{sheet_name}': {sheet['rows_imported']} lignes traitées")
+
+    return total_imported, list(sheets.values())
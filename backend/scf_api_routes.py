@@ -194,6 +194,7 @@ async def get_scf_stats():
             "total_threats": len(scf_kb_instance.threats),
             "total_risks": len(scf_kb_instance.risks),
             "model_initialized": scf_kb_instance.model is not None,
+            "model_name": scf_kb_instance.model_name,
             "embeddings_ready": scf_kb_instance.control_embeddings is not None,
             "status": "ready"
         }
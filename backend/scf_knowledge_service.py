@@ -8,16 +8,26 @@ Utilise un modèle ML singleton partagé pour économiser la mémoire
 import openpyxl
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, NamedTuple, Optional, Tuple
 import logging
 import pickle
 import os
 import hashlib
-from ml_model_singleton import get_shared_ml_model, get_model_name
+from ml_model_singleton import get_ml_model, get_model_name
 from cache_config import CacheConfig
+from cache_manager import CacheManager, content_hash
+from chunk_index import ChunkIndex
 
 logger = logging.getLogger(__name__)
 
+
+class SemanticState(NamedTuple):
+    """Modèle et index servis ensemble (remplacés atomiquement lors d'un changement de modèle)"""
+    model: SentenceTransformer
+    control_index: ChunkIndex
+    model_name: str
+
+
 class SCFKnowledgeBase:
     """
     Base de connaissances SCF chargée depuis le fichier Excel
@@ -36,19 +46,46 @@ class SCFKnowledgeBase:
             # Créer le répertoire si spécifié manuellement
             os.makedirs(cache_dir, exist_ok=True)
 
+        # Artefacts du cache (manifeste, écriture atomique, verrou inter-processus)
+        self.cache_manager = CacheManager(self.cache_dir)
+
         self.controls: List[Dict] = []
         self.threats: List[str] = []
         self.risks: List[str] = []
 
-        # Modèle de similarité sémantique (partagé via singleton)
-        self.model = None
-        self.control_embeddings = None
+        # Modèle de similarité sémantique (partagé via singleton) + index multi-vecteurs
+        # des contrôles, regroupés dans un seul état pour un remplacement atomique
+        self._semantic_state: Optional[SemanticState] = None
 
         logger.info("📚 Initialisation de la base de connaissances SCF...")
         self._load_scf_controls()
         self._load_threats_and_risks()
         logger.info(f"✅ Base SCF chargée: {len(self.controls)} contrôles, {len(self.threats)} menaces, {len(self.risks)} risques")
 
+    @property
+    def model(self) -> Optional[SentenceTransformer]:
+        """Modèle actuellement servi"""
+        state = self._semantic_state
+        return state.model if state else None
+
+    @property
+    def control_index(self) -> Optional[ChunkIndex]:
+        """Index des contrôles actuellement servi"""
+        state = self._semantic_state
+        return state.control_index if state else None
+
+    @property
+    def control_embeddings(self) -> Optional[np.ndarray]:
+        """Matrice des segments de contrôles actuellement servie"""
+        state = self._semantic_state
+        return state.control_index.embeddings if state else None
+
+    @property
+    def model_name(self) -> Optional[str]:
+        """Nom du modèle actuellement servi"""
+        state = self._semantic_state
+        return state.model_name if state else None
+
     def _load_scf_controls(self):
         """Charge tous les contrôles SCF depuis la feuille 'SCF 2025.2'"""
         try:
@@ -123,11 +160,152 @@ class SCFKnowledgeBase:
         controls_hash = hashlib.md5(
             ''.join([ctrl['scf_id'] for ctrl in self.controls]).encode()
         ).hexdigest()
-        return f"scf_embeddings_{model_name.replace('/', '_')}_{controls_hash}"
+        # Suffixe _mv: index multi-vecteurs (segments + propriétaires)
+        return f"scf_embeddings_{model_name.replace('/', '_')}_{controls_hash}_mv"
 
-    def _get_cache_path(self, cache_key: str) -> str:
-        """Retourne le chemin complet du fichier cache (format NumPy sécurisé)"""
-        return os.path.join(self.cache_dir, f"{cache_key}.npz")
+    def _build_control_texts(self) -> Tuple[List[str], List[str]]:
+        """
+        Construit les textes à indexer pour chaque contrôle
+
+        Returns:
+            Tuple (corps, préfixes): le préfixe (ID + titre) est répété sur chaque segment
+        """
+        prefixes = [f"{ctrl['scf_id']} {ctrl['scf_control']}" for ctrl in self.controls]
+        bodies = [f"{ctrl['description']} {ctrl['control_question']}" for ctrl in self.controls]
+        return bodies, prefixes
+
+    def build_control_index(
+        self,
+        model: SentenceTransformer,
+        model_name: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> ChunkIndex:
+        """
+        Charge l'index des contrôles depuis le cache (versionné par modèle et contenu)
+        ou le calcule. N'affecte pas l'état servi: permet de préparer un nouveau modèle
+        pendant que l'ancien continue de répondre.
+
+        Args:
+            model: Modèle à utiliser pour l'encodage
+            model_name: Nom du modèle (clé de cache)
+            progress_callback: Appelé avec (textes encodés, total) pendant le calcul
+
+        Returns:
+            Index multi-vecteurs des contrôles
+        """
+        cache_key = self._get_cache_key(model_name)
+
+        control_index = self.load_control_index(model_name)
+        if control_index is not None:
+            return control_index
+
+        # Un seul processus construit l'index; les autres attendent puis relisent le cache
+        with self.cache_manager.lock(cache_key):
+            control_index = self.load_control_index(model_name)
+            if control_index is not None:
+                return control_index
+
+            # Pas de cache ou cache invalide -> calculer les embeddings
+            logger.info("🔄 Aucun cache valide, calcul des embeddings...")
+
+            # Textes combinés pour chaque contrôle, découpés en segments s'ils dépassent
+            # la longueur maximale du modèle (au lieu d'être tronqués silencieusement)
+            control_texts, control_prefixes = self._build_control_texts()
+
+            logger.info(f"📊 Calcul des embeddings pour {len(control_texts)} contrôles...")
+            logger.info("⏳ Cette opération peut prendre plusieurs minutes...")
+
+            try:
+                control_index = ChunkIndex.build(model, control_texts, control_prefixes, progress_callback)
+
+                self.save_control_index(control_index, model_name)
+                return control_index
+
+            except Exception as e:
+                logger.error(f"❌ Erreur lors du calcul des embeddings: {e}")
+                raise
+
+    def _get_content_hash(self) -> str:
+        """Empreinte des textes indexés (invalide le cache si un contrôle est modifié)"""
+        bodies, prefixes = self._build_control_texts()
+        return content_hash(f"{p}\t{b}" for p, b in zip(prefixes, bodies))
+
+    def get_control_cache_path(self, model_name: str) -> str:
+        """Retourne le fichier cache de l'index des contrôles pour un modèle"""
+        return str(self.cache_manager.path(self._get_cache_key(model_name)))
+
+    def load_control_index(self, model_name: str) -> Optional[ChunkIndex]:
+        """
+        Charge l'index des contrôles depuis le cache (manifeste et checksum vérifiés)
+
+        Returns:
+            Index multi-vecteurs, ou None s'il doit être calculé
+        """
+        cache_key = self._get_cache_key(model_name)
+        arrays = self.cache_manager.load(cache_key, model_name, self._get_content_hash())
+        if arrays is None:
+            return None
+
+        try:
+            logger.info(f"💾 Cache trouvé: {cache_key}")
+            control_index = ChunkIndex(arrays['embeddings'], arrays['owners'])
+            if control_index.num_owners != len(self.controls):
+                raise ValueError(f"{control_index.num_owners} contrôles en cache pour {len(self.controls)} chargés")
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur lecture cache NumPy: {e}")
+            logger.warning("⚠️ Recalcul nécessaire")
+            return None
+
+        logger.info(
+            f"✅ Embeddings chargés depuis le cache ({control_index.num_owners} contrôles, "
+            f"{control_index.num_chunks} segments)"
+        )
+        logger.info(f"📊 Modèle: {arrays['model_name'][0]}, Date: {arrays['created_at'][0]}")
+        return control_index
+
+    def save_control_index(self, control_index: ChunkIndex, model_name: str) -> str:
+        """
+        Sauvegarde l'index des contrôles dans le cache au format NumPy (SÉCURISÉ)
+        Écriture atomique enregistrée dans le manifeste du cache; chaînes en dtype
+        unicode: relisibles avec allow_pickle=False
+
+        Returns:
+            Chemin du fichier cache
+        """
+        from datetime import datetime
+
+        logger.info("💾 Sauvegarde des embeddings dans le cache (NumPy)...")
+
+        cache_path = self.cache_manager.save(
+            self._get_cache_key(model_name),
+            {
+                'embeddings': control_index.embeddings,
+                'owners': control_index.owners,
+                'model_name': np.array([model_name]),
+                'num_controls': np.array([len(self.controls)], dtype=np.int32),
+                'created_at': np.array([datetime.now().isoformat()])
+            },
+            model_name=model_name,
+            content_hash=self._get_content_hash()
+        )
+
+        logger.info(
+            f"✅ Embeddings calculés et sauvegardés (NumPy): {cache_path} "
+            f"({control_index.num_chunks} segments pour {len(self.controls)} contrôles)"
+        )
+        return str(cache_path)
+
+    def activate_semantic_model(self, model: SentenceTransformer, control_index: ChunkIndex, model_name: str):
+        """
+        Remplace atomiquement le modèle et l'index servis (une seule affectation)
+
+        Args:
+            model: Nouveau modèle
+            control_index: Index des contrôles calculé avec ce modèle
+            model_name: Nom du modèle
+        """
+        self._semantic_state = SemanticState(model, control_index, model_name)
+        logger.info(f"🔀 Base SCF servie avec le modèle {model_name}")
 
     def init_semantic_model(self, model: Optional[SentenceTransformer] = None):
         """
@@ -142,95 +320,14 @@ class SCFKnowledgeBase:
         # Utiliser le singleton si aucun modèle n'est fourni
         if model is None:
             logger.info("🔗 Utilisation du modèle ML partagé (singleton)")
-            self.model = get_shared_ml_model()
             model_name = get_model_name()
+            model = get_ml_model(model_name)
         else:
             logger.info("⚠️ Utilisation d'un modèle ML custom (non recommandé)")
-            self.model = model
             model_name = getattr(model, 'model_name', 'unknown_model')
 
-        # Générer la clé de cache
-        cache_key = self._get_cache_key(model_name)
-        cache_path = self._get_cache_path(cache_key)
-
-        # Vérifier si un cache existe
-        if os.path.exists(cache_path):
-            try:
-                logger.info(f"💾 Cache trouvé: {cache_key}")
-                # Charger depuis NumPy (SÉCURISÉ - pas pickle)
-                cache_data = np.load(cache_path, allow_pickle=False)
-
-                self.control_embeddings = cache_data['embeddings']
-                cached_model = str(cache_data['model_name'][0])
-                created_at = str(cache_data['created_at'][0])
-
-                logger.info(f"✅ Embeddings chargés depuis le cache ({len(self.control_embeddings)} contrôles)")
-                logger.info(f"📊 Modèle: {cached_model}, Date: {created_at}")
-                return
-            except Exception as e:
-                logger.warning(f"⚠️ Erreur lecture cache NumPy: {e}")
-                # Tentative de migration depuis ancien format pickle
-                old_cache_path = cache_path.replace('.npz', '.pkl')
-                if os.path.exists(old_cache_path):
-                    logger.warning("💡 Tentative migration depuis ancien format pickle...")
-                    try:
-                        import pickle
-                        with open(old_cache_path, 'rb') as f:
-                            old_cache = pickle.load(f)
-                        self.control_embeddings = old_cache['embeddings']
-                        logger.info(f"✅ Migration réussie, {len(self.control_embeddings)} embeddings récupérés")
-                        # Le nouveau cache sera créé automatiquement ci-dessous
-                    except Exception as migration_error:
-                        logger.error(f"❌ Migration impossible: {migration_error}")
-                else:
-                    logger.warning("⚠️ Recalcul nécessaire")
-
-        # Pas de cache ou cache invalide -> calculer les embeddings
-        logger.info("🔄 Aucun cache valide, calcul des embeddings...")
-
-        # Créer des textes combinés pour chaque contrôle
-        control_texts = []
-        for ctrl in self.controls:
-            combined_text = f"{ctrl['scf_id']} {ctrl['scf_control']} {ctrl['description']} {ctrl['control_question']}"
-            control_texts.append(combined_text)
-
-        # Calculer les embeddings par batch pour pouvoir reprendre
-        logger.info(f"📊 Calcul des embeddings pour {len(control_texts)} contrôles...")
-        logger.info("⏳ Cette opération peut prendre plusieurs minutes...")
-
-        try:
-            self.control_embeddings = self.model.encode(
-                control_texts,
-                show_progress_bar=False,
-                batch_size=32  # Traiter par batch de 32
-            )
-
-            # Sauvegarder dans le cache au format NumPy (SÉCURISÉ)
-            logger.info("💾 Sauvegarde des embeddings dans le cache (NumPy)...")
-            from datetime import datetime
-
-            np.savez_compressed(
-                cache_path,
-                embeddings=self.control_embeddings,
-                model_name=np.array([model_name], dtype=object),
-                num_controls=np.array([len(self.controls)], dtype=np.int32),
-                created_at=np.array([datetime.now().isoformat()], dtype=object)
-            )
-
-            logger.info(f"✅ Embeddings calculés et sauvegardés (NumPy): {cache_path}")
-
-            # Supprimer l'ancien cache pickle si présent
-            old_cache_path = cache_path.replace('.npz', '.pkl')
-            if os.path.exists(old_cache_path):
-                try:
-                    os.remove(old_cache_path)
-                    logger.info("🗑️ Ancien cache pickle supprimé")
-                except Exception:
-                    pass
-
-        except Exception as e:
-            logger.error(f"❌ Erreur lors du calcul des embeddings: {e}")
-            raise
+        control_index = self.build_control_index(model, model_name)
+        self.activate_semantic_model(model, control_index, model_name)
 
     def find_best_scf_control(
         self,
@@ -249,15 +346,16 @@ class SCFKnowledgeBase:
         Returns:
             Liste de contrôles SCF avec leurs scores de similarité
         """
-        if not self.model or self.control_embeddings is None:
+        # Lecture unique de l'état: modèle et index restent cohérents pendant un changement de modèle
+        state = self._semantic_state
+        if state is None:
             raise RuntimeError("Le modèle sémantique n'est pas initialisé. Appelez init_semantic_model() d'abord.")
 
-        # Encoder l'exigence
-        req_embedding = self.model.encode([requirement_text])[0]
+        # Encoder l'exigence (découpée en segments si elle est trop longue)
+        query_embeddings = state.control_index.encode_query(state.model, requirement_text)
 
-        # Calculer les similarités cosinus
-        from sklearn.metrics.pairwise import cosine_similarity
-        similarities = cosine_similarity([req_embedding], self.control_embeddings)[0]
+        # Similarité max-sim par contrôle (une seule multiplication matricielle)
+        similarities = state.control_index.score(query_embeddings)
 
         # Trier et récupérer les top_k
         top_indices = np.argsort(similarities)[::-1][:top_k]
@@ -292,12 +390,13 @@ class SCFKnowledgeBase:
 
     def find_relevant_threat(self, requirement_text: str) -> Optional[str]:
         """Trouve la menace la plus pertinente depuis le catalogue"""
-        if not self.threats or not self.model:
+        model = self.model
+        if not self.threats or not model:
             return None
 
         # Encoder l'exigence et les menaces
-        req_embedding = self.model.encode([requirement_text])[0]
-        threat_embeddings = self.model.encode(self.threats, show_progress_bar=False)
+        req_embedding = model.encode([requirement_text])[0]
+        threat_embeddings = model.encode(self.threats, show_progress_bar=False)
 
         # Calculer similarités
         from sklearn.metrics.pairwise import cosine_similarity
@@ -312,12 +411,13 @@ class SCFKnowledgeBase:
 
     def find_relevant_risk(self, requirement_text: str) -> Optional[str]:
         """Trouve le risque le plus pertinent depuis le catalogue"""
-        if not self.risks or not self.model:
+        model = self.model
+        if not self.risks or not model:
             return None
 
         # Encoder l'exigence et les risques
-        req_embedding = self.model.encode([requirement_text])[0]
-        risk_embeddings = self.model.encode(self.risks, show_progress_bar=False)
+        req_embedding = model.encode([requirement_text])[0]
+        risk_embeddings = model.encode(self.risks, show_progress_bar=False)
 
         # Calculer similarités
         from sklearn.metrics.pairwise import cosine_similarity
@@ -149,6 +149,7 @@ class StatsResponse(BaseModel):
     manual: int
     total_mappings: int
     completion_rate: float = Field(..., ge=0.0, le=100.0)
+    sessions: Optional[List[dict]] = None  # Détail par session d'import (by_session=true)
 
 
 # ============================================
@@ -0,0 +1,175 @@
+"""
+Résultats d'une session d'import (exigences + mapping actif)
+Une seule requête: LEFT JOIN sur le mapping actif (comme la vue
+v_requirements_with_mappings), colonnes nécessaires uniquement, lignes sérialisées
+sans construire d'objets ORM
+Variante en flux (NDJSON ou tableau JSON) sur curseur serveur: mémoire constante
+quel que soit le nombre d'exigences
+"""
+
+import json
+import os
+from typing import Dict, Iterable, Iterator
+
+from sqlalchemy import Select, and_, select
+from sqlalchemy.engine import Row
+
+from database import SessionLocal
+from models import ComplianceMapping, ImportSession, Requirement
+
+
+# Lignes lues par aller-retour du curseur serveur et écrites par bloc de réponse
+RESULTS_STREAM_BATCH_SIZE = int(os.getenv('RESULTS_STREAM_BATCH_SIZE', '1000'))
+
+
+def session_summary(session: ImportSession) -> Dict:
+    """Informations d'une session d'import renvoyées avec ses résultats"""
+    return {
+        "id": session.id,
+        "filename": session.filename,
+        "source_sheet": session.source_sheet,
+        "import_date": session.import_date.isoformat() if session.import_date else None,
+        "total_requirements": session.total_requirements,
+        "analysis_source": session.analysis_source,
+        "status": session.status,
+        "tags": session.tags
+    }
+
+
+def session_results_statement(session_id: int) -> Select:
+    """
+    Requête des résultats d'une session, triée par exigence
+
+    Args:
+        session_id: ID de la session d'import
+
+    Returns:
+        Instruction SELECT (une ligne par exigence et mapping actif de la session)
+    """
+    return (
+        select(
+            Requirement.id,
+            Requirement.original_id,
+            Requirement.requirement,
+            Requirement.verification_point,
+            ComplianceMapping.scf_mapping,
+            ComplianceMapping.iso27001_mapping,
+            ComplianceMapping.iso27002_mapping,
+            ComplianceMapping.cobit5_mapping,
+            ComplianceMapping.analysis,
+            ComplianceMapping.confidence_score,
+            ComplianceMapping.mapping_source,
+            ComplianceMapping.threat,
+            ComplianceMapping.risk,
+            ComplianceMapping.control_implementation
+        )
+        .outerjoin(
+            ComplianceMapping,
+            and_(
+                ComplianceMapping.requirement_id == Requirement.id,
+                ComplianceMapping.is_active == True,
+                ComplianceMapping.import_session_id == session_id
+            )
+        )
+        .where(Requirement.import_session_id == session_id)
+        .order_by(Requirement.id, ComplianceMapping.id)
+    )
+
+
+def result_row_to_dict(row: Row) -> Dict:
+    """
+    Sérialise une ligne de résultat au format attendu par le frontend (Requirement côté TS)
+
+    Args:
+        row: Ligne de session_results_statement
+
+    Returns:
+        Dictionnaire JSON
+    """
+    return {
+        "id": row.original_id or str(row.id),
+        "requirement": row.requirement,
+        "verificationPoint": row.verification_point,
+        "scfMapping": row.scf_mapping,
+        "iso27001Mapping": row.iso27001_mapping,
+        "iso27002Mapping": row.iso27002_mapping,
+        "cobit5Mapping": row.cobit5_mapping,
+        "analysis": row.analysis,
+        "confidenceScore": float(row.confidence_score) if row.confidence_score else None,
+        "mappingSource": row.mapping_source,
+        # Champs enrichis (agentive analysis)
+        "threat": row.threat,
+        "risk": row.risk,
+        "controlImplementation": row.control_implementation
+    }
+
+
+def iter_result_dicts(rows: Iterable[Row]) -> Iterator[Dict]:
+    """
+    Sérialise les lignes d'une session, une seule par exigence
+
+    Si une exigence a plusieurs mappings actifs, seul le premier (plus ancien) est gardé.
+
+    Args:
+        rows: Lignes de session_results_statement (triées par exigence)
+
+    Yields:
+        Dictionnaires JSON
+    """
+    previous_id = None
+    for row in rows:
+        if row.id == previous_id:
+            continue
+        previous_id = row.id
+        yield result_row_to_dict(row)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def stream_session_results(session_id: int, session: Dict, fmt: str = 'ndjson') -> Iterator[bytes]:
+    """
+    Sérialise les résultats d'une session au fil de la lecture (curseur serveur, yield_per)
+    Générateur synchrone: exécuté dans le pool de threads par StreamingResponse
+
+    Utilise sa propre session SQLAlchemy: celle de la requête est fermée avant l'envoi
+    du corps de la réponse.
+
+    Args:
+        session_id: ID de la session d'import
+        session: Informations de la session (voir session_summary), pour le format 'json'
+        fmt: 'ndjson' (un résultat par ligne) ou 'json' (même document que /results)
+
+    Yields:
+        Blocs de la réponse (environ RESULTS_STREAM_BATCH_SIZE résultats chacun)
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            session_results_statement(session_id).execution_options(yield_per=RESULTS_STREAM_BATCH_SIZE)
+        )
+
+        if fmt == 'json':
+            yield f'{{"success": true, "session": {_dumps(session)}, "results": ['.encode()
+
+        buffer = []
+        first = True
+        for result in iter_result_dicts(rows):
+            if fmt == 'json':
+                buffer.append(_dumps(result) if first else ',' + _dumps(result))
+                first = False
+            else:
+                buffer.append(_dumps(result) + '\n')
+
+            if len(buffer) >= RESULTS_STREAM_BATCH_SIZE:
+                yield ''.join(buffer).encode()
+                buffer = []
+
+        if buffer:
+            yield ''.join(buffer).encode()
+        if fmt == 'json':
+            yield b']}'
+
+    finally:
+        db.close()
@@ -0,0 +1,140 @@
+"""
+Statistiques des exigences et mappings (/api/stats)
+Une seule requête agrégée (comptages conditionnels groupés par session d'import),
+mise en cache quelques secondes: le tableau de bord interroge l'API en continu
+Les chemins d'écriture (import, analyse, sauvegarde, CRUD) invalident le cache;
+le TTL borne le décalage pour les écritures faites par un autre processus
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from models import ComplianceMapping, Requirement
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Durée de validité des statistiques en cache (secondes)
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '10'))
+
+_cache: Optional[Dict] = None
+_cache_time = 0.0
+_cache_lock = threading.Lock()
+# Incrémenté à chaque invalidation: un calcul commencé avant une écriture n'est pas mis en cache
+_generation = 0
+
+
+def _counts(total: int, analyzed: int, pending: int, manual: int, total_mappings: int) -> Dict:
+    return {
+        "total_requirements": total,
+        "analyzed": analyzed,
+        "pending": pending,
+        "manual": manual,
+        "total_mappings": total_mappings,
+        "completion_rate": (analyzed + manual) / total * 100 if total > 0 else 0
+    }
+
+
+def compute_stats(db: Session) -> Dict:
+    """
+    Calcule les statistiques globales et par session d'import (un aller-retour)
+
+    Args:
+        db: Session SQLAlchemy
+
+    Returns:
+        Statistiques globales et liste `sessions` (import_session_id None = sans session)
+    """
+    status = Requirement.analysis_status
+    requirements = select(
+        Requirement.import_session_id.label("import_session_id"),
+        func.count().label("total"),
+        func.count().filter(status == 'analyzed').label("analyzed"),
+        func.count().filter(status == 'pending').label("pending"),
+        func.count().filter(status == 'manual').label("manual"),
+        literal(0).label("mappings")
+    ).group_by(Requirement.import_session_id)
+
+    mappings = select(
+        ComplianceMapping.import_session_id,
+        literal(0), literal(0), literal(0), literal(0),
+        func.count()
+    ).where(ComplianceMapping.is_active == True).group_by(ComplianceMapping.import_session_id)
+
+    by_session: Dict[Optional[int], List[int]] = {}
+    for row in db.execute(union_all(requirements, mappings)):
+        counts = by_session.setdefault(row[0], [0, 0, 0, 0, 0])
+        for i, value in enumerate(row[1:]):
+            counts[i] += value
+
+    totals = [sum(column) for column in zip(*by_session.values())] or [0, 0, 0, 0, 0]
+    stats = _counts(*totals)
+    stats["sessions"] = [
+        {"import_session_id": session_id, **_counts(*counts)}
+        for session_id, counts in sorted(by_session.items(), key=lambda item: (item[0] is None, item[0] or 0))
+    ]
+    return stats
+
+
+def _cached_stats() -> Tuple[Optional[Dict], int]:
+    """Statistiques en cache (None si expirées) et génération courante"""
+    with _cache_lock:
+        if _cache is not None and time.monotonic() - _cache_time < STATS_CACHE_TTL:
+            return _cache, _generation
+        return None, _generation
+
+
+def _store_stats(stats: Dict, generation: int) -> Dict:
+    """Met en cache des statistiques, sauf si une invalidation a eu lieu pendant le calcul"""
+    global _cache, _cache_time
+    with _cache_lock:
+        if generation == _generation:
+            _cache = stats
+            _cache_time = time.monotonic()
+    return stats
+
+
+def get_stats(db: Session) -> Dict:
+    """
+    Statistiques depuis le cache (recalculées si expirées ou invalidées)
+
+    Args:
+        db: Session SQLAlchemy
+
+    Returns:
+        Voir compute_stats
+    """
+    stats, generation = _cached_stats()
+    if stats is not None:
+        return stats
+    return _store_stats(compute_stats(db), generation)
+
+
+async def get_stats_async(db: "AsyncSession") -> Dict:
+    """
+    Variante de get_stats pour une session asynchrone (même cache)
+
+    Args:
+        db: Session SQLAlchemy asynchrone
+
+    Returns:
+        Voir compute_stats
+    """
+    stats, generation = _cached_stats()
+    if stats is not None:
+        return stats
+    return _store_stats(await db.run_sync(compute_stats), generation)
+
+
+def invalidate_stats() -> None:
+    """Invalide le cache après une écriture sur les exigences ou les mappings"""
+    global _cache, _generation
+    with _cache_lock:
+        _cache = None
+        _generation += 1
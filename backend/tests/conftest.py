@@ -0,0 +1,22 @@
+"""
+Configuration pytest: modules du backend importables à plat (comme dans l'API)
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def postgres_engine():
+    """
+    Moteur SQLAlchemy de DATABASE_URL (base migrée); test ignoré hors PostgreSQL
+    """
+    if not os.getenv('DATABASE_URL', '').startswith(('postgres://', 'postgresql')):
+        pytest.skip("DATABASE_URL PostgreSQL requis")
+    from database import engine
+    return engine
@@ -0,0 +1,44 @@
+"""
+Doublures de test: modèle d'embeddings déterministe et contrôles SCF hors base
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class KeywordModel:
+    """
+    Modèle factice: sac de mots-clés, texte tronqué à max_seq_length mots
+    (comme un modèle Sentence-Transformers au-delà de sa fenêtre)
+    """
+    max_seq_length = 16
+    tokenizer = None
+    vocabulary = ['chiffrement', 'sauvegarde', 'journalisation']
+
+    def __init__(self):
+        # Textes passés au modèle (vérification des ré-encodages)
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return len(self.vocabulary) + 1
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        rows = []
+        for text in texts:
+            words = text.lower().replace('.', ' ').split()[:self.max_seq_length]
+            rows.append([words.count(word) for word in self.vocabulary] + [0.1])
+        return np.asarray(rows, dtype=np.float32)
+
+
+def make_control(control_id, title, description, pk=None):
+    """Contrôle SCF avec les attributs lus par les services de mapping"""
+    return SimpleNamespace(
+        id=control_id if pk is None else pk,
+        control_id=control_id,
+        control_title=title,
+        control_description=description,
+        domain='Test',
+        category='Test'
+    )
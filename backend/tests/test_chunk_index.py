@@ -0,0 +1,24 @@
+"""
+Tests de l'index multi-vecteurs (max-sim sur les segments)
+"""
+
+import numpy as np
+
+from chunk_index import ChunkIndex, owner_offsets
+
+
+def test_owner_offsets():
+    assert owner_offsets(np.array([0, 0, 1, 2, 2, 2])).tolist() == [0, 2, 3]
+
+
+def test_score_queries_matches_per_query_score():
+    rng = np.random.default_rng(0)
+    index = ChunkIndex(rng.normal(size=(7, 4)), np.array([0, 0, 1, 2, 2, 2, 3]))
+    query_embeddings = rng.normal(size=(5, 4))
+    query_owners = np.array([0, 1, 1, 1, 2])
+
+    scores = index.score_queries(query_embeddings, query_owners)
+
+    assert scores.shape == (3, index.num_owners)
+    for query, segments in enumerate(np.split(query_embeddings, owner_offsets(query_owners)[1:])):
+        np.testing.assert_allclose(scores[query], index.score(segments), rtol=1e-6)
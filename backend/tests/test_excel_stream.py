@@ -0,0 +1,46 @@
+"""
+Tests de la lecture en flux des classeurs Excel
+"""
+
+import pandas as pd
+from openpyxl import Workbook
+
+from excel_stream import iter_sheet_chunks, read_sheet_heads
+
+
+def _write_workbook(path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Exigences'
+    sheet.append(['ID', 'Exigence'])
+    sheet.append(['REQ-1', 'Chiffrement des données'])
+    sheet.append([None, None])
+    sheet.append([None, None])
+    sheet.append(['REQ-2', 'Sauvegarde quotidienne'])
+    sheet.append(['REQ-3', 'Journalisation des accès'])
+    sheet.append([None, None])
+    workbook.save(path)
+
+
+def test_read_sheet_heads_skips_blank_rows(tmp_path):
+    path = tmp_path / 'exigences.xlsx'
+    _write_workbook(path)
+
+    (sheet_name, head), = read_sheet_heads(path, max_rows=2)
+
+    assert sheet_name == 'Exigences'
+    assert head['ID'].tolist() == ['REQ-1', 'REQ-2']
+    # Numéros de ligne de données, comme à l'import
+    assert head.index.tolist() == [0, 3]
+
+
+def test_sheet_chunks_keep_interior_blank_rows_like_pandas(tmp_path):
+    path = tmp_path / 'exigences.xlsx'
+    _write_workbook(path)
+
+    frames = [frame for _, frame in iter_sheet_chunks(path, chunk_size=2)]
+    streamed = pd.concat(frames)
+    expected = pd.read_excel(path)
+
+    assert streamed.index.tolist() == expected.index.tolist()
+    assert streamed['ID'].tolist() == [None if pd.isna(v) else v for v in expected['ID']]
@@ -0,0 +1,63 @@
+"""
+Tests du service de mapping en mémoire (modèle factice, sans base ni téléchargement)
+"""
+
+import numpy as np
+import pytest
+
+import embedding_store
+from chunk_index import ChunkIndex
+from fakes import KeywordModel, make_control
+from ml_service import MLMappingService, ScoreCalibration
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(embedding_store, 'REQUIREMENT_EMBEDDINGS_ENABLED', False)
+    model = KeywordModel()
+    controls = [
+        make_control('CRY-01', 'Chiffrement', 'Chiffrement des données au repos.'),
+        make_control('BCD-01', 'Sauvegarde', 'Sauvegarde quotidienne des données.'),
+    ]
+    service = MLMappingService(model_name='keyword-test', cascade=False)
+    service._model = model
+    bodies, prefixes = service._control_segments(controls)
+    service._set_control_index([c.control_id for c in controls], ChunkIndex.build(model, bodies, prefixes))
+    return service, controls
+
+
+def test_requirement_clause_past_truncation_point(service):
+    service, controls = service
+    requirement = (
+        "Le fournisseur doit respecter les exigences générales du contrat. " * 3
+        + "Les données clients doivent faire l'objet d'un chiffrement."
+    )
+    # La clause utile est au-delà de la fenêtre du modèle
+    assert 'chiffrement' not in requirement.lower().split()[:KeywordModel.max_seq_length]
+
+    results = service.find_similar_controls(requirement, controls, top_k=2, min_similarity=0.0)
+    assert results[0].control_id == 'CRY-01'
+    assert results[0].similarity_score > 0.9
+
+    batch = service.find_similar_controls_batch(
+        [requirement, "Sauvegarde des postes."], controls, top_k=1, min_similarity=0.0
+    )
+    assert [row[0].control_id for row in batch] == ['CRY-01', 'BCD-01']
+
+
+def test_calibration_preserves_precise_ranking_without_extrapolation():
+    rng = np.random.default_rng(0)
+    # Shortlists: scores hauts, score précis fonction croissante (non affine) du score léger
+    fast = rng.uniform(0.5, 0.9, size=(30, 5))
+    precise = fast ** 2 + 0.05
+
+    calibration = ScoreCalibration(min_pairs=100)
+    calibration.add(fast, precise)
+    assert calibration.ready
+
+    calibrated = calibration.apply(fast)
+    np.testing.assert_array_equal(np.argsort(calibrated, axis=1), np.argsort(precise, axis=1))
+
+    # Scores hors de la plage ajustée: pas d'extrapolation au-delà des paires observées
+    outside = calibration.apply(np.array([-0.8, 0.0, 0.99]))
+    assert outside.min() >= calibrated.min() and outside.max() <= calibrated.max()
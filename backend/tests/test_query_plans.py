@@ -0,0 +1,54 @@
+"""
+Tests des plans d'exécution: les requêtes fréquentes utilisent leurs index
+(EXPLAIN sur une base migrée, ignorés hors PostgreSQL)
+"""
+
+import pytest
+from sqlalchemy import text
+
+from check_query_plans import explain, hot_queries, plan_indexes, vector_queries
+
+
+CANNED_PLAN = {
+    "Node Type": "Limit",
+    "Plans": [
+        {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {"Node Type": "Index Scan", "Index Name": "idx_requirements_session_id"},
+                {
+                    "Node Type": "Bitmap Heap Scan",
+                    "Plans": [{"Node Type": "Bitmap Index Scan", "Index Name": "idx_mappings_active_session"}]
+                },
+            ]
+        }
+    ]
+}
+
+
+def test_plan_indexes_nested():
+    assert plan_indexes(CANNED_PLAN) == {"idx_requirements_session_id", "idx_mappings_active_session"}
+    assert plan_indexes({"Node Type": "Seq Scan"}) == set()
+
+
+@pytest.fixture
+def plan_conn(postgres_engine):
+    """Connexion sans parcours séquentiel (SET LOCAL, annulé à la fermeture)"""
+    with postgres_engine.connect() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        yield conn
+
+
+@pytest.mark.parametrize("query", hot_queries(session_id=1), ids=lambda query: query["name"])
+def test_hot_query_uses_index(plan_conn, query):
+    plan = explain(plan_conn, query["statement"])
+    assert plan_indexes(plan) >= query["indexes"]
+
+
+def test_vector_search_uses_model_index(plan_conn):
+    queries = vector_queries(plan_conn)
+    if not queries:
+        pytest.skip("Aucun modèle indexé dans scf_control_embeddings")
+    for query in queries:
+        plan = explain(plan_conn, query["statement"])
+        assert plan_indexes(plan) >= query["indexes"], query["name"]
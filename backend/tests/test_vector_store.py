@@ -0,0 +1,142 @@
+"""
+Tests du stockage pgvector: constructeurs SQL (sans base) et synchronisation
+des embeddings (PostgreSQL avec l'extension vector, ignorés sinon)
+"""
+
+import uuid
+
+import numpy as np
+import pytest
+from sqlalchemy import select, text
+
+from database import SessionLocal
+from fakes import KeywordModel, make_control
+from models import Requirement, SCFControl
+from vector_store import (
+    PgVectorMappingService,
+    RequirementVector,
+    SCFControlEmbedding,
+    VectorExtensionMissing,
+    ensure_vector_schema,
+    search_sql,
+    vector_index_name,
+    vector_literal,
+)
+
+
+def test_vector_index_name_per_model():
+    name = vector_index_name('scf_control_embeddings', 'paraphrase-multilingual-mpnet-base-v2')
+    assert name.startswith('idx_scf_control_embeddings_hnsw_')
+    assert len(name) <= 63
+    assert name == vector_index_name('scf_control_embeddings', 'paraphrase-multilingual-mpnet-base-v2')
+    assert name != vector_index_name('scf_control_embeddings', 'paraphrase-multilingual-MiniLM-L12-v2')
+    assert name != vector_index_name('requirement_vectors', 'paraphrase-multilingual-mpnet-base-v2')
+
+
+def test_vector_literal_round_trip():
+    embedding = np.array([0.1, -1.0, 2.5], dtype=np.float32)
+    literal = vector_literal(embedding)
+    assert literal.startswith('[') and literal.endswith(']')
+    np.testing.assert_array_equal(np.array(literal[1:-1].split(','), dtype=np.float32), embedding)
+
+
+def test_search_sql_uses_model_dimension():
+    statement = search_sql(384)
+    sql = str(statement)
+    assert 'e.embedding::vector(384) <=> CAST(q.embedding AS vector(384))' in sql
+    assert 'WHERE e.model_name = :model' in sql
+    assert set(statement.compile().params) == {'queries', 'model', 'top_k'}
+
+
+def _vector_installed(engine) -> bool:
+    with engine.connect() as conn:
+        return bool(conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'vector'")).scalar())
+
+
+def test_schema_requires_extension(postgres_engine):
+    if _vector_installed(postgres_engine):
+        pytest.skip("Extension vector installée")
+    with pytest.raises(VectorExtensionMissing):
+        ensure_vector_schema()
+
+
+@pytest.fixture
+def vector_db(postgres_engine):
+    """Deux contrôles et une exigence de test, un modèle dédié; tout est supprimé ensuite"""
+    if not _vector_installed(postgres_engine):
+        pytest.skip("Extension vector absente (database/migration_pgvector.sql)")
+
+    suffix = uuid.uuid4().hex[:8]
+    model_name = f'test-keyword-{suffix}'
+    db = SessionLocal()
+    rows = [
+        SCFControl(control_id=f'TST-CRY-{suffix}', control_title='Chiffrement',
+                   control_description='Chiffrement des données au repos.'),
+        SCFControl(control_id=f'TST-BCD-{suffix}', control_title='Sauvegarde',
+                   control_description='Sauvegarde quotidienne des données.'),
+    ]
+    requirement = Requirement(requirement='Sauvegarde des postes.', source_file=f'test-{suffix}.xlsx')
+    db.add_all(rows + [requirement])
+    db.commit()
+
+    controls = [make_control(row.control_id, row.control_title, row.control_description, pk=row.id) for row in rows]
+    try:
+        yield controls, requirement.id, model_name
+    finally:
+        for row in rows + [requirement]:
+            db.delete(row)
+        db.commit()
+        db.close()
+        with postgres_engine.begin() as conn:
+            for table_name in (SCFControlEmbedding.__tablename__, RequirementVector.__tablename__):
+                conn.execute(text(f"DROP INDEX IF EXISTS {vector_index_name(table_name, model_name)}"))
+
+
+def _service(model_name):
+    service = PgVectorMappingService(model_name=model_name)
+    service._model = KeywordModel()
+    return service
+
+
+def test_warm_up_encodes_only_changed_controls(postgres_engine, vector_db):
+    controls, _, model_name = vector_db
+    service = _service(model_name)
+
+    service.warm_up(controls)
+    with postgres_engine.connect() as conn:
+        stored = conn.execute(
+            select(SCFControlEmbedding.control_id)
+            .where(SCFControlEmbedding.model_name == model_name)
+        ).scalars().all()
+    assert sorted(stored) == sorted(control.id for control in controls)
+
+    # Contrôle modifié: seul son texte repasse par le modèle
+    changed = [controls[0], make_control(
+        controls[1].control_id, 'Sauvegarde', 'Sauvegarde chiffrée des données.', pk=controls[1].id
+    )]
+    service.model.encoded.clear()
+    service.warm_up(changed)
+    assert service.model.encoded == ['Sauvegarde Sauvegarde chiffrée des données.']
+
+    results = service.find_similar_controls(
+        "Les données doivent faire l'objet d'une journalisation et d'un chiffrement.",
+        changed, top_k=2, min_similarity=0.0
+    )
+    assert results[0].control_id == controls[0].control_id
+
+
+def test_store_requirement_embeddings_upserts(postgres_engine, vector_db):
+    _, requirement_id, model_name = vector_db
+    service = _service(model_name)
+
+    for embedding in ([1.0, 0.0, 0.0, 0.1], [0.0, 1.0, 0.0, 0.1]):
+        service.store_requirement_embeddings([requirement_id], np.array([embedding], dtype=np.float32))
+
+    with postgres_engine.connect() as conn:
+        stored = conn.execute(
+            select(RequirementVector.embedding)
+            .where(RequirementVector.requirement_id == requirement_id)
+            .where(RequirementVector.model_name == model_name)
+        ).scalars().all()
+    assert len(stored) == 1
+    np.testing.assert_allclose(np.asarray(stored[0]), [0.0, 1.0, 0.0, 0.1], rtol=1e-6)
@@ -0,0 +1,385 @@
+"""
+Stockage des embeddings dans PostgreSQL (pgvector) et recherche top-k en SQL
+Backend optionnel du service de mapping (VECTOR_BACKEND=pgvector): les embeddings des
+contrôles et des exigences sont écrits dans des tables pgvector, partagés par tous les
+workers et joignables en SQL. Même interface que le service en mémoire.
+
+Les vecteurs sont stockés par modèle (clé (contrôle, modèle)): pendant et après un
+changement de modèle à chaud, l'ancien et le nouveau service disposent chacun de
+leurs vecteurs. Chaque modèle a son index HNSW partiel, à sa dimension
+((embedding::vector(n)) WHERE model_name = ...), créé au premier démarrage.
+L'extension vector doit avoir été installée par database/migration_pgvector.sql.
+"""
+
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, ForeignKey, Integer, String, TIMESTAMP, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.declarative import declarative_base
+
+from cache_manager import content_hash
+from chunk_index import owner_offsets
+from database import engine
+from ml_service import MLMappingService
+from models import Requirement, SCFControl
+from schemas import SimilaritySearchResponse
+
+
+# Tables pgvector: métadonnées séparées de Base (create_all de l'API sans l'extension)
+VectorBase = declarative_base()
+
+
+class SCFControlEmbedding(VectorBase):
+    """
+    Embedding d'un contrôle SCF pour un modèle
+    """
+    __tablename__ = "scf_control_embeddings"
+
+    control_id = Column(Integer, ForeignKey(SCFControl.id, ondelete='CASCADE'), primary_key=True)
+    model_name = Column(String(255), primary_key=True)
+
+    # Empreinte du texte encodé (titre + description): ré-encodage si le contrôle change
+    text_hash = Column(String(64), nullable=False)
+
+    # Dimension propre au modèle (index par modèle sur embedding::vector(n))
+    embedding = Column(Vector(), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class RequirementVector(VectorBase):
+    """
+    Embedding d'une exigence pour un modèle (écrit lors de l'analyse ML)
+    Exigence longue: moyenne normalisée des embeddings de ses segments
+    """
+    __tablename__ = "requirement_vectors"
+
+    requirement_id = Column(Integer, ForeignKey(Requirement.id, ondelete='CASCADE'), primary_key=True)
+    model_name = Column(String(255), primary_key=True)
+    embedding = Column(Vector(), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class VectorExtensionMissing(Exception):
+    """Exception levée lorsque l'extension vector n'est pas installée dans la base"""
+    pass
+
+
+def ensure_vector_schema() -> None:
+    """
+    Vérifie l'extension vector puis crée les tables pgvector si nécessaire (idempotent)
+    L'extension est installée par database/migration_pgvector.sql, pas par l'application
+    """
+    with engine.connect() as conn:
+        installed = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'vector'")).scalar()
+    if not installed:
+        raise VectorExtensionMissing(
+            "Extension PostgreSQL 'vector' absente: exécuter database/migration_pgvector.sql "
+            "sur un serveur avec pgvector (docker-compose.pgvector.yml en local) "
+            "ou utiliser VECTOR_BACKEND=memory"
+        )
+    VectorBase.metadata.create_all(bind=engine)
+
+
+def vector_index_name(table_name: str, model_name: str) -> str:
+    """Nom de l'index HNSW d'un modèle sur une table (stable, borné à 63 caractères)"""
+    return f"idx_{table_name}_hnsw_{hashlib.sha256(model_name.encode()).hexdigest()[:12]}"
+
+
+def ensure_vector_index(conn, table_name: str, model_name: str, dimension: int) -> None:
+    """
+    Crée l'index HNSW partiel d'un modèle (distance cosinus, dimension du modèle)
+
+    Args:
+        conn: Connexion SQLAlchemy (dans une transaction)
+        table_name: scf_control_embeddings ou requirement_vectors
+        model_name: Modèle indexé
+        dimension: Dimension des embeddings du modèle
+    """
+    model_literal = model_name.replace("'", "''")
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {vector_index_name(table_name, model_name)} "
+        f"ON {table_name} USING hnsw ((embedding::vector({int(dimension)})) vector_cosine_ops) "
+        f"WHERE model_name = '{model_literal}'"
+    ))
+
+
+def search_sql(dimension: int):
+    """
+    Top-k des contrôles pour chaque requête (une sous-requête LATERAL par requête)
+    L'expression de tri reprend celle de l'index du modèle (embedding::vector(n))
+
+    Args:
+        dimension: Dimension des embeddings du modèle
+
+    Returns:
+        Instruction SQL (paramètres :queries, :model, :top_k)
+    """
+    vector_type = f"vector({int(dimension)})"
+    return text(f"""
+        SELECT q.ord, c.control_id, 1 - c.distance AS score
+        FROM unnest(CAST(:queries AS text[])) WITH ORDINALITY AS q(embedding, ord)
+        CROSS JOIN LATERAL (
+            SELECT e.control_id, e.embedding::{vector_type} <=> CAST(q.embedding AS {vector_type}) AS distance
+            FROM scf_control_embeddings e
+            WHERE e.model_name = :model
+            ORDER BY e.embedding::{vector_type} <=> CAST(q.embedding AS {vector_type})
+            LIMIT :top_k
+        ) c
+        ORDER BY q.ord, c.distance
+    """)
+
+
+def vector_literal(embedding: np.ndarray) -> str:
+    """
+    Représentation texte d'un embedding pour pgvector ('[x1,x2,...]')
+
+    Args:
+        embedding: Vecteur numpy (dim,)
+
+    Returns:
+        Littéral accepté par CAST(... AS vector)
+    """
+    return '[' + ','.join(map(repr, np.asarray(embedding, dtype=np.float32).tolist())) + ']'
+
+
+def pooled_embeddings(embeddings: np.ndarray, owners: np.ndarray) -> np.ndarray:
+    """
+    Un vecteur par exigence à partir de ses segments (moyenne normalisée)
+    Une exigence d'un seul segment garde son embedding (à la norme près)
+
+    Args:
+        embeddings: Embeddings des segments (n_segments, dim)
+        owners: Exigence de chaque segment (blocs contigus)
+
+    Returns:
+        Matrice (n_exigences, dim)
+    """
+    offsets = owner_offsets(owners)
+    normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    pooled = np.add.reduceat(normalized, offsets, axis=0)
+    return (pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+
+class PgVectorMappingService(MLMappingService):
+    """
+    Service de mapping dont l'index des contrôles est stocké dans scf_control_embeddings
+    Les contrôles absents ou modifiés (empreinte du texte) sont encodés au démarrage;
+    la recherche est faite par PostgreSQL
+    La cascade rapide/précise n'est pas disponible avec ce stockage
+    """
+
+    def __init__(self, model_name: Optional[str] = None, cascade: Optional[bool] = None):
+        super().__init__(model_name=model_name, cascade=False)
+        if cascade:
+            logger.warning("⚠️ Cascade ignorée avec le stockage pgvector")
+
+        # Empreinte des contrôles déjà synchronisés par ce processus
+        self._synced_fingerprint: Optional[str] = None
+        self._schema_ready = False
+        self._sync_lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        """Dimension des embeddings du modèle"""
+        return self.model.get_sentence_embedding_dimension()
+
+    def _ensure_schema(self) -> None:
+        """Tables pgvector et index HNSW du modèle (une fois par processus)"""
+        if self._schema_ready:
+            return
+        ensure_vector_schema()
+        with engine.begin() as conn:
+            for table_name in (SCFControlEmbedding.__tablename__, RequirementVector.__tablename__):
+                ensure_vector_index(conn, table_name, self.model_name, self.dimension)
+        self._schema_ready = True
+
+    def warm_up(self, controls: List[SCFControl]) -> None:
+        """
+        Synchronise les embeddings des contrôles pour ce modèle: seuls les contrôles
+        absents ou modifiés sont encodés puis écrits (les vecteurs des autres modèles
+        ne sont pas modifiés)
+
+        Args:
+            controls: Liste des contrôles SCF
+        """
+        texts = self._control_texts(controls)
+        hashes = [content_hash([control_text]) for control_text in texts]
+        fingerprint = content_hash(f"{control.id}\t{h}" for control, h in zip(controls, hashes))
+
+        with self._sync_lock:
+            if fingerprint == self._synced_fingerprint:
+                return
+
+            self._ensure_schema()
+            with engine.connect() as conn:
+                stored = dict(conn.execute(
+                    select(SCFControlEmbedding.control_id, SCFControlEmbedding.text_hash)
+                    .where(SCFControlEmbedding.model_name == self.model_name)
+                ).all())
+
+            stale = [i for i, control in enumerate(controls) if stored.get(control.id) != hashes[i]]
+            if stale:
+                logger.info(f"📦 Encodage de {len(stale)}/{len(controls)} contrôles SCF vers pgvector...")
+                embeddings = self.encode_batch([texts[i] for i in stale])
+                stmt = pg_insert(SCFControlEmbedding)
+                with engine.begin() as conn:
+                    conn.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=['control_id', 'model_name'],
+                            set_={'embedding': stmt.excluded.embedding, 'text_hash': stmt.excluded.text_hash}
+                        ),
+                        [
+                            {
+                                "control_id": controls[i].id,
+                                "model_name": self.model_name,
+                                "text_hash": hashes[i],
+                                "embedding": np.asarray(embedding, dtype=np.float32)
+                            }
+                            for i, embedding in zip(stale, embeddings)
+                        ]
+                    )
+
+            self._synced_fingerprint = fingerprint
+            logger.info(f"✅ Index pgvector prêt: {len(controls)} contrôles ({len(stale)} encodés)")
+
+    def store_requirement_embeddings(self, requirement_ids: Sequence[int], embeddings: np.ndarray) -> None:
+        """
+        Écrit les embeddings des exigences pour ce modèle (requirement_vectors)
+
+        Args:
+            requirement_ids: IDs des exigences
+            embeddings: Matrice alignée sur requirement_ids
+        """
+        if not len(requirement_ids):
+            return
+        self._ensure_schema()
+        stmt = pg_insert(RequirementVector)
+        with engine.begin() as conn:
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=['requirement_id', 'model_name'],
+                    set_={'embedding': stmt.excluded.embedding}
+                ),
+                [
+                    {
+                        "requirement_id": requirement_id,
+                        "model_name": self.model_name,
+                        "embedding": np.asarray(embedding, dtype=np.float32)
+                    }
+                    for requirement_id, embedding in zip(requirement_ids, embeddings)
+                ]
+            )
+
+    def _search(
+        self,
+        requirement_segments: Tuple[np.ndarray, np.ndarray],
+        controls: List[SCFControl],
+        top_k: int,
+        min_similarity: float
+    ) -> List[List[SimilaritySearchResponse]]:
+        """
+        Top-k des contrôles pour chaque exigence (une requête SQL pour tous les segments)
+        Le score d'un contrôle est le maximum sur les segments de l'exigence: le top-k
+        par segment contient donc le top-k de l'exigence
+
+        Args:
+            requirement_segments: Sortie de encode_requirements (embeddings des segments, propriétaires)
+            controls: Contrôles SCF (seuls ceux de la liste sont retournés)
+            top_k: Nombre de résultats par exigence
+            min_similarity: Seuil minimal de similarité
+
+        Returns:
+            Liste (alignée sur les exigences) des contrôles similaires
+        """
+        segment_embeddings, owners = requirement_segments
+        self.warm_up(controls)
+        controls_by_id: Dict[int, SCFControl] = {control.id: control for control in controls}
+
+        with engine.connect() as conn:
+            rows = conn.execute(search_sql(self.dimension), {
+                "queries": [vector_literal(embedding) for embedding in segment_embeddings],
+                "model": self.model_name,
+                "top_k": top_k
+            }).all()
+
+        # Meilleur score de chaque contrôle sur les segments de chaque exigence
+        best: List[Dict[int, float]] = [{} for _ in range(len(owner_offsets(owners)))]
+        for ord_, control_id, score in rows:
+            scores = best[owners[ord_ - 1]]
+            if control_id in controls_by_id and score > scores.get(control_id, -1.0):
+                scores[control_id] = score
+
+        results: List[List[SimilaritySearchResponse]] = []
+        for scores in best:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            results.append([
+                SimilaritySearchResponse(
+                    control_id=control.control_id,
+                    control_title=control.control_title,
+                    control_description=control.control_description,
+                    similarity_score=float(score),
+                    domain=control.domain,
+                    category=control.category
+                )
+                for control, score in ((controls_by_id[control_id], score) for control_id, score in ranked)
+                if score >= min_similarity
+            ])
+        return results
+
+    def find_similar_controls(
+        self,
+        requirement_text: str,
+        controls: List[SCFControl],
+        top_k: int = 5,
+        min_similarity: float = 0.3
+    ) -> List[SimilaritySearchResponse]:
+        """Voir MLMappingService.find_similar_controls (recherche en SQL)"""
+        try:
+            logger.info(f"🔍 Recherche de similarité (pgvector) pour: {requirement_text[:100]}...")
+            requirement_segments = self.encode_requirements([requirement_text])
+            results = self._search(requirement_segments, controls, top_k, min_similarity)[0]
+            logger.info(f"✅ Trouvé {len(results)} contrôles similaires (score > {min_similarity})")
+            return results
+
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la recherche de similarité: {e}")
+            raise
+
+    def find_similar_controls_batch(
+        self,
+        requirement_texts: List[str],
+        controls: List[SCFControl],
+        top_k: int = 5,
+        min_similarity: float = 0.3,
+        requirement_ids: Optional[List[int]] = None
+    ) -> List[List[SimilaritySearchResponse]]:
+        """Voir MLMappingService.find_similar_controls_batch (recherche en SQL, embeddings des exigences stockés)"""
+        if not requirement_texts:
+            return []
+
+        try:
+            logger.info(f"🔍 Recherche de similarité (pgvector) pour {len(requirement_texts)} exigences...")
+            requirement_segments = self.encode_requirements(requirement_texts)
+            if requirement_ids is not None:
+                self.store_requirement_embeddings(requirement_ids, pooled_embeddings(*requirement_segments))
+            return self._search(requirement_segments, controls, top_k, min_similarity)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la recherche de similarité batch: {e}")
+            raise
+
+    def get_model_info(self) -> Dict:
+        """Informations du modèle, contrôles indexés en base"""
+        info = super().get_model_info()
+        with engine.connect() as conn:
+            info['cached_controls'] = conn.execute(
+                select(func.count()).select_from(SCFControlEmbedding)
+                .where(SCFControlEmbedding.model_name == self.model_name)
+            ).scalar()
+        info['vector_backend'] = 'pgvector'
+        return info
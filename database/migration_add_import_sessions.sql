@@ -11,7 +11,7 @@ CREATE TABLE IF NOT EXISTS import_sessions (
     status VARCHAR(50) DEFAULT 'processing',
     tags TEXT,
     session_metadata JSONB,
-    import_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    import_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
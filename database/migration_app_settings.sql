@@ -0,0 +1,17 @@
+-- Migration: Paramètres applicatifs partagés
+-- Description: Table app_settings (clé → valeur) lue par tous les workers. Contient
+--              le modèle d'embedding actif choisi via /api/admin/model/swap
+--              (clé 'ml_model_name'): il est réappliqué au redémarrage et les autres
+--              workers basculent à leur tour (ML_MODEL_SYNC_INTERVAL).
+-- Idempotente: peut être rejouée sans effet.
+
+CREATE TABLE IF NOT EXISTS app_settings (
+    key VARCHAR(100) PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Revenir au modèle de ML_MODEL_NAME (au prochain redémarrage des workers):
+-- DELETE FROM app_settings WHERE key = 'ml_model_name';
+
+SELECT 'Migration app_settings terminée avec succès!' as status;
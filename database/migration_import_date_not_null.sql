@@ -0,0 +1,16 @@
+-- Migration: import_sessions.import_date obligatoire
+-- Description: L'historique des imports est paginé par curseur sur (import_date, id)
+--              en ordre décroissant. Une date NULL n'est ni avant ni après le curseur
+--              (comparaison de lignes): ces sessions étaient sautées ou mal placées.
+--              Les dates manquantes reprennent created_at (ou l'instant de la migration),
+--              puis la colonne devient NOT NULL.
+-- Idempotente: peut être rejouée sans effet.
+
+UPDATE import_sessions
+SET import_date = COALESCE(created_at, CURRENT_TIMESTAMP)
+WHERE import_date IS NULL;
+
+ALTER TABLE import_sessions ALTER COLUMN import_date SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE import_sessions ALTER COLUMN import_date SET NOT NULL;
+
+SELECT 'Migration import_date_not_null terminée avec succès!' as status;
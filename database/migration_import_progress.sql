@@ -0,0 +1,32 @@
+-- Migration: Suivi de progression des imports en arrière-plan
+-- Ajoute les compteurs (lignes lues / insérées) et le message d'erreur à import_sessions
+-- Idempotente: peut être rejouée sans effet
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'import_sessions'
+        AND column_name = 'rows_parsed'
+    ) THEN
+        ALTER TABLE import_sessions ADD COLUMN rows_parsed INTEGER DEFAULT 0;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'import_sessions'
+        AND column_name = 'rows_inserted'
+    ) THEN
+        ALTER TABLE import_sessions ADD COLUMN rows_inserted INTEGER DEFAULT 0;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'import_sessions'
+        AND column_name = 'error_message'
+    ) THEN
+        ALTER TABLE import_sessions ADD COLUMN error_message TEXT;
+    END IF;
+END $$;
+
+SELECT 'Migration import_progress terminée avec succès!' as status;
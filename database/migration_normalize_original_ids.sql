@@ -0,0 +1,26 @@
+-- Migration: Identifiants numériques des exigences sans décimale
+-- Description: L'ancien import (pd.read_excel) écrivait '4.0' pour un identifiant
+--              numérique dès que sa colonne contenait une cellule vide; l'import en flux
+--              écrit toujours '4'. Sans cette migration, le réimport d'un fichier déjà
+--              importé ne reconnaîtrait pas ces exigences (clé original_id, source_file)
+--              et les dupliquerait.
+-- Les lignes dont la forme normalisée existe déjà (fichier réimporté entre-temps) sont
+-- laissées telles quelles et listées par la requête finale.
+-- Idempotente: peut être rejouée sans effet.
+
+UPDATE requirements r
+SET original_id = regexp_replace(r.original_id, '\.0$', '')
+WHERE r.original_id ~ '^-?[0-9]+\.0$'
+  AND NOT EXISTS (
+      SELECT 1
+      FROM requirements d
+      WHERE d.original_id = regexp_replace(r.original_id, '\.0$', '')
+        AND d.source_file IS NOT DISTINCT FROM r.source_file
+  );
+
+-- Doublons restants (même exigence sous '4.0' et '4'): à fusionner manuellement
+SELECT id, original_id, source_file
+FROM requirements
+WHERE original_id ~ '^-?[0-9]+\.0$';
+
+SELECT 'Migration normalize_original_ids terminée avec succès!' as status;
@@ -0,0 +1,54 @@
+-- Migration: Stockage des embeddings avec pgvector (optionnel)
+-- Description: Tables des embeddings par modèle pour VECTOR_BACKEND=pgvector (voir
+--              backend/vector_store.py, mêmes définitions). À exécuter avant de
+--              démarrer le backend: seule cette migration crée l'extension (par un
+--              utilisateur qui en a le droit); le backend vérifie sa présence puis crée
+--              les tables manquantes et l'index HNSW de son modèle au démarrage.
+-- Prérequis: extension pgvector >= 0.5.0 sur le serveur (image pgvector/pgvector,
+--            Neon et Render la proposent).
+-- Dimension: non fixée par la colonne; chaque modèle a son index partiel sur
+--            embedding::vector(n), n = dimension du modèle (768 pour
+--            paraphrase-multilingual-mpnet-base-v2, 384 pour les modèles MiniLM).
+--            Les vecteurs de plusieurs modèles coexistent (changement de modèle à chaud).
+--
+-- Idempotente: peut être rejouée sans effet.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- 1. Contrôles SCF: un vecteur par (contrôle, modèle)
+CREATE TABLE IF NOT EXISTS scf_control_embeddings (
+    control_id INTEGER NOT NULL REFERENCES scf_controls(id) ON DELETE CASCADE,
+    model_name VARCHAR(255) NOT NULL,
+    text_hash VARCHAR(64) NOT NULL,  -- SHA-256 du texte encodé (titre + description)
+    embedding vector NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (control_id, model_name)
+);
+
+-- 2. Exigences: un vecteur par (exigence, modèle), écrit lors de l'analyse ML
+CREATE TABLE IF NOT EXISTS requirement_vectors (
+    requirement_id INTEGER NOT NULL REFERENCES requirements(id) ON DELETE CASCADE,
+    model_name VARCHAR(255) NOT NULL,
+    embedding vector NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (requirement_id, model_name)
+);
+
+-- Index HNSW: créés par le backend pour son modèle (vector_store.ensure_vector_index), ex:
+-- CREATE INDEX IF NOT EXISTS idx_scf_control_embeddings_hnsw_<sha256(modèle)[:12]>
+--     ON scf_control_embeddings USING hnsw ((embedding::vector(768)) vector_cosine_ops)
+--     WHERE model_name = 'paraphrase-multilingual-mpnet-base-v2';
+
+-- Purge des vecteurs d'un ancien modèle (après un changement de modèle):
+-- DELETE FROM scf_control_embeddings WHERE model_name = '<ancien modèle>';
+-- DELETE FROM requirement_vectors WHERE model_name = '<ancien modèle>';
+
+-- Exemple: exigences proches d'une exigence donnée, en SQL
+-- SELECT r.requirement_id, 1 - (r.embedding::vector(768) <=> ref.embedding::vector(768)) AS similarity
+-- FROM requirement_vectors ref
+-- JOIN requirement_vectors r ON r.model_name = ref.model_name AND r.requirement_id <> ref.requirement_id
+-- WHERE ref.requirement_id = 42 AND ref.model_name = 'paraphrase-multilingual-mpnet-base-v2'
+-- ORDER BY r.embedding::vector(768) <=> ref.embedding::vector(768)
+-- LIMIT 10;
+
+SELECT 'Migration pgvector terminée avec succès!' as status;
@@ -0,0 +1,90 @@
+-- Migration: Index composites et partiels des requêtes fréquentes
+-- Description: Aligne les index des bases créées par schema.sql + migrations et par
+--              SQLAlchemy (create_all) sur ceux déclarés dans backend/models.py:
+--   - requirements(import_session_id, id)          résultats d'une session, triés par exigence
+--   - requirements(analysis_status, id)            liste filtrée par statut, pagination keyset
+--   - compliance_mappings(import_session_id, requirement_id) WHERE is_active
+--                                                  mappings actifs d'une session (résultats, stats)
+--   - import_sessions(import_date, id)             historique des imports, pagination keyset
+-- (original_id, source_file) est couvert par la contrainte unique_requirement
+-- (migration_unique_requirements.sql).
+-- Les index mono-colonne rendus redondants sont supprimés (coût d'écriture des imports).
+--
+-- À exécuter en autocommit: psql -f database/migration_query_indexes.sql
+-- CREATE/DROP INDEX CONCURRENTLY (pas de verrou bloquant les écritures) est refusé dans
+-- une transaction: ne pas l'entourer de BEGIN/COMMIT, ne pas utiliser
+-- --single-transaction (-1) ni le copier-coller dans une console qui ouvre une transaction.
+-- Idempotente: peut être rejouée sans effet.
+-- Si une création concurrente échoue, supprimer l'index invalide et relancer.
+
+-- 1. Nouveaux index
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_requirements_session_id
+    ON requirements(import_session_id, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_requirements_status_id
+    ON requirements(analysis_status, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mappings_active_session
+    ON compliance_mappings(import_session_id, requirement_id)
+    WHERE is_active;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_import_sessions_date_id
+    ON import_sessions(import_date, id);
+
+-- 2. Index créés par SQLAlchemy (ix_*) identiques à ceux de schema.sql (idx_*):
+--    renommés s'ils sont seuls, supprimés s'ils font doublon
+DO $$
+DECLARE
+    pair TEXT[];
+BEGIN
+    FOREACH pair SLICE 1 IN ARRAY ARRAY[
+        ['ix_compliance_mappings_requirement_id', 'idx_mappings_requirement'],
+        ['ix_compliance_mappings_mapping_source', 'idx_mappings_source'],
+        ['ix_compliance_mappings_import_session_id', 'idx_mappings_session']
+    ] LOOP
+        -- IF EXISTS: sans effet si l'index a déjà été renommé ou supprimé (rejeu)
+        IF to_regclass(pair[1]) IS NOT NULL THEN
+            IF to_regclass(pair[2]) IS NULL THEN
+                EXECUTE format('ALTER INDEX IF EXISTS %I RENAME TO %I', pair[1], pair[2]);
+                RAISE NOTICE 'Index % renommé en %', pair[1], pair[2];
+            ELSE
+                EXECUTE format('DROP INDEX IF EXISTS %I', pair[1]);
+                RAISE NOTICE 'Index % supprimé (doublon de %)', pair[1], pair[2];
+            END IF;
+        END IF;
+    END LOOP;
+END $$;
+
+-- Index de migration_add_import_sessions.sql absents des bases créées par create_all
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mappings_session
+    ON compliance_mappings(import_session_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_import_sessions_status
+    ON import_sessions(status);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_import_sessions_source
+    ON import_sessions(analysis_source);
+
+-- 3. Index redondants
+-- Doublons des clés primaires (index=True sur les colonnes id)
+DROP INDEX CONCURRENTLY IF EXISTS ix_requirements_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_compliance_mappings_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_import_sessions_id;
+
+-- Préfixes des nouveaux index composites
+DROP INDEX CONCURRENTLY IF EXISTS idx_requirements_session;
+DROP INDEX CONCURRENTLY IF EXISTS ix_requirements_import_session_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_requirements_status;
+DROP INDEX CONCURRENTLY IF EXISTS idx_import_sessions_date;
+DROP INDEX CONCURRENTLY IF EXISTS ix_import_sessions_import_date;
+
+-- Booléen peu sélectif, remplacé par l'index partiel
+DROP INDEX CONCURRENTLY IF EXISTS idx_mappings_active;
+DROP INDEX CONCURRENTLY IF EXISTS ix_compliance_mappings_is_active;
+
+-- 4. Statistiques à jour pour le planificateur
+ANALYZE requirements;
+ANALYZE compliance_mappings;
+ANALYZE import_sessions;
+
+SELECT 'Migration query_indexes terminée avec succès!' as status;
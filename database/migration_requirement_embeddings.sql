@@ -0,0 +1,24 @@
+-- Migration: Embeddings des exigences persistés
+-- Description: Table requirement_embeddings (clé: SHA-256 du texte normalisé + modèle)
+--              réutilisée par le service ML: seuls les textes jamais encodés par le
+--              modèle passent par lui (réimports, /api/analyze/batch répétés).
+-- Idempotente: peut être rejouée sans effet.
+
+CREATE TABLE IF NOT EXISTS requirement_embeddings (
+    -- SHA-256 du texte normalisé (NFC, espaces réduits)
+    text_hash VARCHAR(64) NOT NULL,
+    model_name VARCHAR(255) NOT NULL,
+
+    -- Vecteur float32 sérialisé
+    dimension INTEGER NOT NULL,
+    embedding BYTEA NOT NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (text_hash, model_name)
+);
+
+-- Purge des embeddings d'un ancien modèle (après changement de ML_MODEL_NAME):
+-- DELETE FROM requirement_embeddings WHERE model_name <> 'paraphrase-multilingual-mpnet-base-v2';
+
+SELECT 'Migration requirement_embeddings terminée avec succès!' as status;
@@ -0,0 +1,55 @@
+-- Migration: Contrainte d'unicité des exigences par fichier source
+-- Date: 2026-10-19
+-- Description: Garantit en base l'unicité (original_id, source_file) utilisée par les imports
+--              (INSERT ... ON CONFLICT DO NOTHING). Les bases créées par SQLAlchemy
+--              (create_all) n'ont pas la contrainte unique_requirement de schema.sql.
+
+-- 1. Dédoublonner les exigences existantes (on conserve la plus ancienne)
+--    Les mappings des doublons sont rattachés à l'exigence conservée avant suppression
+DO $$
+DECLARE
+    duplicates INTEGER;
+BEGIN
+    CREATE TEMP TABLE requirement_duplicates ON COMMIT DROP AS
+    SELECT id, keep_id
+    FROM (
+        SELECT
+            id,
+            MIN(id) OVER (PARTITION BY original_id, source_file) AS keep_id
+        FROM requirements
+        WHERE original_id IS NOT NULL AND source_file IS NOT NULL
+    ) r
+    WHERE id <> keep_id;
+
+    SELECT COUNT(*) INTO duplicates FROM requirement_duplicates;
+
+    IF duplicates > 0 THEN
+        UPDATE compliance_mappings m
+        SET requirement_id = d.keep_id
+        FROM requirement_duplicates d
+        WHERE m.requirement_id = d.id;
+
+        DELETE FROM requirements r
+        USING requirement_duplicates d
+        WHERE r.id = d.id;
+
+        RAISE NOTICE '% exigences en double supprimées', duplicates;
+    END IF;
+END $$;
+
+-- 2. Ajouter la contrainte (même nom que dans schema.sql) si elle n'existe pas
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'unique_requirement'
+        AND conrelid = 'requirements'::regclass
+    ) THEN
+        ALTER TABLE requirements
+        ADD CONSTRAINT unique_requirement UNIQUE (original_id, source_file);
+        RAISE NOTICE 'Contrainte unique_requirement ajoutée à requirements';
+    END IF;
+END $$;
+
+-- Afficher le résultat
+SELECT 'Migration terminée avec succès!' as status;
@@ -137,7 +137,8 @@ CREATE TABLE analysis_history (
 -- ============================================
 
 -- Index sur requirements
-CREATE INDEX idx_requirements_status ON requirements(analysis_status);
+-- (analysis_status, id): liste filtrée par statut et paginée par id
+CREATE INDEX idx_requirements_status_id ON requirements(analysis_status, id);
 CREATE INDEX idx_requirements_source ON requirements(source_file);
 CREATE INDEX idx_requirements_imported ON requirements(imported_at);
 
@@ -147,8 +148,9 @@ CREATE INDEX idx_scf_domain ON scf_controls(domain);
 CREATE INDEX idx_scf_category ON scf_controls(category);
 
 -- Index sur compliance_mappings
+-- Les index liés aux sessions d'import (colonne import_session_id) sont créés par
+-- migration_add_import_sessions.sql puis migration_query_indexes.sql
 CREATE INDEX idx_mappings_requirement ON compliance_mappings(requirement_id);
-CREATE INDEX idx_mappings_active ON compliance_mappings(is_active);
 CREATE INDEX idx_mappings_source ON compliance_mappings(mapping_source);
 
 -- Index sur analysis_history
@@ -72,6 +72,54 @@ export const uploadExcelFile = async (file: File): Promise<{
   }
 };
 
+export interface ExcelSheetPreview {
+  sheet_name: string;
+  headers: string[];
+  rows: Array<Array<string | null>>;
+  id_col: string | null;
+  req_col: string | null;
+  verif_col: string | null;
+}
+
+/**
+ * Aperçu d'un fichier Excel (en-têtes, premières lignes, colonnes détectées) sans import
+ * Seul le début de chaque feuille est lu côté serveur
+ */
+export const previewExcelFile = async (file: File, rows: number = 10): Promise<{
+  success: boolean;
+  filename: string;
+  sheets: ExcelSheetPreview[];
+}> => {
+  try {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch(`${API_BASE_URL}/api/import/preview?rows=${rows}`, {
+      method: 'POST',
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({ detail: 'Erreur inconnue' }));
+      throw new MLAPIError(
+        errorData.detail || `Erreur HTTP ${response.status}`,
+        response.status
+      );
+    }
+
+    return await response.json();
+  } catch (error) {
+    if (error instanceof MLAPIError) {
+      throw error;
+    }
+    throw new MLAPIError(
+      "Impossible de se connecter au backend ML. Assurez-vous qu'il est lancé (port 8000).",
+      undefined,
+      error
+    );
+  }
+};
+
 /**
  * Récupère toutes les exigences depuis la base de données
  */
@@ -196,16 +244,25 @@ export const findSimilarControls = async (
 /**
  * Récupère les statistiques globales
  */
-export const getStats = async (): Promise<{
+export const getStats = async (bySession: boolean = false): Promise<{
   total_requirements: number;
   analyzed: number;
   pending: number;
   manual: number;
   total_mappings: number;
   completion_rate: number;
+  sessions?: Array<{
+    import_session_id: number | null;
+    total_requirements: number;
+    analyzed: number;
+    pending: number;
+    manual: number;
+    total_mappings: number;
+    completion_rate: number;
+  }>;
 }> => {
   try {
-    const response = await fetch(`${API_BASE_URL}/api/stats`);
+    const response = await fetch(`${API_BASE_URL}/api/stats${bySession ? '?by_session=true' : ''}`);
 
     if (!response.ok) {
       throw new MLAPIError(`Erreur HTTP ${response.status}`, response.status);
@@ -349,11 +406,14 @@ export interface ImportSession {
 export const getImportSessions = async (params?: {
   limit?: number;
   offset?: number;
+  cursor?: string;
+  include_total?: boolean;
   status?: string;
   analysis_source?: string;
 }): Promise<{
   success: boolean;
-  total: number;
+  total: number | null;
+  next_cursor: string | null;
   sessions: ImportSession[];
 }> => {
   try {
@@ -361,6 +421,9 @@ export const getImportSessions = async (params?: {
 
     if (params?.limit) queryParams.append('limit', params.limit.toString());
     if (params?.offset) queryParams.append('offset', params.offset.toString());
+    // Pagination par curseur: next_cursor de la page précédente
+    if (params?.cursor) queryParams.append('cursor', params.cursor);
+    if (params?.include_total) queryParams.append('include_total', 'true');
     if (params?.status) queryParams.append('status', params.status);
     if (params?.analysis_source) queryParams.append('analysis_source', params.analysis_source);
 